@@ -1,5 +1,6 @@
 from direction import Direction
-from coordinates import Coordinates
+from geometry import NEIGHBOR_OFFSETS, SPREAD_RADIUS
+from random_streams import DEATH, INFECTION
 import random
 
 class AI():
@@ -22,23 +23,22 @@ class AI():
 
      - Every AI are given individual (randomly generated) attributes that affect the susceptibility of the disease
 
-    This class also keeps track of some statistics for the simulation, for example the amount of dead or recovered AI.
-    """
+    The AI report the events of the simulation, for example deaths and recoveries, to the statistics of their world.
 
-    # STATISTICS
-    dead_count = 0
-    recovered_count = 0
-    infected_count = 0
-    vaccinated_count = 0
+    The attributes of an AI are stored in slots instead of an instance dictionary, since a simulation can contain a
+    very large number of AI.
+    """
 
-    gender_count = {"male": 0, "female": 0}
-    smoker_count = {"smoker": 0, "non-smoker": 0}
-    pre_existing_conditions_count = {"yes": 0, "no": 0}
-    lifestyle_count = {"active": 0, "sedentary": 0, "moderate": 0}
+    __slots__ = ("age", "gender", "smoker", "pre_existing_conditions", "lifestyle", "susceptibility",
+                 "spread_type", "infection_chance", "death_chance", "incubation_duration", "recovery_duration",
+                 "incubation_time", "recovery_time", "name", "world", "location", "brain", "facing",
+                 "is_doctor", "is_vaccinator", "is_avoiding", "is_builder",
+                 "susceptible", "infected", "sick", "recovered", "dead", "vaccinated", "vaccination_rate",
+                 "graphics_item", "graphics_changed", "id", "random_turn", "random_streams")
 
     def __init__(self, name, spread_type, infection_chance, death_chance, incubation_duration,
                  recovery_duration, vaccination_rate, is_doctor=False, is_vaccinator=False, is_avoiding=False,
-                 is_builder=False):
+                 is_builder=False, rng=random):
         """
         Creates a new AI with the given name. The newly
         created AI is initially just a "dumb shell" until
@@ -47,20 +47,17 @@ class AI():
 
         If the given name is None or an empty
         string, the name is set to "Incognito".
+
+        Parameter rng is the random number generator of the attributes of the AI. World.create_AI gives each AI a
+        random stream of its own, other AI use the random module.
         """
 
         # Assign random attributes
-        self.age = random.randint(0, 100)
-        self.gender = random.choice(["male", "female"])
-        self.smoker = random.choice([True, False])
-        self.pre_existing_conditions = random.choice([True, False])
-        self.lifestyle = random.choice(["active", "sedentary", "moderate"])
-
-        # Update class-level dictionaries with the generated attributes
-        AI.gender_count[self.gender] += 1
-        AI.smoker_count["smoker" if self.smoker else "non-smoker"] += 1
-        AI.pre_existing_conditions_count["yes" if self.pre_existing_conditions else "no"] += 1
-        AI.lifestyle_count[self.lifestyle] += 1
+        self.age = rng.randint(0, 100)
+        self.gender = rng.choice(["male", "female"])
+        self.smoker = rng.choice([True, False])
+        self.pre_existing_conditions = rng.choice([True, False])
+        self.lifestyle = rng.choice(["active", "sedentary", "moderate"])
 
         # Compute susceptibility
         self.susceptibility = self.calculate_susceptibility()
@@ -79,6 +76,7 @@ class AI():
         #General AI information
         self.set_name(name)
         self.world = None        # fixed value
+        self.id = None           # fixed value, given by the world, see World.create_AI
         self.location = None     # most-recent holder
         self.brain = None        # most-recent holder
         self.facing = None       # most-recent holder
@@ -102,6 +100,9 @@ class AI():
 
         #AI graphics item
         self.graphics_item = None
+        self.graphics_changed = False    # flag, set when the AI is in the changed AI of its world
+        self.random_turn = None          # the full turn of the random streams in random_streams
+        self.random_streams = None       # maps the purposes of the current full turn to their random streams
 
 
     def set_name(self, name):
@@ -177,56 +178,114 @@ class AI():
         """
         return self.facing
 
+    def get_health_state(self):
+        """
+        Returns the health state of the AI as one of "susceptible", "infected", "sick", "recovered" and "dead": str
+        """
+        if self.susceptible:
+            return "susceptible"
+        elif self.infected:
+            return "infected"
+        elif self.sick:
+            return "sick"
+        elif self.recovered:
+            return "recovered"
+        else:
+            return "dead"
+
+    def get_role(self):
+        """
+        Returns the role of the AI as one of "smart", "avoiding", "doctor", "vaccinator" and "builder": str
+        """
+        if self.is_doctor:
+            return "doctor"
+        elif self.is_vaccinator:
+            return "vaccinator"
+        elif self.is_avoiding:
+            return "avoiding"
+        elif self.is_builder:
+            return "builder"
+        else:
+            return "smart"
+
+    def report_state_change(self, old_state):
+        """
+        Reports a change of the health state to the state index of the world, if the AI is in a world.
+        """
+        if self.world is not None:
+            self.world.state_index.change_state(self, old_state, self.get_health_state())
+        self.mark_graphics_changed()
+
+    def mark_graphics_changed(self):
+        """
+        Records in the world that the location, facing or health state of the AI has changed, if the world keeps
+        track of changes for the GUI. The AI is recorded only once until the next snapshot, see snapshot.py.
+        """
+        world = self.world
+        if world is not None and world.track_changes and not self.graphics_changed:
+            self.graphics_changed = True
+            world.changed_AI.append(self)
+
     def get_infected(self):
         """
         Makes the AI infected but not yet sick.
         """
+        old_state = self.get_health_state()
         self.susceptible = False
         self.infected = True
         self.sick = False
         self.recovered = False
         self.dead = False
+        self.report_state_change(old_state)
 
     def get_sick(self):
         """
         Makes the AI sick.
         """
+        old_state = self.get_health_state()
         self.susceptible = False
         self.infected = False
         self.sick = True
         self.recovered = False
         self.dead = False
+        self.report_state_change(old_state)
 
     def get_healthy(self):
         """
         Makes the AI well again.
         """
+        old_state = self.get_health_state()
         self.susceptible = False
         self.infected = False
         self.sick = False
         self.recovered = True
         self.dead = False
+        self.report_state_change(old_state)
 
     def die(self):
         """
-        Kills the AI and removes the graphics item from the simulation
+        Kills the AI and removes it from the world. The GUI removes its graphics item after the next snapshot.
         """
+        old_state = self.get_health_state()
         self.susceptible = False
         self.infected = False
         self.sick = False
         self.recovered = False
         self.dead = True
-        AI.dead_count += 1
+        self.report_state_change(old_state)
+        self.world.statistics.dead_count += 1
         self.get_location_square().remove_AI()
-        if self.graphics_item:
-            self.world.gui.delete_AI_graphics_item(self.graphics_item)
+        self.world.spatial_index.remove(self, self.get_location())
+        self.world.retire_AI(self)
 
     def vaccinate(self):
         """
         Vaccinates the AI, making it immune to the disease.
         """
         self.vaccinated = True
-        AI.vaccinated_count += 1
+        if self.world is not None:
+            self.world.statistics.vaccinated_count += 1
+            self.world.state_index.vaccinate(self)
 
     def is_vaccinated(self):
         """
@@ -265,8 +324,10 @@ class AI():
         if world is None:
             return True
 
-        for value in Direction.get_values():          # most-recent holder
-            if not world.get_square(self.get_location().get_neighbor(value)).is_wall_square():
+        x = self.get_location().get_x()
+        y = self.get_location().get_y()
+        for x_step, y_step in Direction.get_values():          # most-recent holder
+            if not world.is_wall_at(x + x_step, y + y_step):
                 return False
         return True
 
@@ -294,6 +355,8 @@ class AI():
         Turns the AI in the specified direction, if the
         AI is intact. If the AI is broken, the method does nothing.
         """
+        if self.world is not None and self.world.track_changes and new_facing != self.facing:
+            self.mark_graphics_changed()
         self.facing = new_facing
 
 
@@ -312,18 +375,19 @@ class AI():
         does not move (but still turns to face whatever it collided
         with).
         """
-        target = self.get_location().get_neighbor(direction)
-        current_square = self.get_location_square()
-        target_square = self.get_world().get_square(target)
+        world = self.get_world()
+        target_x = self.get_location().get_x() + direction[0]
+        target_y = self.get_location().get_y() + direction[1]
         self.spin(direction)
-        if target_square.is_empty():
-            current_square.remove_AI()
+        if world.is_empty_at(target_x, target_y):
+            target = world.get_coordinates(target_x, target_y)
+            self.get_location_square().remove_AI()
+            self.world.spatial_index.move(self, self.location, target)
             self.location = target
-            target_square.set_AI(self)
+            world.get_square(target).set_AI(self)
+            self.mark_graphics_changed()
             return True
-        elif target_square.get_AI() is not None:
-            return False
-        else:   # collided with wall
+        else:   # collided with another AI or a wall
             return False
 
 
@@ -334,6 +398,24 @@ class AI():
         return self.move(self.get_facing())
 
 
+    def get_random(self, purpose):
+        """
+        Returns the random stream of this AI for the current full turn of its world and the given purpose, see
+        random_streams.py. The stream is created once per full turn and purpose, so every draw of the turn continues
+        the same stream and two draws for the same purpose give different numbers.
+
+        Returns: RandomStream
+        """
+        turn = self.world.turn_count
+        if self.random_turn != turn:
+            self.random_turn = turn
+            self.random_streams = {}
+        stream = self.random_streams.get(purpose)
+        if stream is None:
+            stream = self.random_streams[purpose] = self.world.random.get_stream(self.id, turn, purpose)
+        return stream
+
+
     def take_turn(self):
         """
         Gives the AI a turn to act. An unstuck AI, however, consults its brain to
@@ -409,63 +491,35 @@ class AI():
         if self.is_sick():
             self.recovery_time += 1
             if self.recovery_time > self.recovery_duration:
-                if random.random() < self.death_chance:
+                if self.world.random.random(self.id, self.world.turn_count, DEATH) < self.death_chance:
                     self.die()
                 else:
                     self.get_healthy()
-                    AI.recovered_count += 1
+                    self.world.statistics.recovered_count += 1
                 self.recovery_time = 0
 
         if self.is_recovered():
             return False
 
-        if self.spread_type == 0:
-            if self.is_susceptible():
-                # Check nearby AI:
-                for x_offset in range(-1, 2):
-                    for y_offset in range(-1, 2):
-                        if x_offset == 0 and y_offset == 0:
-                            # Skip the AI's own square
-                            continue
-
-                        neighbor_x = self.get_location().get_x() + x_offset
-                        neighbor_y = self.get_location().get_y() + y_offset
-                        neighbor_square = self.world.get_square(Coordinates(neighbor_x, neighbor_y))
-
-                        # Check if there is an AI in the neighbor square and if it is sick
-                        if neighbor_square.get_AI() is not None and neighbor_square.get_AI().is_sick():
-                            if not self.is_vaccinated():
-                                if random.random() < self.infection_chance * self.susceptibility:
-                                    self.get_infected()
-                                    AI.infected_count += 1
-                            if self.is_vaccinated():
-                                if random.random() < self.infection_chance * self.vaccination_rate * self.susceptibility:
-                                    self.get_infected()
-                                    AI.infected_count += 1
-
-        if self.spread_type == 1:
-            if self.is_susceptible():
-                # Check nearby AI within a distance of 2:
-                for x_offset in range(-2, 3):
-                    for y_offset in range(-2, 3):
-                        if x_offset == 0 and y_offset == 0:
-                            # Skip the AI's own square
-                            continue
-
-                        neighbor_x = self.get_location().get_x() + x_offset
-                        neighbor_y = self.get_location().get_y() + y_offset
-                        neighbor_square = self.world.get_square(Coordinates(neighbor_x, neighbor_y))
-
-                        # Check if there is an AI in the neighbor square and if it is sick
-                        if neighbor_square.get_AI() is not None and neighbor_square.get_AI().is_sick():
-                            if not self.is_vaccinated():
-                                if random.random() < self.infection_chance * self.susceptibility:
-                                    self.get_infected()
-                                    AI.infected_count += 1
-                            if self.is_vaccinated():
-                                if random.random() < self.infection_chance * self.vaccination_rate * self.susceptibility:
-                                    self.get_infected()
-                                    AI.infected_count += 1
+        if self.spread_type in SPREAD_RADIUS and self.is_susceptible():
+            # Check nearby AI (direct contact for spread type 0, within a distance of 2 for spread type 1):
+            world = self.world
+            x = self.get_location().get_x()
+            y = self.get_location().get_y()
+            random_stream = self.get_random(INFECTION)
+            for x_offset, y_offset in NEIGHBOR_OFFSETS[SPREAD_RADIUS[self.spread_type]]:
+                neighbor = world.get_AI_at(x + x_offset, y + y_offset)
+
+                # Check if there is an AI in the neighbor square and if it is sick
+                if neighbor is not None and neighbor.is_sick():
+                    if not self.is_vaccinated():
+                        if random_stream.random() < self.infection_chance * self.susceptibility:
+                            self.get_infected()
+                            world.statistics.infected_count += 1
+                    if self.is_vaccinated():
+                        if random_stream.random() < self.infection_chance * self.vaccination_rate * self.susceptibility:
+                            self.get_infected()
+                            world.statistics.infected_count += 1
 
     def __str__(self):
         return self.get_name() + ' at location ' + str(self.get_location())
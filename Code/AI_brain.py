@@ -1,7 +1,4 @@
-from AI import AI
-
-
-class AIbrain(AI):
+class AIbrain():
     """
     The class `AIbrain` represents the "brains" (or artificial intelligence, AI) of
     virtual AI that inhabit two dimensional grid worlds. An AI brain is equipped
@@ -11,12 +8,24 @@ class AIbrain(AI):
     Concrete class that extend this class need to provide implementations for the abstract
     `move_body` method; each such concrete class can represent a new kind of AI behavior.
 
-    The given parameter body is the AI that the brain controls.
+    The given parameter body is the AI that the brain controls. A brain only stores the body and the state of its
+    own behavior, in slots, since every AI in a simulation has a brain of its own.
     """
 
+    __slots__ = ("body",)
+
     def __init__(self, body):
         self.body = body
 
 
+    def get_random(self, purpose):
+        """
+        Returns the random stream of the body for the current full turn and the given purpose, see random_streams.py
+
+        Returns: RandomStream
+        """
+        return self.body.get_random(purpose)
+
+
     def move_body(self):
         pass
@@ -2,8 +2,35 @@ from PyQt6 import QtWidgets, QtGui, QtCore
 from AI import AI
 from coordinates import Coordinates
 from direction import Direction
+from snapshot import get_display_state
 import math
 
+# The colors of the health states of the AI
+SICK_COLOR = QtGui.QColor(255, 0, 0)
+STUCK_COLOR = QtGui.QColor(255, 255, 0)
+RECOVERED_COLOR = QtGui.QColor(0, 0, 255)
+SUSCEPTIBLE_COLOR = QtGui.QColor(0, 255, 0)
+INFECTED_COLOR = QtGui.QColor(255, 20, 147)
+
+# Maps the display states of snapshot.get_display_state to colors. Dead AI have no color.
+STATE_COLORS = {
+    "susceptible": SUSCEPTIBLE_COLOR,
+    "infected": INFECTED_COLOR,
+    "sick": SICK_COLOR,
+    "stuck": STUCK_COLOR,
+    "recovered": RECOVERED_COLOR
+}
+
+
+def get_color(AI):
+    """
+    Returns the color of an AI: red if it is sick, yellow if it is sick and stuck, pink if it is infected, green if
+    it is susceptible and blue if it has recovered. Dead AI have no color.
+
+    Returns: QColor or None
+    """
+    return STATE_COLORS.get(get_display_state(AI))
+
 
 class AIGraphicsItem(QtWidgets.QGraphicsPolygonItem):
     """
@@ -19,16 +46,24 @@ class AIGraphicsItem(QtWidgets.QGraphicsPolygonItem):
     Builder: Square
     """
 
-    def __init__(self, AI, square_size):
+    def __init__(self, AI, square_size, record=None):
+        """
+        Parameter record is the record of the AI in a snapshot (see snapshot.py), or None to read the location and
+        status from the AI itself
+        """
         # Call init of the parent object
         super(AIGraphicsItem, self).__init__()
 
         self.AI = AI
         self.square_size = square_size
+        self.color = None
         brush = QtGui.QBrush(1) # 1 for even fill
         self.setBrush(brush)
         self.constructVertices()
-        self.updateAll()
+        if record is None:
+            self.updateAll()
+        else:
+            self.updateFromRecord(record)
 
     def constructVertices(self):
         if self.AI.is_doctor_instance():
@@ -173,6 +208,18 @@ class AIGraphicsItem(QtWidgets.QGraphicsPolygonItem):
         self.updateColor()
 
 
+    def updateFromRecord(self, record):
+        """
+        Updates the location, direction and status of this item to match the record of the AI in a snapshot, see
+        snapshot.get_record.
+        """
+        x, y, facing, state = record
+        self.setX(x * self.square_size)
+        self.setY(y * self.square_size)
+        self.setRotation(Direction.get_degrees(facing))
+        self.setColor(STATE_COLORS.get(state))
+
+
     def updatePosition(self):
         """
         Updates the coordinates of this item to match the attached AI.
@@ -195,21 +242,26 @@ class AIGraphicsItem(QtWidgets.QGraphicsPolygonItem):
     def updateColor(self):
         """
         Draws broken AI in red, infected i pink, stuck in yellow, susceptible in green, recovered in blue.
+        The brush is only changed when the color changes.
         """
-        if self.AI.is_sick():
-            self.setBrush(QtGui.QColor(255, 0, 0))
-        if self.AI.is_stuck():
-            self.setBrush(QtGui.QColor(255, 255, 0))
-        if self.AI.is_recovered():
-            self.setBrush(QtGui.QColor(0, 0, 255))
-        if self.AI.is_susceptible():
-            self.setBrush(QtGui.QColor(0, 255, 0))
-        if self.AI.is_infected():
-            self.setBrush(QtGui.QColor(255, 20, 147))
+        self.setColor(get_color(self.AI))
+
+
+    def setColor(self, color):
+        """
+        Changes the brush of this item to the given color, if the color is not None and has changed.
+        """
+        if color is not None and color is not self.color:
+            self.color = color
+            self.setBrush(color)
 
 
     def mousePressEvent(self, *args, **kwargs):
         """
         Remove the AI from the simulation
         """
-        self.AI.die()
+        gui = self.AI.get_world().gui
+        if gui is not None:
+            gui.remove_AI(self.AI)
+        else:
+            self.AI.die()
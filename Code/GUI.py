@@ -1,119 +1,311 @@
+import time
 from PyQt6 import QtWidgets, QtCore, QtGui
 from AI_graphics_item import AIGraphicsItem
-from coordinates import Coordinates
+from population_item import PopulationGraphicsItem
+from snapshot import SnapshotMaker, SnapshotBuffer
+from simulation_worker import SimulationWorker, FRAME_BUDGET, run_turns
+
+# The colors of the squares of the world
+WALL_COLOR = QtGui.QColor(20, 20, 20)
+FLOOR_COLOR = QtGui.QColor(211, 211, 211)
+
+# The largest width and height of the drawn world grid in pixels. The squares of larger worlds are drawn smaller, see
+# get_square_size.
+MAX_GRID_SIZE = 4096
+
+# The smallest square size in pixels at which the squares are drawn with an outline
+MIN_OUTLINED_SQUARE_SIZE = 4
+
+# The empty space around the world grid in the scene, in pixels
+SCENE_MARGIN = 20
+
+# With the renderer "auto", worlds with more AI than this are drawn with a single PopulationGraphicsItem instead of one
+# AIGraphicsItem per AI
+BATCHED_RENDERING_THRESHOLD = 2000
+
+# The default time between two full turns in seconds, and the time between two frames in milliseconds when the world
+# is stepped in a background thread
+TURN_INTERVAL = 0.1
+FRAME_INTERVAL = 40
+
+# The speeds of the speed control: the number of full turns per turn interval, or None to run as many turns as fit in
+# FRAME_BUDGET of every frame, see simulation_worker.run_turns
+SPEEDS = {"1x": 1, "2x": 2, "5x": 5, "10x": 10, "50x": 50, "Max": None}
+
+# The shortest time between two timer ticks in milliseconds, so that the events of the window are always handled
+MIN_TIMER_INTERVAL = 5
+
+
+def get_square_size(world, square_size):
+    """
+    Returns the size of the squares of the world in pixels: the given size, or a smaller one if the world grid would
+    otherwise be larger than MAX_GRID_SIZE pixels wide or high: int
+    """
+    largest = max(world.get_width(), world.get_height(), 1)
+    return max(1, min(square_size, MAX_GRID_SIZE // largest))
 
 
 class GUI(QtWidgets.QMainWindow):
     """
     The class GUI handles the drawing of a World and allows user to
     interact with it.
+
+    The GUI draws snapshots of the world (see snapshot.py) instead of reading the world directly. The world is
+    stepped either by the timer of the GUI, a number of full turns before every frame, or with threaded=True by a
+    SimulationWorker in a background thread, in which case the GUI draws the latest snapshot at its own frame rate.
+
+    The speed control of the window sets how many full turns are run per turn interval (see SPEEDS). Only the state
+    after the last of them is drawn.
+
+    The scene is sized to the world and the view scrolls when the world does not fit in the window. The squares of
+    large worlds are drawn smaller than the given square size, see get_square_size.
+
+    The AI are drawn either with one AIGraphicsItem per AI (the renderer "items"), or all at once with a single
+    PopulationGraphicsItem (the renderer "batched"), which is much faster for large populations.
     """
 
-    def __init__(self, world, square_size):
+    def __init__(self, world, square_size, renderer="auto", threaded=False, turn_interval=TURN_INTERVAL):
+        """
+        Parameter square_size is the size of the squares in pixels, at most: int
+
+        Parameter renderer is "items", "batched" or "auto", which chooses "batched" for worlds with more than
+        BATCHED_RENDERING_THRESHOLD AI: str
+
+        Parameter threaded tells whether the world is stepped in a background thread: bool
+
+        Parameter turn_interval is the shortest time between two full turns at the speed 1x in seconds: float
+        """
         super().__init__()
         self.setCentralWidget(QtWidgets.QWidget())  # QMainWindown must have a centralWidget to be able to add layouts
         self.horizontal = QtWidgets.QHBoxLayout()  # Horizontal main layout
         self.centralWidget().setLayout(self.horizontal)
         self.world = world
-        self.square_size = square_size
+        self.square_size = get_square_size(world, square_size)
         self.init_window()
         self.world.gui = self
+        self.turn_interval = turn_interval
+        self.turns_per_frame = 1         # the speed, see SPEEDS
+        self.turn_cost = 0.0             # the measured time of a full turn in seconds
+        self.running = True              # flag, cleared when the window is closed
+        self.AI_graphics_items = {}      # maps each AI to its AIGraphicsItem
+        if renderer == "auto":
+            renderer = "batched" if world.get_number_of_AI() > BATCHED_RENDERING_THRESHOLD else "items"
+        self.renderer = renderer
+        self.population_item = None      # draws all the AI with the renderer "batched"
+        self.snapshots = SnapshotMaker(world, arrays=(renderer == "batched"))
+        self.buffer = SnapshotBuffer()
+        self.buffer.publish(self.snapshots.take())
+
+        # Set a timer to call the update function periodically
+        self.timer = QtCore.QTimer()
+        self.worker = None
 
         self.add_AI_world_grid_items()
         self.add_AI_graphics_items()
         self.update()
 
-        # Set a timer to call the update function periodically
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self.world.next_full_turn)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(100)  # Milliseconds
+        if threaded:
+            self.worker = SimulationWorker(world, self.snapshots, self.buffer, turn_interval, FRAME_INTERVAL / 1000)
+            self.timer.timeout.connect(self.update)
+            self.worker.start()
+            self.timer.start(FRAME_INTERVAL)  # Milliseconds
+        else:
+            self.timer.timeout.connect(self.tick)
+            self.timer.start(int(turn_interval * 1000))  # Milliseconds
 
     def add_AI_world_grid_items(self):
         """
-        This function iterates through the world grid and creates a QGraphicsRectItem for each square.
-        It sets the position, width, and height of the QGraphicsRectItem based on the square's coordinates and size.
-        It also sets the color of the QGraphicsRectItem based on whether the square is a wall or not.
-        """
-        for x in range(self.world.get_width()):
-            for y in range(self.world.get_height()):
-                # Create a new QGraphicsRectItem with the correct position, width, and height.
-                rect = QtWidgets.QGraphicsRectItem(x * self.square_size, y * self.square_size, self.square_size,
-                                                   self.square_size)
-                # Add the newly created item to the scene
-                self.scene.addItem(rect)
-                # Set color based on whether square is a wall or not
-                if self.world.get_square(Coordinates(x, y)).is_wall:
-                    color = QtGui.QColor(20, 20, 20)
-                else:
-                    color = QtGui.QColor(211, 211, 211)
-                brush = QtGui.QBrush(color)
-                rect.setBrush(brush)
+        Draws the squares of the world grid into a single pixmap and adds it to the scene as the background of the
+        AI. Walls are dark and the other squares light grey, and squares of at least MIN_OUTLINED_SQUARE_SIZE pixels
+        have a black outline. The pixmap is filled with the floor color, the outlines are drawn as one line per row
+        and column, and then only the walls are drawn square by square. After this, only the squares that have
+        become walls in the snapshots are drawn again, see update_grid.
+        """
+        size = self.square_size
+        width = self.world.get_width() * size
+        height = self.world.get_height() * size
+        self.grid_pixmap = QtGui.QPixmap(width + 1, height + 1)
+        self.grid_pixmap.fill(FLOOR_COLOR)
+        painter = QtGui.QPainter(self.grid_pixmap)
+        if size >= MIN_OUTLINED_SQUARE_SIZE:
+            painter.setPen(QtGui.QColor(0, 0, 0))
+            for x in range(0, width + 1, size):
+                painter.drawLine(x, 0, x, height)
+            for y in range(0, height + 1, size):
+                painter.drawLine(0, y, width, y)
+        for x, y in self.world.get_wall_squares():
+            self.draw_square(painter, x, y, True)
+        painter.end()
+        self.grid_item = QtWidgets.QGraphicsPixmapItem(self.grid_pixmap)
+        self.grid_item.setZValue(-1)  # Below the AI graphics items
+        self.scene.addItem(self.grid_item)
+
+    def draw_square(self, painter, x, y, is_wall):
+        """
+        Draws the square (x, y) of the world with the given painter.
+        """
+        if is_wall:
+            color = WALL_COLOR
+        else:
+            color = FLOOR_COLOR
+        if self.square_size < MIN_OUTLINED_SQUARE_SIZE:
+            painter.fillRect(x * self.square_size, y * self.square_size, self.square_size, self.square_size, color)
+            return
+        painter.setPen(QtGui.QColor(0, 0, 0))
+        painter.setBrush(QtGui.QBrush(color))
+        painter.drawRect(x * self.square_size, y * self.square_size, self.square_size, self.square_size)
 
     def add_AI_graphics_items(self):
         """
-        This function iterates through the AI instances in the world and creates a new AIGraphicsItem for each AI
-        that has not been added yet. It sets the graphics_item attribute of the AI to the created AIGraphicsItem
-        and adds the AIGraphicsItem to the scene.
+        With the renderer "batched", adds the single PopulationGraphicsItem that draws all the AI. With the renderer
+        "items", the AIGraphicsItems are added when the AI first appear in a snapshot, see update_AI_graphics_items.
         """
-        added_AI = []
+        if self.renderer == "batched" and self.population_item is None:
+            self.population_item = PopulationGraphicsItem(self.world, self.square_size)
+            self.scene.addItem(self.population_item)
 
-        for AI in self.world.AI:
-            if AI not in added_AI:
-                # create new AIGraphicsItem for this AI
-                graphics_item = AIGraphicsItem(AI, self.square_size)
-                AI.graphics_item = graphics_item  # Set the graphics_item attribute of the AI
-                self.scene.addItem(graphics_item)
-                added_AI.append(AI)
+    def add_AI_graphics_item(self, AI, record):
+        """
+        Creates a new AIGraphicsItem for the AI, adds it to the scene and records it in the registry of graphics
+        items.
+        """
+        graphics_item = AIGraphicsItem(AI, self.square_size, record)
+        AI.graphics_item = graphics_item  # Set the graphics_item attribute of the AI
+        self.scene.addItem(graphics_item)
+        self.AI_graphics_items[AI] = graphics_item
 
     def delete_AI_graphics_item(self, ai_graphics_item):
         """
         Remove the AI's graphics item from the scene.
         """
         self.scene.removeItem(ai_graphics_item)
+        self.AI_graphics_items.pop(ai_graphics_item.AI, None)
+        ai_graphics_item.AI.graphics_item = None
 
     def get_AI_graphics_items(self):
         """
         Returns all the AIGraphicsItem in the scene.
         """
-        items = []
-        for item in self.scene.items():
-            if type(item) is AIGraphicsItem:
-                items.append(item)
-        return items
+        return list(self.AI_graphics_items.values())
 
-    def update_AI_graphics_items(self):
+    def update_AI_graphics_items(self, snapshot):
         """
-        Iterates over all AI items and updates their position to match
-        their physical representations in the world.
+        Updates the position, rotation and color of the AI items whose AI have changed in the snapshot, adds items
+        for new AI and removes the items of dead AI.
+
+        With the renderer "batched", the population item draws the snapshot instead.
         """
-        for AI_item in self.get_AI_graphics_items():
-            AI_item.updateAll()
+        if self.population_item is not None:
+            self.population_item.set_snapshot(snapshot)
+            return
+        for AI, record in snapshot.records.items():
+            graphics_item = self.AI_graphics_items.get(AI)
+            if record is None:
+                if graphics_item is not None:
+                    self.delete_AI_graphics_item(graphics_item)
+            elif graphics_item is None:
+                self.add_AI_graphics_item(AI, record)
+            else:
+                graphics_item.updateFromRecord(record)
 
-    def update_grid(self):
-        for x in range(self.world.get_width()):
-            for y in range(self.world.get_height()):
-                square = self.world.get_square(Coordinates(x, y))
-                rect = self.scene.itemAt(float(x * self.square_size + self.square_size // 2),
-                                         float(y * self.square_size + self.square_size // 2), self.view.transform())
+    def update_grid(self, snapshot):
+        """
+        Draws the squares that have become walls in the snapshot into the grid pixmap. If no square has changed,
+        nothing is drawn, so the cost does not depend on the size of the world.
+        """
+        if not snapshot.changed_squares:
+            return
+        painter = QtGui.QPainter(self.grid_pixmap)
+        for x, y in snapshot.changed_squares:
+            self.draw_square(painter, x, y, True)
+        painter.end()
+        self.grid_item.setPixmap(self.grid_pixmap)
 
-                if not isinstance(rect, AIGraphicsItem):  # Add this check
-                    if square.is_wall:
-                        color = QtGui.QColor(20, 20, 20)
-                    else:
-                        color = QtGui.QColor(211, 211, 211)
-                    brush = QtGui.QBrush(color)
-                    rect.setBrush(brush)
+    def set_speed(self, turns_per_frame):
+        """
+        Changes the speed of the simulation.
+
+        Parameter turns_per_frame is the number of full turns per turn interval, or None to run as many turns as
+        possible: int
+        """
+        self.turns_per_frame = turns_per_frame
+        if self.worker is not None:
+            self.worker.turns_per_frame = turns_per_frame
+
+    def step_world(self):
+        """
+        Runs the full turns of one frame and publishes the snapshot of the last one, see run_turns. Used when the
+        world is not stepped in a background thread; the SimulationWorker runs its turns the same way.
+        """
+        self.turn_cost = run_turns(self.world, self.turns_per_frame, FRAME_BUDGET * self.turn_interval,
+                                   self.turn_cost)
+        self.buffer.publish(self.snapshots.take())
+
+    def tick(self):
+        """
+        Steps the world and draws it. The timer is started again so that the next frame starts one turn interval
+        after this one started: if the turns and the drawing took most of the interval, the next tick comes sooner.
+        """
+        start_time = time.perf_counter()
+        self.step_world()
+        self.update()
+        if self.running:
+            spent = int((time.perf_counter() - start_time) * 1000)
+            self.timer.start(max(MIN_TIMER_INTERVAL, int(self.turn_interval * 1000) - spent))
 
     def update(self):
         """
-        Updates the AI graphics items to match their current state in the world.
+        Draws the latest snapshot of the world, if there is a new one, and closes the window when no AI is sick or
+        infected any more.
         """
-        self.update_AI_graphics_items()
-        self.update_grid()
-        if all(ai.is_dead() or ai.is_recovered() or ai.is_susceptible() for ai in self.world.AI):
+        snapshot = self.buffer.take()
+        if snapshot is None:
+            return
+        self.update_AI_graphics_items(snapshot)
+        self.update_grid(snapshot)
+        self.turn_label.setText("Turn {}".format(snapshot.turn_count))
+        if not snapshot.active:
             self.close()
 
+    def run_in_simulation(self, function):
+        """
+        Calls a function that changes the world: in the worker thread between two turns if the world is stepped in
+        a background thread, otherwise right away. The change is drawn with the next snapshot.
+        """
+        if self.worker is not None:
+            self.worker.call_soon(function)
+        else:
+            function()
+
+    def remove_AI(self, AI):
+        """
+        Removes the AI from the simulation, e.g. after it has been clicked.
+        """
+        def kill():
+            if not AI.is_dead():
+                AI.die()
+        self.run_in_simulation(kill)
+
+    def remove_AI_at(self, x, y):
+        """
+        Removes the AI in the square (x, y) from the simulation, if there is one.
+        """
+        def kill():
+            AI = self.world.get_square_at(x, y).get_AI()
+            if AI is not None:
+                AI.die()
+        self.run_in_simulation(kill)
+
+    def closeEvent(self, event):
+        """
+        Stops the simulation when the window is closed.
+        """
+        self.running = False
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
+
     def init_window(self):
         """
         Sets up the window.
@@ -122,12 +314,25 @@ class GUI(QtWidgets.QMainWindow):
         self.setWindowTitle('World')
         self.show()
 
-        # Add a scene for drawing 2d objects
+        # Add a scene for drawing 2d objects, with room for the whole world grid
         self.scene = QtWidgets.QGraphicsScene()
-        self.scene.setSceneRect(-20, -25, 820, 630)
+        self.scene.setSceneRect(-SCENE_MARGIN, -SCENE_MARGIN,
+                                self.world.get_width() * self.square_size + 2 * SCENE_MARGIN,
+                                self.world.get_height() * self.square_size + 2 * SCENE_MARGIN)
 
-        # Add a view for showing the scene
+        # Add a view for showing the scene. The view has scroll bars when the world does not fit in the window.
         self.view = QtWidgets.QGraphicsView(self.scene, self)
         self.view.adjustSize()
         self.view.show()
         self.horizontal.addWidget(self.view)
+
+        # Add a toolbar with the speed control and the number of the turn
+        toolbar = self.addToolBar("Simulation")
+        toolbar.addWidget(QtWidgets.QLabel("Speed "))
+        self.speed_box = QtWidgets.QComboBox()
+        self.speed_box.addItems(SPEEDS.keys())
+        self.speed_box.currentTextChanged.connect(lambda text: self.set_speed(SPEEDS[text]))
+        toolbar.addWidget(self.speed_box)
+        toolbar.addSeparator()
+        self.turn_label = QtWidgets.QLabel()
+        toolbar.addWidget(self.turn_label)
@@ -1,4 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
+from simulation import WORLD_WIDTH, WORLD_HEIGHT
 
 """
 This class builds the input window for the simulation. The user can input different values that affect the simulation.
@@ -8,8 +9,9 @@ class InputWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle('Simulation Input')
-        self.setGeometry(50, 40, 500, 620)
+        self.setGeometry(50, 40, 500, 680)
         self.submit_pressed = False
+        self.world_size = (WORLD_WIDTH, WORLD_HEIGHT)
         self.setStyleSheet('''
                    QWidget {
                        font-size: 10px;
@@ -55,7 +57,8 @@ class InputWindow(QWidget):
             "2. Number of infected SmartAI and AvoidingAI.\n"
             "3. Number of doctors, vaccinators and builders.\n"
             "4. Spread type (0: contact, 1: distance).\n"
-            "5. Infection chance, incubation duration, recovery duration, death chance, and vaccination effectiveness (in percentage).\n\n"
+            "5. Infection chance, incubation duration, recovery duration, death chance, and vaccination effectiveness (in percentage).\n"
+            "6. Optionally, the width and height of the world in squares.\n\n"
             "Enter valid values for each field within the given ranges. After submitting, you'll be able to view the simulation and track the disease's progress.")
 
         intro_label.setWordWrap(True)
@@ -118,6 +121,16 @@ class InputWindow(QWidget):
         self.vaccination_rate_input.setPlaceholderText('Enter vaccination effectiveness (0-100)')
         self.layout.addWidget(self.vaccination_rate_input)
 
+        self.world_width_input = QLineEdit()
+        self.world_width_input.setPlaceholderText('Enter the width of the world (20-2000 squares, default {})'
+                                                  .format(WORLD_WIDTH))
+        self.layout.addWidget(self.world_width_input)
+
+        self.world_height_input = QLineEdit()
+        self.world_height_input.setPlaceholderText('Enter the height of the world (20-2000 squares, default {})'
+                                                   .format(WORLD_HEIGHT))
+        self.layout.addWidget(self.world_height_input)
+
         # add submit button
         self.submit_button = QPushButton('Submit')
         self.layout.addWidget(self.submit_button)
@@ -140,6 +153,8 @@ class InputWindow(QWidget):
             recovery_duration = int(self.recovery_duration_input.text())
             death_chance = int(self.death_chance_input.text())
             vaccination_rate = int(self.vaccination_rate_input.text())
+            world_width = int(self.world_width_input.text() or WORLD_WIDTH)
+            world_height = int(self.world_height_input.text() or WORLD_HEIGHT)
 
             if not (0 <= num_smart_healthy <= 50) or not (0 <= num_avoiding_healthy <= 50)\
                     or not (0 <= num_smart_sick <= 50) or not (0 <= num_avoiding_sick <= 50)\
@@ -147,9 +162,11 @@ class InputWindow(QWidget):
                     or not (0 <= num_vaccinators <= 10) or not(0 <= spread_type <= 1) \
                     or not (0 <= infection_chance <= 100) or not (0 <= incubation_duration <= 100)\
                     or not (1 <= recovery_duration <= 100) or not (0 <= death_chance <= 100)\
-                    or not (0 <= vaccination_rate <= 100):
+                    or not (0 <= vaccination_rate <= 100) or not (20 <= world_width <= 2000)\
+                    or not (20 <= world_height <= 2000):
                 raise ValueError
 
+            self.world_size = (world_width, world_height)
             self.close()
             self.submit_pressed = True
             return num_smart_healthy, num_avoiding_healthy, num_smart_sick, num_avoiding_sick, num_doctors,\
@@ -163,4 +180,10 @@ class InputWindow(QWidget):
             error_dialog.exec()
 
     def is_submit_pressed(self):
-        return self.submit_pressed
\ No newline at end of file
+        return self.submit_pressed
+
+    def get_world_size(self):
+        """
+        Returns the width and height of the world that were entered, or the default size: tuple
+        """
+        return self.world_size
\ No newline at end of file
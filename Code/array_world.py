@@ -0,0 +1,619 @@
+import numpy as np
+from world import World, BORDER
+from AI import AI
+from square import WALL
+from spatial_index import SpatialIndex
+from geometry import CoordinateTable, SPREAD_RADIUS
+from random_streams import ATTRIBUTES, DEATH, INFECTION, GOLDEN_GAMMA, MASK, mix
+from direction import Direction
+
+"""
+This module contains an alternative world backend that stores the state of the simulation in NumPy arrays instead of
+one Square object per square and one full AI object per AI. The ArrayEngine keeps an occupancy grid of AI ids, a wall
+mask and one array per AI attribute (location, facing, health state, incubation and recovery time, susceptibility,
+vaccination and role).
+
+ArrayWorld and ArrayAI sit on top of the engine as thin views, so that the brains, the GUI and the rest of the
+simulation can keep using the World, Square and AI methods unchanged.
+"""
+
+# Health states stored in ArrayEngine.state
+SUSCEPTIBLE = 0
+INFECTED = 1
+SICK = 2
+RECOVERED = 3
+DEAD = 4
+
+# Roles stored in ArrayEngine.role
+SMART = 0
+AVOIDING = 1
+DOCTOR = 2
+VACCINATOR = 3
+BUILDER = 4
+
+# Facings stored in ArrayEngine.facing are indices of Direction.get_values(). NO_FACING is used before an AI is placed.
+FACINGS = Direction.get_values()
+FACING_CODES = {facing: code for code, facing in enumerate(FACINGS)}
+NO_FACING = -1
+
+# Value of an empty square in ArrayEngine.occupancy
+EMPTY = -1
+
+
+class ArrayEngine():
+    """
+    The class ArrayEngine stores the world and its AI as a struct of NumPy arrays. Grid arrays are indexed as [x, y],
+    and per-AI arrays are indexed by the id that the AI got when it was added to the engine. The per-AI arrays grow
+    by doubling their capacity when they run full.
+    """
+
+    AGENT_ARRAYS = {
+        "x": np.int32,
+        "y": np.int32,
+        "facing": np.int8,
+        "state": np.int8,
+        "incubation_time": np.int32,
+        "recovery_time": np.int32,
+        "susceptibility": np.float64,
+        "vaccinated": np.bool_,
+        "role": np.int8,
+        "spread_type": np.int8,
+        "infection_chance": np.float64,
+        "death_chance": np.float64,
+        "incubation_duration": np.int32,
+        "recovery_duration": np.int32,
+        "vaccination_rate": np.float64
+    }
+
+    def __init__(self, width, height, capacity=64):
+        """
+        Creates an empty engine for a world of the given dimensions.
+
+        Parameter capacity is the initial number of AI the per-AI arrays have room for
+        """
+        self.width = width
+        self.height = height
+        # The grids have a border of BORDER wall squares around the world, like the squares of World. occupancy and
+        # walls are views to the part of the padded grids that is inside the world.
+        self.padded_occupancy = np.full((width + 2 * BORDER, height + 2 * BORDER), EMPTY, dtype=np.int32)
+        self.padded_walls = np.ones((width + 2 * BORDER, height + 2 * BORDER), dtype=np.bool_)
+        self.occupancy = self.padded_occupancy[BORDER:BORDER + width, BORDER:BORDER + height]
+        self.walls = self.padded_walls[BORDER:BORDER + width, BORDER:BORDER + height]
+        self.walls[:, :] = False
+        self.count = 0
+        self.agents = []    # container, agents[id] is the view of the AI with the given id
+        for name, dtype in ArrayEngine.AGENT_ARRAYS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.x[:] = -1
+        self.y[:] = -1
+        self.facing[:] = NO_FACING
+
+    def get_capacity(self):
+        """
+        Returns the number of AI the per-AI arrays currently have room for
+        """
+        return len(self.state)
+
+    def reserve(self, capacity):
+        """
+        Grows the per-AI arrays so that they have room for at least the given number of AI.
+        """
+        old_capacity = self.get_capacity()
+        if capacity <= old_capacity:
+            return
+        new_capacity = max(capacity, 2 * old_capacity)
+        for name in ArrayEngine.AGENT_ARRAYS:
+            old_array = getattr(self, name)
+            new_array = np.zeros(new_capacity, dtype=old_array.dtype)
+            new_array[:old_capacity] = old_array
+            setattr(self, name, new_array)
+        self.x[old_capacity:] = -1
+        self.y[old_capacity:] = -1
+        self.facing[old_capacity:] = NO_FACING
+
+    def add_agent(self, agent):
+        """
+        Reserves a row of the per-AI arrays for the given AI view.
+
+        Returns the id of the AI: int
+        """
+        self.reserve(self.count + 1)
+        agent_id = self.count
+        self.agents.append(agent)
+        self.count += 1
+        return agent_id
+
+    def contains(self, x, y):
+        """
+        Returns a boolean value indicating if the given coordinates are inside the world
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_agent_at(self, x, y):
+        """
+        Returns the AI in the given square or None if the square is empty
+        """
+        agent_id = self.occupancy[x, y]
+        if agent_id == EMPTY:
+            return None
+        return self.agents[agent_id]
+
+    def get_view(self, name):
+        """
+        Returns the part of a per-AI array that is in use, i.e. the values of all AI added to the engine
+        """
+        return getattr(self, name)[:self.count]
+
+
+class ArraySquare():
+    """
+    The class ArraySquare is a view to one square of an ArrayEngine. It has the same methods as Square, but all its
+    state is stored in the occupancy grid and the wall mask of the engine. The views are for the GUI and other code
+    that works with squares: the AI look at the squares around them with get_AI_at, is_empty_at and is_wall_at of
+    ArrayWorld, which read the grids without creating views.
+    """
+
+    __slots__ = ("engine", "x", "y")
+
+    def __init__(self, engine, x, y):
+        self.engine = engine
+        self.x = x
+        self.y = y
+
+    @property
+    def is_wall(self):
+        return bool(self.engine.walls[self.x, self.y])
+
+    @property
+    def AI(self):
+        return self.get_AI()
+
+    def get_AI(self):
+        """
+        Returns the AI in the square or None if there is no AI in the square
+        """
+        return self.engine.get_agent_at(self.x, self.y)
+
+    def is_wall_square(self):
+        """
+        Returns a boolean value stating whether there is a wall in the square or not
+        """
+        return self.is_wall
+
+    def is_empty(self):
+        """
+        Returns a boolean value stating whether the square is empty (A square is empty if it does not contain a wall
+        or an AI) or not
+        """
+        return not self.engine.walls[self.x, self.y] and self.engine.occupancy[self.x, self.y] == EMPTY
+
+    def set_AI(self, AI):
+        """
+        Marks the square as containing an AI, if possible.
+
+        Returns a boolean value indicating if the operation succeeded
+        """
+        if self.is_empty():
+            self.engine.occupancy[self.x, self.y] = AI.index
+            return True
+        else:
+            return False
+
+    def remove_AI(self):
+        """
+        Removes the AI in this square.
+
+        Returns the AI removed from the square or None, if there was no AI
+        """
+        removed_AI = self.get_AI()
+        self.engine.occupancy[self.x, self.y] = EMPTY
+        return removed_AI
+
+    def set_wall(self):
+        """
+        Sets a wall in this square, if possible.
+
+        Returns a boolean value indicating if the operation succeeded
+        """
+        if self.is_empty():
+            self.engine.walls[self.x, self.y] = True
+            return True
+        else:
+            return False
+
+
+class ArrayWorld(World):
+    """
+    The class ArrayWorld is a World whose squares and AI are stored in an ArrayEngine. Squares are returned as
+    ArraySquare views and the AI are ArrayAI views, both created with the methods of this class.
+    """
+
+    batch_disease = False   # True if the disease status of all AI is updated at once after each full turn
+
+    def __init__(self, width, height, seed=None):
+        """
+        Creates a new world with the specified dimensions.
+        Initially all the squares of the new world are empty.
+
+        Parameter seed is the seed of the random streams of the world, or None to take one from the random module
+        """
+        self.engine = ArrayEngine(width, height)
+        self.init_state(CoordinateTable(width, height), SpatialIndex(width, height), seed)
+
+    def get_width(self):
+        return self.engine.width
+
+    def get_height(self):
+        return self.engine.height
+
+    def create_AI(self, *args, **kwargs):
+        """
+        Creates a new ArrayAI whose state is stored in the engine of this world. The parameters are the same as
+        those of AI. Since every ArrayAI is created with this method, the id of an AI is also its id in the engine.
+        """
+        agent_id = self.get_new_AI_id()
+        body = ArrayAI(self.engine, *args, rng=self.random.get_stream(agent_id, 0, ATTRIBUTES), **kwargs)
+        body.id = agent_id
+        return body
+
+    def get_wall_mask(self):
+        """
+        Returns whether each square of the padded wall grid of the engine is a wall, in the order of the grid list of
+        a World (see World.get_grid_index): list of bools
+        """
+        return self.engine.padded_walls.ravel().tolist()
+
+    def get_wall_squares(self):
+        """
+        Returns the coordinates (x, y) of the squares of the world that are walls, not including the border: list of
+        tuples
+        """
+        return [tuple(location) for location in np.argwhere(self.engine.walls).tolist()]
+
+    def get_square(self, coordinates):
+        """
+        Returns a view to the square that is located at the given location. If the given coordinates point outside of
+        the world, this method returns the shared wall square
+        """
+        return self.get_square_at(coordinates.get_x(), coordinates.get_y())
+
+    def get_square_at(self, x, y):
+        """
+        Returns a view to the square (x, y), or the shared wall square if the coordinates are outside the world
+        """
+        if self.engine.contains(x, y):
+            return ArraySquare(self.engine, x, y)
+        else:
+            return WALL
+
+    def get_AI_at(self, x, y):
+        """
+        Returns the AI in the square (x, y) or None, reading the occupancy grid of the engine directly. The
+        coordinates may be at most BORDER squares outside the world.
+        """
+        agent_id = self.engine.padded_occupancy[x + BORDER, y + BORDER]
+        if agent_id == EMPTY:
+            return None
+        return self.engine.agents[agent_id]
+
+    def is_empty_at(self, x, y):
+        """
+        Returns a boolean value stating whether the square (x, y) is empty, see get_AI_at
+        """
+        engine = self.engine
+        return not engine.padded_walls[x + BORDER, y + BORDER] \
+            and bool(engine.padded_occupancy[x + BORDER, y + BORDER] == EMPTY)
+
+    def is_wall_at(self, x, y):
+        """
+        Returns a boolean value stating whether there is a wall in the square (x, y), see get_AI_at
+        """
+        return bool(self.engine.padded_walls[x + BORDER, y + BORDER])
+
+
+class VectorizedWorld(ArrayWorld):
+    """
+    The class VectorizedWorld is an ArrayWorld that updates the disease status of all AI at once after every full
+    turn, instead of one AI at a time in AI.update_disease_status. The AI only move during their own turns.
+
+    Infection is computed for the whole grid: the number of sick AI around every square is a sliding-window sum over
+    a mask of sick AI, and a susceptible AI with k sick neighbours gets infected with the probability
+    1 - (1 - p * s)^k, where p is the infection chance (multiplied by the vaccination rate for vaccinated AI) and s
+    is the susceptibility of the AI. All these Bernoulli trials are drawn at once from the random streams of the AI,
+    with the same keys that AI.update_disease_status uses, see get_random_array. Unlike
+    AI.update_disease_status, every newly infected AI is counted once in the infected count of the statistics.
+    """
+
+    batch_disease = True
+
+
+    def finish_full_turn(self):
+        """
+        Updates the disease status of all AI after each AI has taken its turn, before the full turn is recorded.
+        """
+        self.update_disease_status()
+        super(VectorizedWorld, self).finish_full_turn()
+
+    def update_disease_status(self):
+        """
+        Updates the disease status of all AI in the world, in the same order as AI.update_disease_status does for a
+        single AI: infected AI whose incubation is over get sick, sick AI whose recovery is over recover or die, and
+        finally susceptible AI may get infected by the sick AI around them.
+        """
+        engine = self.engine
+        state = engine.get_view("state")
+
+        infected = state == INFECTED
+        incubation_time = engine.get_view("incubation_time")
+        incubation_time[infected] += 1
+        became_sick = np.flatnonzero(infected & (incubation_time > engine.get_view("incubation_duration")))
+        state[became_sick] = SICK
+        self.report_state_changes(became_sick, "infected", "sick")
+
+        sick = state == SICK
+        recovery_time = engine.get_view("recovery_time")
+        recovery_time[sick] += 1
+        over = np.flatnonzero(sick & (recovery_time > engine.get_view("recovery_duration")))
+        if len(over) > 0:
+            recovery_time[over] = 0
+            dies = get_random_array(self.random, over, self.turn_count, DEATH) < engine.get_view("death_chance")[over]
+            state[over[~dies]] = RECOVERED
+            self.report_state_changes(over[~dies], "sick", "recovered")
+            self.statistics.recovered_count += int(np.count_nonzero(~dies))
+            for agent_id in over[dies]:
+                engine.agents[agent_id].die()
+
+        self.infect_susceptible_AI()
+
+    def infect_susceptible_AI(self):
+        """
+        Infects susceptible AI with the aggregated probability of all the sick AI within their spread distance.
+        """
+        engine = self.engine
+        state = engine.get_view("state")
+        x = engine.get_view("x")
+        y = engine.get_view("y")
+        placed = x >= 0
+
+        sick = np.flatnonzero(placed & (state == SICK))
+        susceptible = np.flatnonzero(placed & (state == SUSCEPTIBLE))
+        if len(sick) == 0 or len(susceptible) == 0:
+            return
+
+        sick_mask = np.zeros((engine.width, engine.height), dtype=np.int32)
+        sick_mask[x[sick], y[sick]] = 1
+
+        # The distance of each spread type is looked up in SPREAD_RADIUS, like AI.update_disease_status does. AI with
+        # other spread types are never infected.
+        spread_type = engine.get_view("spread_type")[susceptible]
+        sick_neighbors = np.zeros(len(susceptible), dtype=np.int32)
+        for value in np.unique(spread_type):
+            radius = SPREAD_RADIUS.get(int(value))
+            if radius is None:
+                continue
+            selected = spread_type == value
+            counts = count_neighbors(sick_mask, radius)
+            sick_neighbors[selected] = counts[x[susceptible[selected]], y[susceptible[selected]]]
+
+        exposed = sick_neighbors > 0
+        susceptible = susceptible[exposed]
+        sick_neighbors = sick_neighbors[exposed]
+        if len(susceptible) == 0:
+            return
+
+        chance = engine.get_view("infection_chance")[susceptible] * engine.get_view("susceptibility")[susceptible]
+        vaccinated = engine.get_view("vaccinated")[susceptible]
+        chance[vaccinated] *= engine.get_view("vaccination_rate")[susceptible][vaccinated]
+        probability = 1.0 - (1.0 - np.clip(chance, 0.0, 1.0)) ** sick_neighbors
+
+        draws = get_random_array(self.random, susceptible, self.turn_count, INFECTION)
+        newly_infected = susceptible[draws < probability]
+        state[newly_infected] = INFECTED
+        self.report_state_changes(newly_infected, "susceptible", "infected")
+        self.statistics.infected_count += len(newly_infected)
+
+    def report_state_changes(self, agent_ids, old_state, new_state):
+        """
+        Moves the AI with the given ids from one set of the state index to another after their states have been
+        changed directly in the engine arrays.
+        """
+        for agent_id in agent_ids:
+            agent = self.engine.agents[agent_id]
+            self.state_index.change_state(agent, old_state, new_state)
+            agent.mark_graphics_changed()
+
+
+def mix_array(values):
+    """
+    Computes random_streams.mix for every element of an array of 64-bit unsigned integers.
+    """
+    values = values + np.uint64(GOLDEN_GAMMA)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def get_random_array(streams, agent_ids, turn, purpose):
+    """
+    Draws the first random float of the random stream of each of the given AI for the given full turn and purpose.
+    The floats are the same as those returned by RandomStreams.random for each AI.
+
+    Parameter streams is the random streams of the world: RandomStreams
+
+    Parameter agent_ids is an array of AI ids
+
+    Returns the floats in the range [0, 1) as an array
+    """
+    with np.errstate(over="ignore"):
+        keys = mix_array(np.uint64(mix(streams.seed & MASK)) ^ np.asarray(agent_ids, dtype=np.uint64))
+        keys = mix_array(mix_array(keys ^ np.uint64(turn)) ^ np.uint64(purpose))
+        bits = mix_array(keys)
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / 2 ** 53)
+
+
+def count_neighbors(mask, radius):
+    """
+    Counts for every square how many of the squares within the given distance (a square window of side
+    2 * radius + 1, not including the square itself) are set in the given mask. Squares outside the world are
+    counted as unset. The sums are read from a summed-area table, so the cost does not depend on the radius.
+
+    Parameter mask is a two dimensional array of zeros and ones
+
+    Returns the counts as an array of the same shape as the mask
+    """
+    size = 2 * radius + 1
+    table = np.zeros((mask.shape[0] + size, mask.shape[1] + size), dtype=np.int32)
+    table[1:, 1:] = np.pad(mask, radius).cumsum(axis=0).cumsum(axis=1)
+    window = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return window - mask
+
+
+class EngineField():
+    """
+    Stores an attribute of ArrayAI in one of the per-AI arrays of the engine.
+    """
+
+    def __init__(self, array_name, convert):
+        self.array_name = array_name
+        self.convert = convert
+
+    def __get__(self, ai, owner=None):
+        if ai is None:
+            return self
+        return self.convert(getattr(ai.engine, self.array_name)[ai.index])
+
+    def __set__(self, ai, value):
+        getattr(ai.engine, self.array_name)[ai.index] = value
+
+
+class EngineFlag():
+    """
+    Maps one of the mutually exclusive boolean attributes of AI (e.g. sick or is_doctor) to a code of a per-AI
+    array. Setting the flag stores the code, clearing it is left to setting the flag that replaces it.
+    """
+
+    def __init__(self, array_name, code):
+        self.array_name = array_name
+        self.code = code
+
+    def __get__(self, ai, owner=None):
+        if ai is None:
+            return self
+        return bool(getattr(ai.engine, self.array_name)[ai.index] == self.code)
+
+    def __set__(self, ai, value):
+        if value:
+            getattr(ai.engine, self.array_name)[ai.index] = self.code
+
+
+class ArrayAI(AI):
+    """
+    The class ArrayAI is an AI whose location, facing, health state, disease timers, susceptibility, vaccination,
+    role and disease parameters are stored in an ArrayEngine. The methods of AI work unchanged, since the attributes
+    they use read and write the arrays of the engine.
+    """
+
+    susceptibility = EngineField("susceptibility", float)
+    incubation_time = EngineField("incubation_time", int)
+    recovery_time = EngineField("recovery_time", int)
+    vaccinated = EngineField("vaccinated", bool)
+    spread_type = EngineField("spread_type", int)
+    infection_chance = EngineField("infection_chance", float)
+    death_chance = EngineField("death_chance", float)
+    incubation_duration = EngineField("incubation_duration", int)
+    recovery_duration = EngineField("recovery_duration", int)
+    vaccination_rate = EngineField("vaccination_rate", float)
+
+    susceptible = EngineFlag("state", SUSCEPTIBLE)
+    infected = EngineFlag("state", INFECTED)
+    sick = EngineFlag("state", SICK)
+    recovered = EngineFlag("state", RECOVERED)
+    dead = EngineFlag("state", DEAD)
+
+    is_avoiding = EngineFlag("role", AVOIDING)
+    is_doctor = EngineFlag("role", DOCTOR)
+    is_vaccinator = EngineFlag("role", VACCINATOR)
+    is_builder = EngineFlag("role", BUILDER)
+
+    __slots__ = ("engine", "index")
+
+    def __init__(self, engine, *args, **kwargs):
+        """
+        Creates a new AI and reserves its row in the given engine. The other parameters are the same as those of AI.
+        """
+        self.engine = engine
+        self.index = engine.add_agent(self)
+        super(ArrayAI, self).__init__(*args, **kwargs)
+
+    @property
+    def location(self):
+        x = self.engine.x[self.index]
+        if x < 0:
+            return None
+        return self.world.get_coordinates(int(x), int(self.engine.y[self.index]))
+
+    @location.setter
+    def location(self, location):
+        if location is None:
+            self.engine.x[self.index] = -1
+            self.engine.y[self.index] = -1
+        else:
+            self.engine.x[self.index] = location.get_x()
+            self.engine.y[self.index] = location.get_y()
+
+    @property
+    def facing(self):
+        code = self.engine.facing[self.index]
+        if code == NO_FACING:
+            return None
+        return FACINGS[code]
+
+    @facing.setter
+    def facing(self, facing):
+        self.engine.facing[self.index] = NO_FACING if facing is None else FACING_CODES[facing]
+
+    def take_turn(self):
+        """
+        Gives the AI a turn to act. In a world that updates the disease status of all AI at once, the AI only moves.
+        """
+        if not self.world.batch_disease:
+            super(ArrayAI, self).take_turn()
+        elif not self.is_stuck():
+            self.brain.move_body()
+
+    def is_stuck(self):
+        """
+        Determines whether the AI is stuck or not by reading the wall mask of the engine directly.
+        """
+        if self.get_world() is None:
+            return True
+        engine = self.engine
+        x = engine.x[self.index] + BORDER
+        y = engine.y[self.index] + BORDER
+        for x_step, y_step in FACINGS:
+            if not engine.padded_walls[x + x_step, y + y_step]:
+                return False
+        return True
+
+    def move(self, direction):
+        """
+        Moves the AI one square in the given direction by updating the occupancy grid and the location arrays of the
+        engine. Behaves like AI.move.
+        """
+        engine = self.engine
+        x = engine.x[self.index]
+        y = engine.y[self.index]
+        target_x = x + direction[0]
+        target_y = y + direction[1]
+        self.spin(direction)
+        if not engine.padded_walls[target_x + BORDER, target_y + BORDER] \
+                and engine.padded_occupancy[target_x + BORDER, target_y + BORDER] == EMPTY:
+            engine.occupancy[x, y] = EMPTY
+            engine.occupancy[target_x, target_y] = self.index
+            target = self.world.get_coordinates(int(target_x), int(target_y))
+            self.world.spatial_index.move(self, self.world.get_coordinates(int(x), int(y)), target)
+            engine.x[self.index] = target_x
+            engine.y[self.index] = target_y
+            self.mark_graphics_changed()
+            return True
+        return False
@@ -1,6 +1,6 @@
 from direction import Direction
 from AI_brain import AIbrain
-import random
+from random_streams import MOVE
 
 """
 The AvoidingAI class is a subclass of AIbrain, representing a type of AI that actively avoids other AI in the world.
@@ -9,9 +9,7 @@ and moves towards the center if possible.
 """
 
 class AvoidingAI(AIbrain):
-    def __init__(self, body):
-        super(AvoidingAI, self).__init__(body)
-        self.random = random.Random()
+    __slots__ = ()
 
     def move_body(self):
         """
@@ -38,12 +36,7 @@ class AvoidingAI(AIbrain):
         """
         Finds the closest AI
         """
-        AI_list = [ai for ai in self.body.world.AI if ai is not self.body]
-        if not AI_list:
-            return None
-
-        closest_AI = min(AI_list, key=lambda ai: self.distance_to(ai))
-        return closest_AI
+        return self.body.world.find_closest_AI(self.body.get_location(), exclude=self.body)
 
     def distance_to(self, other_AI):
         """
@@ -94,10 +87,10 @@ class AvoidingAI(AIbrain):
                 preferred_directions = [d for d in possible_directions if d in [preferred_x, preferred_y]]
 
                 if preferred_directions:
-                    return random.choice(preferred_directions)
+                    return self.get_random(MOVE).choice(preferred_directions)
 
             if possible_directions:
-                return random.choice(possible_directions)
+                return self.get_random(MOVE).choice(possible_directions)
 
         return None
 
@@ -112,5 +105,5 @@ class AvoidingAI(AIbrain):
 
     def get_random_direction(self):
         directions = Direction.get_values()
-        return self.random.choice(directions)
+        return self.get_random(MOVE).choice(directions)
 
@@ -1,30 +1,43 @@
-import random
 import math
 from direction import Direction
 from AI_brain import AIbrain
 from coordinates import Coordinates
+from random_streams import MOVE, TARGET
 
 """
-The Builder AI tries to divide the world into two parts. It has a list of the coordinates on line 15 in the world.
-It gets a random coordinate from the list, moves there and builds a wall. It repeats this process until the world is
-divided. It then moves randomly.
+The Builder AI tries to divide the world into two parts. It has a list of the coordinates on the middle row of the
+world. It gets a random coordinate from the list, moves there and builds a wall. It repeats this process until the
+world is divided. It then moves randomly.
 """
 
 class Builder(AIbrain):
+    __slots__ = ("building_targets", "current_target")
+
     def __init__(self, body):
         super(Builder, self).__init__(body)
-        self.random = random.Random()
-        self.building_targets = [Coordinates(x, 15) for x in range(30)]
+        self.building_targets = None    # the squares still to build, listed once the body is in a world
         self.current_target = None
 
+    def get_building_targets(self):
+        """
+        Returns the squares of the middle row of the world that have not been built yet. The list is created from
+        the dimensions of the world of the body on the first call.
+        """
+        if self.building_targets is None:
+            world = self.body.world
+            row = world.get_height() // 2
+            self.building_targets = [Coordinates(x, row) for x in range(world.get_width())]
+        return self.building_targets
+
     def move_body(self):
         """
         The builder first moves to a starting position. Then it gets a random coordinate from the list,
         moves there and builds a wall. It repeats this process until the world is divided.
         """
-        if self.building_targets:
+        building_targets = self.get_building_targets()
+        if building_targets:
             if not self.current_target or self.current_target == self.body.get_location():
-                self.current_target = self.random.choice(self.building_targets)
+                self.current_target = self.get_random(TARGET).choice(building_targets)
             self.move_to_target()
         else:
             self.random_move()
@@ -70,9 +83,7 @@ class Builder(AIbrain):
         """
         Builds a wall in the target square.
         """
-        target_square = self.body.world.get_square(self.current_target)
-        if target_square.is_empty():
-            target_square.set_wall()
+        if self.body.world.add_wall(self.current_target):
             self.building_targets.remove(self.current_target)
         self.current_target = None
 
@@ -87,5 +98,5 @@ class Builder(AIbrain):
 
     def get_random_direction(self):
         directions = Direction.get_values()
-        return self.random.choice(directions)
+        return self.get_random(MOVE).choice(directions)
 
@@ -10,6 +10,8 @@ class Coordinates():
     after creation.
     """
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         """
         Creates a new coordinate pair.
@@ -22,10 +24,15 @@ class Coordinates():
         self.y = y    # fixed value
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if isinstance(other, Coordinates):
             return self.x == other.x and self.y == other.y
         return False
 
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def get_x(self):
         """
         Returns the x coordinate (int)
@@ -5,6 +5,9 @@ import os
 This class handles the writing of the simulation data to the csv file "simulation_data.csv"
 """
 
+# The number of bytes read at a time when the file is read backwards from its end
+TAIL_BLOCK_SIZE = 4096
+
 class SimulationDataStorage:
     def save_simulation_data(self, turn, dead_count, infected_count, recovered_count, vaccinated_count,
                              cured_count, total_population, gender_count, smoker_count,
@@ -46,13 +49,11 @@ class SimulationDataStorage:
             'Active', 'Sedentary', 'Moderate'
         ]
 
-        if not os.path.exists(file_name):
-            with open(file_name, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(headers)
-
         with open(file_name, mode='a', newline='') as file:
             writer = csv.writer(file)
+            # The file is opened at its end, so it is new or empty if the position is 0
+            if file.tell() == 0:
+                writer.writerow(headers)
             row = [
                 simulation_data['turn'],
                 simulation_data['dead_count'],
@@ -80,16 +81,34 @@ class SimulationDataStorage:
 
     """
     This function returns the last turn and is used in the main function. It is needed to keep track of how many
-    times the simulation has been run.
+    times the simulation has been run. Only the last row of the file is read, so the time it takes does not depend
+    on how many simulations have been saved.
     """
     @classmethod
     def get_last_turn(cls, file_name='simulation_data.csv'):
         if not os.path.exists(file_name):
             return 0
-        with open(file_name, mode='r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                pass
-            last_row = row
-        last_turn = int(last_row[0]) if last_row else 0
-        return last_turn
+        last_row = next(csv.reader([cls.read_last_line(file_name)]), [])
+        if last_row and last_row[0].isdigit():
+            return int(last_row[0])
+        return 0   # the file is empty or only has the headers
+
+    """
+    This function returns the last non-empty line of a file. The file is read backwards from its end in blocks of
+    TAIL_BLOCK_SIZE bytes until the start of the last line is found.
+    """
+    @staticmethod
+    def read_last_line(file_name):
+        with open(file_name, mode='rb') as file:
+            position = file.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                block_size = min(TAIL_BLOCK_SIZE, position)
+                position -= block_size
+                file.seek(position)
+                tail = file.read(block_size) + tail
+                # The last line is complete once a line break is found before it
+                if b'\n' in tail.rstrip(b'\r\n'):
+                    break
+        lines = tail.rstrip(b'\r\n').splitlines()
+        return lines[-1].decode() if lines else ''
@@ -43,12 +43,12 @@ class Direction():
     @staticmethod
     def get_values():
         """
-        Creates a list of directions in a clockwise direction starting
-        from north.
+        Returns the directions in a clockwise direction starting
+        from north. The same precomputed tuple is returned on every call.
 
-        Returns: list of direction tuples
+        Returns: tuple of direction tuples
         """
-        return [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+        return VALUES
 
 
     @staticmethod
@@ -58,9 +58,7 @@ class Direction():
 
         Returns: another direction tuple clockwise from this one: tuple
         """
-        direction_list = Direction.get_values()
-        index = direction_list.index(direction)
-        return direction_list[(index + 1) % 4]
+        return CLOCKWISE[direction]
 
 
     @staticmethod
@@ -70,9 +68,7 @@ class Direction():
 
         Returns: another direction counterclockwise from this one: tuple
         """
-        direction_list = Direction.get_values()
-        index = direction_list.index(direction)
-        return direction_list[(index + 3) % 4]
+        return COUNTER_CLOCKWISE[direction]
 
 
     @staticmethod
@@ -80,13 +76,14 @@ class Direction():
         """
         Returns: the direction as degrees from 0 to 360.
         """
-        if (direction == Direction.NORTH):
-            return 0
-        elif (direction == Direction.EAST):
-            return 90
-        elif (direction == Direction.SOUTH):
-            return 180
-        elif (direction == Direction.WEST):
-            return 270
+        if direction in DEGREES:
+            return DEGREES[direction]
         else:
             print("Invalid direction given to get_degrees")
+
+
+# Lookup tables used by the methods of Direction, so that turning does not need to search the list of directions
+VALUES = (Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST)
+CLOCKWISE = {direction: VALUES[(index + 1) % 4] for index, direction in enumerate(VALUES)}
+COUNTER_CLOCKWISE = {direction: VALUES[(index + 3) % 4] for index, direction in enumerate(VALUES)}
+DEGREES = {direction: index * 90 for index, direction in enumerate(VALUES)}
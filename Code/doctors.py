@@ -1,8 +1,8 @@
 import math
 from direction import Direction
-from coordinates import Coordinates
 from AI_brain import AIbrain
-import random
+from geometry import NEIGHBOR_OFFSETS
+from random_streams import MOVE
 
 """
 The Doctors class is a subclass of AIbrain, representing a type of AI that navigates through the world and cures
@@ -12,10 +12,7 @@ the Doctors move randomly.
 """
 
 class Doctors(AIbrain):
-    cured_count = 1
-    def __init__(self, body):
-        super(Doctors, self).__init__(body)
-        self.random = random.Random()
+    __slots__ = ()
 
     def move_body(self):
         """
@@ -53,19 +50,16 @@ class Doctors(AIbrain):
         Selects a random direction.
         """
         directions = Direction.get_values()
-        return self.random.choice(directions)
+        return self.get_random(MOVE).choice(directions)
 
     def find_sick_AI(self):
         """
         Returns the closest sick AI
         """
-        # Find all sick AI in the world
-        sick_AI = [ai for ai in self.body.world.AI if ai.is_sick() and ai is not self.body]
-        if not sick_AI:
+        if len(self.body.world.get_AI_in_state("sick")) == 0:
             return None
-        # Find the closest sick AI to the current AI
-        closest_AI = min(sick_AI, key=lambda ai: self.distance_to(ai))
-        return closest_AI
+        # Search the spatial index of the world outwards from the current AI
+        return self.body.world.find_closest_AI(self.body.get_location(), lambda ai: ai.is_sick(), exclude=self.body)
 
     def distance_to(self, other_AI):
         """
@@ -99,21 +93,15 @@ class Doctors(AIbrain):
         """
         Cure any sick AI in the neighboring squares
         """
+        world = self.body.world
         current_location = self.body.get_location()
         x, y = current_location.get_x(), current_location.get_y()
 
-        for x_offset in range(-1, 2):
-            for y_offset in range(-1, 2):
-                if x_offset == 0 and y_offset == 0:
-                    continue
+        for x_offset, y_offset in NEIGHBOR_OFFSETS[1]:
+            # Squares outside the world are border walls, which never contain an AI
+            neighbor = world.get_AI_at(x + x_offset, y + y_offset)
 
-                neighbor_x = x + x_offset
-                neighbor_y = y + y_offset
-
-                if 0 <= neighbor_x < self.body.world.get_width() and 0 <= neighbor_y < self.body.world.get_height():
-                    neighbor_square = self.body.world.get_square(Coordinates(neighbor_x, neighbor_y))
-
-                    if neighbor_square.get_AI() is not None and neighbor_square.get_AI().is_sick():
-                        neighbor_square.get_AI().get_healthy()
-                        Doctors.cured_count += 1
+            if neighbor is not None and neighbor.is_sick():
+                neighbor.get_healthy()
+                world.statistics.cured_count += 1
 
@@ -0,0 +1,236 @@
+import heapq
+from collections import deque
+from direction import Direction
+from geometry import BORDER
+
+"""
+This module contains the flow field that sick SmartAI follow to the quarantine corner. The field stores, for every
+square of the world, the number of steps of a shortest path around the walls to the target square, and the direction
+of the first step is chosen from the distances of the neighbouring squares when an AI first asks for it. The world
+keeps one field per target and adds every new wall to it, so the field is searched through only once per target.
+"""
+
+# The distance of a square from which the target can not be reached
+UNREACHABLE = -1
+
+# The largest share of the squares whose distances are corrected square by square when a wall is added. If a wall cuts
+# off more squares, e.g. when it closes a long wall line, the whole field is computed again, which is faster.
+MAX_REPAIR_SHARE = 0.01
+
+
+class FlowField():
+    """
+    The class FlowField stores the distances and directions from every square of a world to a target square. Only
+    walls are obstacles, since the AI move every turn. The field is computed with a breadth-first search from the
+    target, which takes O(width * height) time. A wall added later only changes the distances of the squares whose
+    shortest paths all went through it, so update searches through those squares only, unless there are more of
+    them than MAX_REPAIR_SHARE of the squares.
+
+    Among the shortest paths, an AI steps along the axis with the longer distance to the target first, like
+    SmartAI.determine_direction_to_quarantine. In a world without walls the field therefore gives the same
+    directions as heading straight for the target.
+
+    The distances and walls are stored in flat lists in the order of the grid list of a World, including the border
+    of walls, so the neighbours of a square are found without bounds checks.
+    """
+
+    def __init__(self, world, target):
+        """
+        Computes the flow field of the given world towards the target location.
+
+        Parameter target is the location the AI move to: Coordinates
+        """
+        self.width = world.get_width()
+        self.height = world.get_height()
+        self.padded_height = self.height + 2 * BORDER
+        self.steps = (self.padded_height, -self.padded_height, 1, -1)   # index offsets of the neighbouring squares
+        self.target_x = target.get_x()
+        self.target_y = target.get_y()
+        self.target_index = None
+        if 0 <= self.target_x < self.width and 0 <= self.target_y < self.height:
+            self.target_index = self.get_index(self.target_x, self.target_y)
+        self.wall_version = world.wall_version   # the version of the walls that the field has been updated to
+        self.walls = world.get_wall_mask()
+        self.distances = self.compute_distances()
+        self.directions = {}                     # maps the index of a square to its direction, see get_direction
+
+    def get_index(self, x, y):
+        """
+        Returns the index of the square (x, y) in the lists of the field: int
+        """
+        return (x + BORDER) * self.padded_height + y + BORDER
+
+    def compute_distances(self):
+        """
+        Computes the number of steps from every square to the target with a breadth-first search.
+
+        Returns the distances in a flat list, UNREACHABLE for walls and squares with no path: list
+        """
+        walls = self.walls
+        distances = [UNREACHABLE] * len(walls)
+        if self.target_index is None:
+            return distances
+
+        distances[self.target_index] = 0
+        steps = self.steps
+        frontier = [self.target_index]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                for step in steps:
+                    neighbor = index + step
+                    if distances[neighbor] == UNREACHABLE and not walls[neighbor]:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    def update(self, world):
+        """
+        Adds the walls that have been added to the world since the field was computed or last updated.
+        """
+        new_walls = world.wall_locations[self.wall_version:]
+        for number, location in enumerate(new_walls):
+            if not self.add_wall(location.get_x(), location.get_y()):
+                for location in new_walls[number + 1:]:
+                    self.walls[self.get_index(location.get_x(), location.get_y())] = True
+                self.distances = self.compute_distances()
+                self.directions = {}
+                break
+        self.wall_version = world.wall_version
+
+    def add_wall(self, x, y):
+        """
+        Adds a wall to the square (x, y) and corrects the distances and directions of the squares it cuts off.
+
+        Returns False if the wall cuts off too many squares, in which case only the wall is added and the distances
+        must be computed again, True otherwise: bool
+        """
+        index = self.get_index(x, y)
+        self.walls[index] = True
+        distance = self.distances[index]
+        # The search starts from the target even if there is a wall in it, like compute_distances
+        if distance == UNREACHABLE or index == self.target_index:
+            return True
+
+        self.distances[index] = UNREACHABLE
+        changed = self.find_cut_off_squares(index, distance, int(MAX_REPAIR_SHARE * len(self.distances)))
+        if changed is None:
+            return False
+        self.repair_distances(changed)
+        changed.add(index)
+        # The direction of a square depends on the distances of its neighbours
+        directions = self.directions
+        for changed_index in changed:
+            directions.pop(changed_index, None)
+            for step in self.steps:
+                directions.pop(changed_index + step, None)
+        return True
+
+    def find_cut_off_squares(self, index, distance, limit):
+        """
+        Finds the squares whose every shortest path went through the square of the given index, which has just
+        become a wall. The squares are searched through in the order of their distances, and a square is cut off if
+        none of its neighbours one step closer to the target is still reachable along a shortest path.
+
+        Parameter distance is the old distance of the new wall: int
+
+        Parameter limit is the largest number of cut off squares to search for: int
+
+        Returns the indices of the cut off squares, or None if there are more than limit of them: set
+        """
+        distances = self.distances
+        steps = self.steps
+        cut_off = set()
+        queue = deque(index + step for step in steps if distances[index + step] == distance + 1)
+        while queue:
+            square = queue.popleft()
+            if square in cut_off:
+                continue
+            square_distance = distances[square]
+            if any(distances[square + step] == square_distance - 1 and square + step not in cut_off
+                   for step in steps):
+                continue
+            cut_off.add(square)
+            if len(cut_off) > limit:
+                return None
+            queue.extend(square + step for step in steps if distances[square + step] == square_distance + 1)
+        return cut_off
+
+    def repair_distances(self, cut_off):
+        """
+        Computes the distances of the cut off squares again. The search starts from the squares next to the rest of
+        the field, and the squares that can not be reached from it are left UNREACHABLE.
+
+        Parameter cut_off is the indices of the cut off squares: set
+        """
+        distances = self.distances
+        steps = self.steps
+        for square in cut_off:
+            distances[square] = UNREACHABLE
+        heap = []
+        for square in cut_off:
+            reachable = [distances[square + step] for step in steps if distances[square + step] != UNREACHABLE]
+            if reachable:
+                heap.append((min(reachable) + 1, square))
+        heapq.heapify(heap)
+        while heap:
+            distance, square = heapq.heappop(heap)
+            if distances[square] != UNREACHABLE:
+                continue
+            distances[square] = distance
+            for step in steps:
+                neighbor = square + step
+                if distances[neighbor] == UNREACHABLE and neighbor in cut_off:
+                    heapq.heappush(heap, (distance + 1, neighbor))
+
+    def get_distance_at(self, x, y):
+        """
+        Returns the number of steps from the square (x, y) to the target, or UNREACHABLE: int
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.distances[self.get_index(x, y)]
+        return UNREACHABLE
+
+    def choose_direction(self, x, y):
+        """
+        Chooses the direction of the first step of a shortest path from the square (x, y) to the target.
+
+        Returns the direction or None if the square is the target or the target can not be reached: tuple
+        """
+        distance = self.get_distance_at(x, y)
+        if distance <= 0:
+            return None
+
+        distance_x = self.target_x - x
+        distance_y = self.target_y - y
+        horizontal = Direction.EAST if distance_x > 0 else Direction.WEST if distance_x < 0 else None
+        vertical = Direction.SOUTH if distance_y > 0 else Direction.NORTH if distance_y < 0 else None
+        if abs(distance_x) >= abs(distance_y):
+            candidates = (horizontal, vertical) + Direction.get_values()
+        else:
+            candidates = (vertical, horizontal) + Direction.get_values()
+
+        for direction in candidates:
+            if direction is not None and \
+                    self.get_distance_at(x + direction[0], y + direction[1]) == distance - 1:
+                return direction
+        return None
+
+    def get_direction(self, location):
+        """
+        Returns the direction to move from the given location towards the target, or None if the location is the
+        target or the target can not be reached from it. The direction is chosen when it is first asked for.
+
+        Returns: tuple
+        """
+        x = location.get_x()
+        y = location.get_y()
+        index = self.get_index(x, y)
+        directions = self.directions
+        if index in directions:
+            return directions[index]
+        direction = directions[index] = self.choose_direction(x, y)
+        return direction
@@ -0,0 +1,84 @@
+from coordinates import Coordinates
+
+"""
+This module contains the shared geometry of a world: a table of interned Coordinates objects, one per square, and the
+precomputed offsets of the squares around a square. Code that probes the squares around an AI every turn uses these
+instead of creating new Coordinates objects for every probe.
+"""
+
+# Width of the wall border around the squares of a world. It is the largest distance at which the AI look at other
+# squares (the spread distance of spread type 1), so the squares around an AI never need to be bounds checked.
+BORDER = 2
+
+
+def get_neighbor_offsets(radius):
+    """
+    Returns the offsets (x_offset, y_offset) of all squares within the given distance of a square, not including the
+    square itself. The offsets are in the same order as in a loop over x_offset and then y_offset from -radius to
+    radius: tuple of tuples
+    """
+    return tuple((x_offset, y_offset)
+                 for x_offset in range(-radius, radius + 1)
+                 for y_offset in range(-radius, radius + 1)
+                 if x_offset != 0 or y_offset != 0)
+
+
+# The 8 squares around a square, and the 24 squares within a distance of 2
+NEIGHBOR_OFFSETS = {1: get_neighbor_offsets(1), 2: get_neighbor_offsets(2)}
+
+# The distance within which the disease spreads for each spread type (0: direct contact, 1: within a distance of 2)
+SPREAD_RADIUS = {0: 1, 1: 2}
+
+
+class CoordinateTable():
+    """
+    The class CoordinateTable holds one shared Coordinates object for every square of a world. Since Coordinates
+    are immutable, the same object can be shared by everyone who refers to that square. The objects are created when
+    they are first asked for, so a large world only pays for the squares that are actually used.
+    """
+
+    def __init__(self, width, height):
+        """
+        Creates an empty table for a world of the given dimensions.
+        """
+        self.width = width
+        self.height = height
+        self.table = [None] * (width * height)     # column by column, None for Coordinates not created yet
+
+    def get(self, x, y):
+        """
+        Returns the Coordinates (x, y). Coordinates inside the world come from the table, coordinates outside the
+        world are created on demand.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = x * self.height + y
+            coordinates = self.table[index]
+            if coordinates is None:
+                coordinates = self.table[index] = Coordinates(x, y)
+            return coordinates
+        return Coordinates(x, y)
+
+    def get_neighbor(self, coordinates, direction):
+        """
+        Returns the Coordinates next to the given ones in the given direction.
+        """
+        return self.get(coordinates.get_x() + direction[0], coordinates.get_y() + direction[1])
+
+
+class SparseCoordinateTable(CoordinateTable):
+    """
+    The class SparseCoordinateTable is a CoordinateTable that does not hold any Coordinates: every call creates new
+    Coordinates. It is used by worlds too large to keep a shared object for every square that the AI have visited,
+    so its memory does not depend on the area of the world.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.table = []
+
+    def get(self, x, y):
+        """
+        Returns new Coordinates (x, y).
+        """
+        return Coordinates(x, y)
@@ -1,19 +1,14 @@
 import sys
-import random
 from PyQt6.QtWidgets import QApplication
 from Input_page import InputWindow
 from Stats_page import StatsWindow
-from world import World
 from GUI import GUI
-from direction import Direction
-from AI import AI
-from coordinates import Coordinates
-from doctors import Doctors
-from vaccinator import Vaccinator
-from smartAI import SmartAI
-from avoidingAI import AvoidingAI
 from data_storage import SimulationDataStorage
-from builder import Builder
+from simulation import build_world
+try:
+    from recorder import TurnRecorder
+except ImportError:  # NumPy is not installed, so the course of the epidemic is not recorded
+    TurnRecorder = None
 
 """
 This disease simulation project aims to provide a graphical representation of the spread of a disease within a confined
@@ -27,7 +22,10 @@ INSTRUCTIONS FOR USING THE SIMULATION
 3. Input the desired parameters and click the "Submit" button to initiate the simulation.
 4. Observe the simulation in the grid-based environment, and monitor the real-time status of individuals.
 5. After the simulation ends, view the statistics in a separate window, providing insights into the disease's impact on
-    the population. The statistics will also be saved to the file simulation_data.csv.
+    the population. The statistics will also be saved to the file simulation_data.csv, and the counts of every turn
+    to the file simulation_turns_<run number>.npz if NumPy is installed.
+
+To run simulations without the graphical user interface, use simulation.py instead.
 """
 
 
@@ -48,114 +46,19 @@ def main():
     num_smart_healthy, num_avoiding_healthy, num_smart_sick, num_avoiding_sick, num_doctors, \
     num_vaccinators, num_builders, spread_type, infection_chance, death_chance, incubation_duration, \
     recovery_duration, vaccination_rate = input_window.return_input()
+    world_width, world_height = input_window.get_world_size()
 
-    # Step 4: Create world object using input values
-    test_world = World(30, 30)
-
-    # Step 5: Add things to world
-
-    for i in range(num_smart_healthy):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('SmartAI_healthy', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate)
-                brain = SmartAI(body)
-                body.set_brain(brain)
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_smart_sick):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('SmartAI_sick', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate)
-                brain = SmartAI(body)
-                body.set_brain(brain)
-                body.get_sick()
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_avoiding_healthy):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('AvoidingAI_healthy', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate, is_avoiding=True)
-                brain = AvoidingAI(body)
-                body.set_brain(brain)
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_avoiding_sick):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('AvoidingAI_sick', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate, is_avoiding=True)
-                brain = AvoidingAI(body)
-                body.set_brain(brain)
-                body.get_sick()
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_doctors):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('Doctor', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate, is_doctor=True)
-                brain = Doctors(body)
-                body.set_brain(brain)
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_vaccinators):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('Vaccinators', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate, is_vaccinator=True)
-                brain = Vaccinator(body)
-                body.set_brain(brain)
-                test_world.add_AI(body, location, Direction.EAST)
-                break
-
-    for i in range(num_builders):
-        while True:
-            x = random.randint(0, 29)
-            y = random.randint(0, 29)
-
-            if test_world.squares[x][y].is_empty():
-                location = Coordinates(x, y)
-                body = AI('SmartAI_healthy', spread_type, infection_chance, death_chance, incubation_duration,
-                          recovery_duration, vaccination_rate, is_builder=True)
-                brain = Builder(body)
-                body.set_brain(brain)
-                test_world.add_AI(body, location, Direction.EAST)
-                break
+    # Step 4 and 5: Create world object using input values and add things to world
+    test_world = build_world((num_smart_healthy, num_avoiding_healthy, num_smart_sick, num_avoiding_sick, num_doctors,
+                              num_vaccinators, num_builders, spread_type, infection_chance, death_chance,
+                              incubation_duration, recovery_duration, vaccination_rate), world_width, world_height)
+    recorder = None
+    if TurnRecorder is not None:
+        recorder = TurnRecorder()
+        recorder.attach(test_world)
 
     # Step 6: Display simulation window
-    gui = GUI(test_world, 20)
+    gui = GUI(test_world, 20, threaded=True)
     gui.show()
 
     # Step 7: Start event loop
@@ -165,11 +68,12 @@ def main():
     turn = SimulationDataStorage.get_last_turn() + 1
 
     # Step 9: Calculate statistics
-    dead_count = AI.dead_count
-    infected_count = AI.infected_count
-    recovered_count = AI.recovered_count
-    vaccinated_count = AI.vaccinated_count
-    cured_count = Doctors.cured_count
+    statistics = test_world.statistics
+    dead_count = statistics.dead_count
+    infected_count = statistics.infected_count
+    recovered_count = statistics.recovered_count
+    vaccinated_count = statistics.vaccinated_count
+    cured_count = statistics.cured_count
     total_population = num_smart_healthy + num_avoiding_healthy + num_smart_sick \
                        + num_avoiding_sick + num_doctors + num_vaccinators + num_builders
 
@@ -179,10 +83,10 @@ def main():
     vaccination_rate = (vaccinated_count / total_population)
     cured_rate = (cured_count / total_population)
 
-    gender_count = AI.gender_count
-    smoker_count = AI.smoker_count
-    pre_existing_conditions_count = AI.pre_existing_conditions_count
-    lifestyle_count = AI.lifestyle_count
+    gender_count = statistics.gender_count
+    smoker_count = statistics.smoker_count
+    pre_existing_conditions_count = statistics.pre_existing_conditions_count
+    lifestyle_count = statistics.lifestyle_count
 
     # Step 10: Display statistics window
     stats_window = StatsWindow(gender_count, smoker_count, pre_existing_conditions_count, lifestyle_count,
@@ -194,6 +98,8 @@ def main():
     data_storage.save_simulation_data(turn, dead_count, infected_count, recovered_count, vaccinated_count,
                                       cured_count, total_population, gender_count, smoker_count,
                                       pre_existing_conditions_count, lifestyle_count)
+    if recorder is not None:
+        recorder.save("simulation_turns_{}.npz".format(turn))
 
     sys.exit(app.exec())
 
@@ -0,0 +1,103 @@
+import sys
+
+"""
+This module estimates how much memory a world uses per AI and per square. The sizes are measured with sys.getsizeof
+from the objects and arrays that the world actually holds, so the report shows where the memory of a simulation goes
+and how the backends compare.
+"""
+
+
+def get_object_size(obj):
+    """
+    Returns the size of an object in bytes, including its instance dictionary if it has one: int
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def get_agent_sizes(world):
+    """
+    Returns the total sizes in bytes of the per-AI parts of the world: dict
+    """
+    sizes = {"AI objects": 0, "brains": 0, "engine arrays": 0, "indexes": 0}
+    for ai in world.AI:
+        sizes["AI objects"] += get_object_size(ai)
+        brain = ai.get_brain()
+        if brain is not None:
+            sizes["brains"] += get_object_size(brain)
+    sizes["AI objects"] += sys.getsizeof(world.AI)
+
+    engine = getattr(world, "engine", None)
+    if engine is not None:
+        sizes["engine arrays"] = sum(getattr(engine, name).nbytes for name in engine.AGENT_ARRAYS)
+        sizes["engine arrays"] += sys.getsizeof(engine.agents)
+
+    buckets = world.spatial_index.buckets
+    if isinstance(buckets, dict):
+        # A sparse index only stores its non-empty buckets
+        sizes["indexes"] += sys.getsizeof(buckets) + sum(sys.getsizeof(bucket) for bucket in buckets.values())
+    else:
+        for column in buckets:
+            sizes["indexes"] += sys.getsizeof(column) + sum(sys.getsizeof(bucket) for bucket in column)
+    for agent_set in world.state_index.sets.values():
+        sizes["indexes"] += sys.getsizeof(agent_set.agents) + sys.getsizeof(agent_set.positions)
+    return sizes
+
+
+def get_cell_sizes(world):
+    """
+    Returns the total sizes in bytes of the per-square parts of the world: dict
+    """
+    sizes = {"squares": 0, "coordinates": 0, "engine grids": 0}
+    grid = getattr(world, "grid", None)
+    if grid is not None:
+        # The border squares all refer to the same wall square, so only the list slots are counted for them
+        sizes["squares"] = sys.getsizeof(grid) + sum(get_object_size(square) for square in grid if not square.is_wall)
+    occupants = getattr(world, "occupants", None)
+    if occupants is not None:
+        # A sparse world stores its occupied squares and walls only, with int keys
+        sizes["squares"] = sys.getsizeof(occupants) + sys.getsizeof(world.walls) \
+            + sum(sys.getsizeof(key) for key in occupants) + sum(sys.getsizeof(key) for key in world.walls)
+
+    table = world.coordinates.table
+    sizes["coordinates"] = sys.getsizeof(table) + sum(get_object_size(coordinates) for coordinates in table
+                                                          if coordinates is not None)
+
+    engine = getattr(world, "engine", None)
+    if engine is not None:
+        sizes["engine grids"] = engine.padded_occupancy.nbytes + engine.padded_walls.nbytes
+    return sizes
+
+
+def get_memory_report(world):
+    """
+    Measures the memory used by the given world.
+
+    Returns the bytes per AI and per square, split by the part of the world they are used by: dict
+    """
+    number_of_AI = max(1, world.get_number_of_AI())
+    number_of_squares = world.get_width() * world.get_height()
+    agent_sizes = get_agent_sizes(world)
+    cell_sizes = get_cell_sizes(world)
+    return {
+        "number_of_AI": world.get_number_of_AI(),
+        "number_of_squares": number_of_squares,
+        "bytes_per_AI": {name: size / number_of_AI for name, size in agent_sizes.items()},
+        "bytes_per_square": {name: size / number_of_squares for name, size in cell_sizes.items()},
+        "total_bytes": sum(agent_sizes.values()) + sum(cell_sizes.values())
+    }
+
+
+def print_memory_report(world):
+    """
+    Prints the bytes per AI and per square used by the given world.
+    """
+    report = get_memory_report(world)
+    print("Memory used by {} AI in {} squares: {:.1f} MB".format(report["number_of_AI"], report["number_of_squares"],
+                                                                  report["total_bytes"] / 2 ** 20))
+    for title, key in (("Bytes per AI", "bytes_per_AI"), ("Bytes per square", "bytes_per_square")):
+        print("{}: {:.1f}".format(title, sum(report[key].values())))
+        for name, size in report[key].items():
+            print("    {}: {:.1f}".format(name, size))
@@ -0,0 +1,64 @@
+from direction import Direction
+from random_streams import PLACEMENT
+
+"""
+This module places new AI on random empty squares of a world. Drawing random squares until an empty one is found
+gets slow when the world fills up: placing the last AI in a world that is nearly full takes as many draws as there
+are squares. Instead, the squares are drawn without replacement with a partial Fisher-Yates shuffle of the list of
+all squares, so no square is ever drawn twice, and drawing stops as soon as enough empty squares have been found.
+
+The shuffled list is never created: only the positions of the list that the shuffle has swapped are stored in a
+dictionary, so drawing n squares takes O(n) time and memory even in a huge world.
+"""
+
+
+def sample_empty_squares(world, count, rng):
+    """
+    Draws distinct random empty squares of the world. The squares are drawn in random order until count empty
+    squares have been found or every square has been drawn.
+
+    Parameter count is the number of squares to draw: int
+
+    Parameter rng is the random numbers of the draws: RandomStream
+
+    Returns the coordinates (x, y) of the empty squares, at most count of them: list of tuples
+    """
+    height = world.get_height()
+    number_of_squares = world.get_width() * height
+    swapped = {}    # maps the positions of the shuffled list that have been swapped to the squares now in them
+    squares = []
+    for drawn in range(number_of_squares):
+        if len(squares) == count:
+            break
+        # Swap a random square of the rest of the list into the position drawn
+        position = drawn + rng.randrange(number_of_squares - drawn)
+        square = swapped.get(position, position)
+        swapped[position] = swapped.pop(drawn, drawn)
+        x, y = divmod(square, height)
+        if world.is_empty_at(x, y):
+            squares.append((x, y))
+    return squares
+
+
+def add_AIs_at_random_locations(world, AIs, facing=Direction.EAST):
+    """
+    Adds new AI to distinct random empty squares of the world with World.add_AIs. AI without an id get one from the
+    world first, like in World.add_AI. The squares are drawn from a random stream of the first AI, so the placement
+    only depends on the seed of the world and the AI added.
+
+    Parameter AIs is the AI to add, which already have their ids: list
+
+    Parameter facing is the direction the AI are facing initially
+
+    Raises ValueError if the world does not have an empty square for every AI
+    """
+    if not AIs:
+        return
+    for AI in AIs:
+        if AI.id is None:
+            AI.id = world.get_new_AI_id()
+    rng = world.random.get_stream(AIs[0].id, world.turn_count, PLACEMENT)
+    squares = sample_empty_squares(world, len(AIs), rng)
+    if len(squares) < len(AIs):
+        raise ValueError("The world has empty squares for only {} of the {} AI".format(len(squares), len(AIs)))
+    world.add_AIs(AIs, [world.get_coordinates(x, y) for x, y in squares], facing)
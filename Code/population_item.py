@@ -0,0 +1,141 @@
+from PyQt6 import QtWidgets, QtCore, QtGui
+from AI_graphics_item import AIGraphicsItem, STATE_COLORS, SICK_COLOR, STUCK_COLOR, RECOVERED_COLOR, \
+    SUSCEPTIBLE_COLOR, INFECTED_COLOR
+from direction import Direction
+from snapshot import STUCK
+try:
+    import numpy as np
+    from array_world import SUSCEPTIBLE, INFECTED, SICK, RECOVERED
+except ImportError:  # NumPy is not installed, so the population is always drawn with stamps
+    np = None
+
+"""
+This module draws the whole population of a world with a single graphics item, for worlds that have too many AI for
+one AIGraphicsItem per AI. The item paints all AI of the latest snapshot of the world (see snapshot.py) in one
+paint() call:
+
+ - Snapshots with the records of the AI are drawn with stamps, small pixmaps of each shape, color and facing, which
+   are drawn once and then copied into place.
+
+ - Snapshots with the arrays of an ArrayWorld are drawn straight from the arrays: the color of every AI is written
+   into a NumPy buffer with one pixel per square, and a QImage that shares the memory of the buffer is scaled onto
+   the scene. The shapes are not drawn, every AI is a square of its color.
+"""
+
+
+def get_argb(color):
+    """
+    Returns the color as a 32-bit ARGB value, as stored in a QImage: int
+    """
+    return color.rgba() & 0xFFFFFFFF
+
+
+class PopulationGraphicsItem(QtWidgets.QGraphicsItem):
+    """
+    The class PopulationGraphicsItem draws every AI of a snapshot of a world. The GUI gives it each new snapshot
+    with set_snapshot.
+    """
+
+    def __init__(self, world, square_size):
+        super(PopulationGraphicsItem, self).__init__()
+        self.world = world
+        self.square_size = square_size
+        self.stamps = {}    # maps (role, state, facing) to the pixmap of an AI
+        self.snapshot = None
+        self.records = {}   # maps every living AI to its record, updated from the changes in the snapshots
+        if np is not None:
+            # The colors of the states of a snapshot, indexed by the state codes. Dead AI are transparent.
+            self.state_colors = np.zeros(STUCK + 1, dtype=np.uint32)
+            self.state_colors[SUSCEPTIBLE] = get_argb(SUSCEPTIBLE_COLOR)
+            self.state_colors[INFECTED] = get_argb(INFECTED_COLOR)
+            self.state_colors[SICK] = get_argb(SICK_COLOR)
+            self.state_colors[RECOVERED] = get_argb(RECOVERED_COLOR)
+            self.state_colors[STUCK] = get_argb(STUCK_COLOR)
+            # One pixel per square, indexed as [y, x] like the rows of the image. The image shares the memory of the
+            # buffer, so the buffer must live as long as the image.
+            self.buffer = np.zeros((world.get_height(), world.get_width()), dtype=np.uint32)
+            self.image = QtGui.QImage(self.buffer.data, world.get_width(), world.get_height(),
+                                      4 * world.get_width(), QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+
+    def boundingRect(self):
+        return QtCore.QRectF(0, 0, self.world.get_width() * self.square_size + 2,
+                             self.world.get_height() * self.square_size + 2)
+
+    def set_snapshot(self, snapshot):
+        """
+        Makes the item draw the given snapshot, and updates the records of the AI that have changed in it.
+        """
+        records = self.records
+        for AI, record in snapshot.records.items():
+            if record is None:
+                records.pop(AI, None)
+            else:
+                records[AI] = record
+        self.snapshot = snapshot
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        """
+        Paints all the AI of the latest snapshot.
+        """
+        if self.snapshot is None:
+            return
+        if self.snapshot.arrays is not None:
+            self.paint_array(painter)
+        else:
+            self.paint_stamps(painter)
+
+    def paint_stamps(self, painter):
+        """
+        Paints every living AI by copying the stamp of its shape, color and facing into its square.
+        """
+        size = self.square_size
+        for AI, record in self.records.items():
+            x, y, facing, state = record
+            key = (AI.get_role(), state, facing)
+            stamp = self.stamps.get(key)
+            if stamp is None:
+                stamp = self.stamps[key] = self.create_stamp(AI, record)
+            painter.drawPixmap(x * size - 1, y * size - 1, stamp)
+
+    def create_stamp(self, AI, record):
+        """
+        Draws the shape of the given AI, in the color and direction of its record, into a pixmap. The shape is the
+        same as that of an AIGraphicsItem. The pixmap has a margin of one pixel for the outline.
+
+        Returns: QPixmap
+        """
+        size = self.square_size
+        x, y, facing, state = record
+        polygon = AIGraphicsItem(AI, size, record).polygon()
+        stamp = QtGui.QPixmap(size + 2, size + 2)
+        stamp.fill(QtCore.Qt.GlobalColor.transparent)
+        painter = QtGui.QPainter(stamp)
+        painter.translate(1 + size / 2, 1 + size / 2)
+        painter.rotate(Direction.get_degrees(facing))
+        painter.translate(-size / 2, -size / 2)
+        painter.setBrush(STATE_COLORS[state])
+        painter.drawPolygon(polygon)
+        painter.end()
+        return stamp
+
+    def paint_array(self, painter):
+        """
+        Writes the color of every living AI of the snapshot arrays into the pixel of its square and paints the image
+        scaled to the size of the world.
+        """
+        x, y, states = self.snapshot.arrays
+        self.buffer.fill(0)
+        self.buffer[y, x] = self.state_colors[states]
+        painter.drawImage(QtCore.QRectF(0, 0, self.world.get_width() * self.square_size,
+                                        self.world.get_height() * self.square_size), self.image)
+
+    def mousePressEvent(self, event):
+        """
+        Removes the AI that was clicked from the simulation, like clicking an AIGraphicsItem does. The AI is looked
+        up by the GUI, see GUI.remove_AI_at.
+        """
+        x = int(event.pos().x() // self.square_size)
+        y = int(event.pos().y() // self.square_size)
+        if 0 <= x < self.world.get_width() and 0 <= y < self.world.get_height():
+            self.world.gui.remove_AI_at(x, y)
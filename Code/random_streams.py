@@ -0,0 +1,133 @@
+import random
+
+"""
+This module contains the random numbers of a simulation. Every random draw is computed from a key of the run seed,
+the id of the AI, the number of the full turn and the purpose of the draw, with a counter-based generator: the key
+and a counter are mixed into 64 random bits by a hash function. A draw therefore does not depend on how many draws
+were made before it by other AI, so the AI can be updated in any order, in batches or in separate processes and
+still get the same random numbers.
+
+The mixing function is the finalizer of SplitMix64. array_world.py computes the same function for whole NumPy
+arrays of AI ids at once.
+"""
+
+MASK = 2 ** 64 - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+# The purposes of the random draws. Draws with different purposes are independent of each other.
+ATTRIBUTES = 1      # the age, gender etc. of a new AI
+MOVE = 2            # the random moves of the brains
+TARGET = 3          # choosing a target AI or a target square
+DEATH = 4           # whether a sick AI dies or recovers
+INFECTION = 5       # whether a susceptible AI gets infected
+PLACEMENT = 6       # the square where a new AI is placed
+
+
+def mix(value):
+    """
+    Mixes a 64-bit integer into 64 random-looking bits.
+
+    Returns: int
+    """
+    value = (value + GOLDEN_GAMMA) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def get_key(seed, agent_id, turn, purpose):
+    """
+    Returns the key of the random stream of the given AI, full turn and purpose: int
+    """
+    return mix(mix(mix(mix(seed & MASK) ^ agent_id) ^ turn) ^ purpose)
+
+
+def to_float(bits):
+    """
+    Converts 64 random bits to a float in the range [0, 1) with 53 random bits: float
+    """
+    return (bits >> 11) * (1.0 / 2 ** 53)
+
+
+class RandomStream():
+    """
+    The class RandomStream is a sequence of random numbers for one AI, full turn and purpose. It provides the methods
+    of random.Random that the simulation uses. The n:th number of the stream is computed from the key and n only.
+    """
+
+    __slots__ = ("key", "counter")
+
+    def __init__(self, key):
+        self.key = key
+        self.counter = 0
+
+    def getrandbits64(self):
+        """
+        Returns the next 64 random bits of the stream: int
+        """
+        bits = mix(self.key ^ self.counter)
+        self.counter += 1
+        return bits
+
+    def random(self):
+        """
+        Returns the next random float in the range [0, 1): float
+        """
+        return to_float(self.getrandbits64())
+
+    def randrange(self, n):
+        """
+        Returns a random integer in the range [0, n): int
+        """
+        if n <= 0:
+            raise ValueError("empty range for randrange()")
+        return (self.getrandbits64() * n) >> 64
+
+    def randint(self, a, b):
+        """
+        Returns a random integer in the range [a, b], including both end points: int
+        """
+        return a + self.randrange(b - a + 1)
+
+    def choice(self, sequence):
+        """
+        Returns a random element of a non-empty sequence
+        """
+        if not sequence:
+            raise IndexError("Cannot choose from an empty sequence")
+        return sequence[self.randrange(len(sequence))]
+
+
+class RandomStreams():
+    """
+    The class RandomStreams gives out the random streams of a simulation run. A world has one RandomStreams object,
+    created from the seed of the run.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Parameter seed is the seed of the run, or None to take one from the random module: int
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+
+    def get_stream(self, agent_id, turn, purpose):
+        """
+        Returns the random stream of the given AI, full turn and purpose.
+
+        Parameter agent_id is the id of the AI: int
+
+        Parameter turn is the number of the full turn: int
+
+        Parameter purpose is one of the purposes of this module, e.g. MOVE: int
+
+        Returns: RandomStream
+        """
+        return RandomStream(get_key(self.seed, agent_id, turn, purpose))
+
+    def random(self, agent_id, turn, purpose):
+        """
+        Returns the first random float of the stream of the given AI, full turn and purpose: float
+        """
+        return to_float(mix(get_key(self.seed, agent_id, turn, purpose)))
@@ -0,0 +1,74 @@
+import numpy as np
+
+"""
+This module records the course of the epidemic. A TurnRecorder attached to a world stores the number of AI in each
+health state, the numbers of vaccinated and cured AI and the number of new infections after every full turn. The
+counts are written into preallocated NumPy arrays, one per column, so recording a turn does not create any Python
+objects that live longer than the call. The recorded columns can be saved as a compressed .npz file.
+"""
+
+# The recorded columns. The health state counts come from the state index of the world, and the other columns from
+# the statistics of the world.
+COLUMNS = ("turn", "susceptible", "infected", "sick", "recovered", "dead", "vaccinated", "cured", "new_infections")
+
+
+class TurnRecorder():
+    """
+    The class TurnRecorder stores one row of counts per full turn of a world. The first row is the state of the
+    world when the recorder was attached to it.
+    """
+
+    def __init__(self, capacity=256):
+        """
+        Parameter capacity is the number of turns there is room for before the arrays have to be enlarged: int
+        """
+        self.data = np.zeros((len(COLUMNS), capacity), dtype=np.int64)   # one row per column, one column per turn
+        self.count = 0
+        self.previous_infected_count = 0
+
+    def attach(self, world):
+        """
+        Makes the world record its full turns with this recorder, and records the current state of the world.
+        """
+        world.recorder = self
+        self.previous_infected_count = world.statistics.infected_count
+        self.record(world)
+
+    def reserve(self, capacity):
+        """
+        Makes sure that there is room for the given number of turns, doubling the capacity when it is enlarged.
+        """
+        old_capacity = self.data.shape[1]
+        if capacity > old_capacity:
+            data = np.zeros((len(COLUMNS), max(capacity, 2 * old_capacity)), dtype=np.int64)
+            data[:, :self.count] = self.data[:, :self.count]
+            self.data = data
+
+    def record(self, world):
+        """
+        Records the counts of the world after a full turn.
+        """
+        if self.count == self.data.shape[1]:
+            self.reserve(self.count + 1)
+        states = world.state_index
+        statistics = world.statistics
+        self.data[:, self.count] = (world.turn_count, states.count("susceptible"), states.count("infected"),
+                                    states.count("sick"), states.count("recovered"), states.count("dead"),
+                                    states.count("vaccinated"), statistics.cured_count,
+                                    statistics.infected_count - self.previous_infected_count)
+        self.previous_infected_count = statistics.infected_count
+        self.count += 1
+
+    def get_columns(self):
+        """
+        Returns the recorded values of each column: dict of arrays
+        """
+        return {name: self.data[index, :self.count] for index, name in enumerate(COLUMNS)}
+
+    def save(self, file):
+        """
+        Saves the recorded columns as a compressed .npz file, with one array per column.
+
+        Parameter file is the name of the file or a file object
+        """
+        np.savez_compressed(file, **self.get_columns())
@@ -0,0 +1,167 @@
+import os
+import re
+import glob
+import hashlib
+import json
+import shutil
+import tempfile
+from simulation import simulate, parameters_to_dict, WORLD_WIDTH, WORLD_HEIGHT
+
+"""
+This module caches the results of simulations on disk, so that running the same scenario again costs a file read
+instead of a whole simulation. A result is stored under a hash of everything it depends on: the 13 input values,
+the size of the world, the seed, the maximum number of turns, the engine and the version of the simulation code.
+
+The code version is a hash of the source files of the simulation. The results of each code version are kept in a
+directory of their own, and the directories of other versions are deleted when the cache is opened, so results of
+changed code are never returned. Only directories that the cache has created are deleted: they are named after a code
+version and contain a marker file, so the cache can be opened in a directory that holds other files too. When the
+cache grows over its size limit, the least recently used results are deleted.
+
+Only runs with a seed are cached, since runs without a seed are meant to give different results every time.
+"""
+
+# The default location and size limit of the cache
+CACHE_DIRECTORY = "simulation_cache"
+MAX_CACHE_BYTES = 100 * 2 ** 20
+
+# The source files that do not affect the results of a simulation
+IGNORED_SOURCE_FILES = ("test.py",)
+
+# The file that marks a directory of a code version as created by the cache, and the names of those directories
+MARKER_FILE = ".simulation_cache"
+VERSION_DIRECTORY_PATTERN = re.compile("[0-9a-f]{16}")
+
+code_version = None
+
+
+def get_code_version():
+    """
+    Returns a hash of the source files of the simulation, computed once per process: str
+    """
+    global code_version
+    if code_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+            if os.path.basename(path) not in IGNORED_SOURCE_FILES:
+                digest.update(os.path.basename(path).encode())
+                with open(path, "rb") as file:
+                    digest.update(file.read())
+        code_version = digest.hexdigest()[:16]
+    return code_version
+
+
+def get_cache_key(params, seed, max_turns=10000, engine="objects", width=WORLD_WIDTH, height=WORLD_HEIGHT):
+    """
+    Computes the key of a simulation run. The parameters are the same as those of simulate.
+
+    Returns a hash of the run and the code version: str
+    """
+    run = {
+        "parameters": parameters_to_dict(params),
+        "seed": seed,
+        "max_turns": max_turns,
+        "engine": engine,
+        "width": width,
+        "height": height,
+        "code_version": get_code_version()
+    }
+    return hashlib.sha256(json.dumps(run, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache():
+    """
+    The class ResultCache stores simulation results as JSON files in a directory of the current code version. The
+    modification time of a file is the time it was last used, and it decides which results are deleted first.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=MAX_CACHE_BYTES):
+        """
+        Opens the cache in the given directory and deletes the results of other code versions. Other files and
+        directories in the directory are left alone.
+
+        Parameter max_bytes is the largest total size of the cached results in bytes: int
+        """
+        self.max_bytes = max_bytes
+        self.directory = os.path.join(directory, get_code_version())
+        os.makedirs(self.directory, exist_ok=True)
+        open(os.path.join(self.directory, MARKER_FILE), "a").close()
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name != get_code_version() and VERSION_DIRECTORY_PATTERN.fullmatch(name) and \
+                    os.path.isfile(os.path.join(path, MARKER_FILE)):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        Returns the cached results of the given key, or None if they are not in the cache: dict
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, "r") as file:
+                results = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return results
+
+    def put(self, key, results):
+        """
+        Stores the results under the given key, and deletes the least recently used results if the cache is too
+        large. The file is written under a temporary name first, so that other processes never read half of it.
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as file:
+            json.dump(results, file)
+        os.replace(temporary_path, self.get_path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used results until the cache is at most max_bytes large.
+        """
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    status = entry.stat()
+                except OSError:     # deleted by another process
+                    continue
+                entries.append((status.st_mtime, status.st_size, entry.path))
+                total_bytes += status.st_size
+        entries.sort()
+        for modified, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+
+
+def cached_simulate(params, seed=None, max_turns=10000, engine="objects", width=WORLD_WIDTH, height=WORLD_HEIGHT,
+                    cache=None):
+    """
+    Returns the results of simulate from the cache, or runs the simulation and stores its results in the cache.
+    The parameters are the same as those of simulate.
+
+    Parameter cache is the cache to use, or None to open the default cache: ResultCache
+
+    Returns: dict
+    """
+    if seed is None:
+        return simulate(params, seed=seed, max_turns=max_turns, engine=engine, width=width, height=height)
+    if cache is None:
+        cache = ResultCache()
+    key = get_cache_key(params, seed, max_turns, engine, width, height)
+    results = cache.get(key)
+    if results is None:
+        results = simulate(params, seed=seed, max_turns=max_turns, engine=engine, width=width, height=height)
+        cache.put(key, results)
+    return results
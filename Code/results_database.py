@@ -0,0 +1,151 @@
+import sqlite3
+from simulation import PARAMETER_NAMES, HEALTH_STATES
+
+"""
+This module stores the results of simulations in an SQLite database, as an alternative to the csv file written by
+SimulationDataStorage. Every run is stored with all its input values, so that the results of different scenarios
+can be told apart and compared with SQL queries, for example the mortality for each infection chance of spread
+type 1:
+
+    SELECT infection_chance, AVG(dead_count * 1.0 / total_population) FROM runs
+    WHERE spread_type = 1 GROUP BY infection_chance
+
+The table runs has one row per run and the table series has the health state counts of every turn of a run. The
+database uses write-ahead logging, so that it can be read while results are being added, and the parameter columns
+are indexed.
+"""
+
+DATABASE_FILE = "simulation_results.db"
+
+# The columns of the runs table that are copied from the results of simulate, in addition to the input values
+RESULT_COLUMNS = ("seed", "engine", "width", "height", "wall_time", "turns", "dead_count", "infected_count",
+                  "recovered_count", "vaccinated_count", "cured_count", "total_population")
+
+# The rates that can be computed from the columns of the runs table, named like in SimulationDataStorage
+RATES = {
+    "mortality_rate": "dead_count * 1.0 / total_population",
+    "infection_rate": "infected_count * 1.0 / total_population",
+    "recovery_rate": "recovered_count * 1.0 / total_population",
+    "vaccination_rate": "vaccinated_count * 1.0 / total_population",
+    "cured_rate": "cured_count * 1.0 / total_population"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    {parameters},
+    seed INTEGER,
+    engine TEXT,
+    width INTEGER,
+    height INTEGER,
+    wall_time REAL,
+    turns INTEGER,
+    dead_count INTEGER,
+    infected_count INTEGER,
+    recovered_count INTEGER,
+    vaccinated_count INTEGER,
+    cured_count INTEGER,
+    total_population INTEGER
+);
+CREATE TABLE IF NOT EXISTS series (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    turn INTEGER NOT NULL,
+    {states},
+    PRIMARY KEY (run_id, turn)
+) WITHOUT ROWID;
+""".format(parameters=",\n    ".join(name + " INTEGER NOT NULL" for name in PARAMETER_NAMES),
+           states=",\n    ".join(name + " INTEGER NOT NULL" for name in HEALTH_STATES))
+
+
+class ResultsDatabase():
+    """
+    The class ResultsDatabase adds simulation results to an SQLite database and runs queries on it. Results are
+    added in batches, each batch in one transaction.
+    """
+
+    def __init__(self, file_name=DATABASE_FILE):
+        """
+        Opens the database, creating the tables and indexes if they do not exist yet.
+        """
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        # With write-ahead logging, a committed transaction is safe from crashes of this program without waiting
+        # for the disk on every commit
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            for name in PARAMETER_NAMES:
+                self.connection.execute("CREATE INDEX IF NOT EXISTS runs_{0} ON runs ({0})".format(name))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def add_run(self, results):
+        """
+        Adds the results of one run, see add_runs.
+
+        Returns the id of the run: int
+        """
+        return self.add_runs([results])[0]
+
+    def add_runs(self, results_list):
+        """
+        Adds the results of several runs in one transaction. The health state counts of every turn are added to the
+        series table if the results include the history.
+
+        Parameter results_list is a list of results returned by simulate
+
+        Returns the ids of the runs: list
+        """
+        columns = PARAMETER_NAMES + RESULT_COLUMNS
+        insert_run = "INSERT INTO runs ({}) VALUES ({})".format(", ".join(columns), ", ".join("?" * len(columns)))
+        insert_turn = "INSERT INTO series (run_id, turn, {}) VALUES (?, ?, {})".format(
+            ", ".join(HEALTH_STATES), ", ".join("?" * len(HEALTH_STATES)))
+
+        run_ids = []
+        with self.connection:
+            for results in results_list:
+                values = [results["parameters"][name] for name in PARAMETER_NAMES]
+                values += [results.get(name) for name in RESULT_COLUMNS]
+                run_id = self.connection.execute(insert_run, values).lastrowid
+                run_ids.append(run_id)
+                if results.get("history"):
+                    self.connection.executemany(insert_turn, (
+                        [run_id, turn] + [counts[name] for name in HEALTH_STATES]
+                        for turn, counts in enumerate(results["history"])))
+        return run_ids
+
+    def query(self, sql, parameters=()):
+        """
+        Runs an SQL query on the database.
+
+        Returns the rows of the result: list of tuples
+        """
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def get_mean_by_parameter(self, column, parameter, **conditions):
+        """
+        Computes the mean of a result column or rate for each value of an input parameter, for example the mortality
+        rate for each infection chance. Only the runs whose input values match the conditions are included.
+
+        Parameter column is one of RESULT_COLUMNS or RATES: str
+
+        Parameter parameter is one of PARAMETER_NAMES: str
+
+        Parameter conditions maps names of PARAMETER_NAMES to the values the runs must have
+
+        Returns (parameter value, mean, number of runs) for each value of the parameter, in ascending order: list
+        """
+        if column not in RESULT_COLUMNS + tuple(RATES) or parameter not in PARAMETER_NAMES \
+                or not set(conditions) <= set(PARAMETER_NAMES):
+            raise ValueError("Unknown column or parameter")
+        where = " AND ".join("{} = ?".format(name) for name in conditions) or "1"
+        sql = "SELECT {1}, AVG({0}), COUNT(*) FROM runs WHERE {2} GROUP BY {1} ORDER BY {1}".format(
+            RATES.get(column, column), parameter, where)
+        return self.query(sql, list(conditions.values()))
@@ -0,0 +1,305 @@
+import sys
+import argparse
+import json
+import time
+from world import World
+from doctors import Doctors
+from vaccinator import Vaccinator
+from smartAI import SmartAI
+from avoidingAI import AvoidingAI
+from builder import Builder
+from data_storage import SimulationDataStorage
+from state_index import ROLES
+from memory_report import print_memory_report
+from placement import add_AIs_at_random_locations
+
+"""
+This module runs the disease simulation without the graphical user interface. It builds the world from the same
+input values that the InputWindow returns, and steps World.next_full_turn in a tight loop until no AI is sick or
+infected anymore. Nothing in this module depends on PyQt6, so simulations can be run on machines without a display.
+
+The module can also be used from the command line, for example:
+    python simulation.py --smart-healthy 40 --smart-sick 5 --doctors 2 --infection-chance 50 --seed 1
+"""
+
+# The simulation input values in the order returned by InputWindow.return_input
+PARAMETER_NAMES = ("num_smart_healthy", "num_avoiding_healthy", "num_smart_sick", "num_avoiding_sick", "num_doctors",
+                   "num_vaccinators", "num_builders", "spread_type", "infection_chance", "death_chance",
+                   "incubation_duration", "recovery_duration", "vaccination_rate")
+
+DEFAULT_PARAMETERS = {
+    "num_smart_healthy": 40,
+    "num_avoiding_healthy": 0,
+    "num_smart_sick": 5,
+    "num_avoiding_sick": 0,
+    "num_doctors": 0,
+    "num_vaccinators": 0,
+    "num_builders": 0,
+    "spread_type": 0,
+    "infection_chance": 50,
+    "death_chance": 10,
+    "incubation_duration": 3,
+    "recovery_duration": 10,
+    "vaccination_rate": 50
+}
+
+# The world backends: "objects" stores a Square per square and a full AI object per AI, "arrays" stores both in
+# NumPy arrays, "vectorized" additionally updates the disease status of all AI at once (see array_world.py) and
+# "sparse" only stores the squares that contain an AI or a wall, for huge worlds with few AI (see sparse_world.py)
+ENGINES = ("objects", "arrays", "vectorized", "sparse")
+
+# The kinds of AI that build_world creates, in the order they are created: the input value with their number, their
+# name, the keyword arguments of AI, whether they start sick and the class of their brain
+AI_KINDS = (
+    ("num_smart_healthy", "SmartAI_healthy", {}, False, SmartAI),
+    ("num_smart_sick", "SmartAI_sick", {}, True, SmartAI),
+    ("num_avoiding_healthy", "AvoidingAI_healthy", {"is_avoiding": True}, False, AvoidingAI),
+    ("num_avoiding_sick", "AvoidingAI_sick", {"is_avoiding": True}, True, AvoidingAI),
+    ("num_doctors", "Doctor", {"is_doctor": True}, False, Doctors),
+    ("num_vaccinators", "Vaccinators", {"is_vaccinator": True}, False, Vaccinator),
+    ("num_builders", "SmartAI_healthy", {"is_builder": True}, False, Builder),
+)
+
+# The default dimensions of the world in squares
+WORLD_WIDTH = 30
+WORLD_HEIGHT = 30
+
+# The health states that are counted on every turn of the simulation
+HEALTH_STATES = ("susceptible", "infected", "sick", "recovered", "dead", "vaccinated")
+
+
+def parameters_to_dict(params):
+    """
+    Converts the simulation input values into a dictionary keyed by PARAMETER_NAMES.
+
+    Parameter params is either a dictionary or a sequence of the 13 values in the order returned by
+    InputWindow.return_input. Missing dictionary keys are filled in from DEFAULT_PARAMETERS.
+
+    Returns the input values as a dictionary: dict
+    """
+    if isinstance(params, dict):
+        unknown = set(params) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError("Unknown simulation parameters: " + ", ".join(sorted(unknown)))
+        values = dict(DEFAULT_PARAMETERS)
+        values.update(params)
+        return values
+    params = tuple(params)
+    if len(params) != len(PARAMETER_NAMES):
+        raise ValueError("Expected {} simulation parameters, got {}".format(len(PARAMETER_NAMES), len(params)))
+    return dict(zip(PARAMETER_NAMES, params))
+
+
+def get_world_class(engine):
+    """
+    Returns the world class of the given engine. The "arrays" and "vectorized" engines need NumPy, so it is only
+    imported when used.
+
+    Parameter engine is one of ENGINES: str
+    """
+    if engine == "objects":
+        return World
+    elif engine == "arrays":
+        from array_world import ArrayWorld
+        return ArrayWorld
+    elif engine == "vectorized":
+        from array_world import VectorizedWorld
+        return VectorizedWorld
+    elif engine == "sparse":
+        from sparse_world import SparseWorld
+        return SparseWorld
+    else:
+        raise ValueError("Unknown engine: {}".format(engine))
+
+
+def build_world(params, width=WORLD_WIDTH, height=WORLD_HEIGHT, engine="objects", seed=None):
+    """
+    Creates a world and adds all the AI described by the simulation input values to random empty squares. The AI
+    of all kinds are created first and then placed at once, see placement.py.
+
+    Parameter params is the simulation input values, see parameters_to_dict
+
+    Parameter width and height are the dimensions of the world in squares: int
+
+    Parameter engine is the world backend, one of ENGINES: str
+
+    Parameter seed is the seed of the random streams of the world, or None to take one from the random module
+
+    Returns the populated world: World
+    """
+    values = parameters_to_dict(params)
+    disease = (values["spread_type"], values["infection_chance"], values["death_chance"],
+               values["incubation_duration"], values["recovery_duration"], values["vaccination_rate"])
+    world = get_world_class(engine)(width, height, seed)
+
+    bodies = []
+    for parameter, name, options, sick, brain_class in AI_KINDS:
+        for i in range(values[parameter]):
+            body = world.create_AI(name, *disease, **options)
+            if sick:
+                body.get_sick()
+            body.set_brain(brain_class(body))
+            bodies.append(body)
+    add_AIs_at_random_locations(world, bodies)
+
+    return world
+
+
+def count_health_states(world):
+    """
+    Counts how many AI of the world are in each of the HEALTH_STATES.
+
+    Returns the counts: dict
+    """
+    return {name: len(world.get_AI_in_state(name)) for name in HEALTH_STATES}
+
+
+def collect_results(world, values, turns, history):
+    """
+    Collects the end-of-run statistics of the world in the same form that main.py stores them.
+
+    Returns the results: dict
+    """
+    # Dead AI have been removed from the AI list, but every AI keeps its role
+    total_population = sum(len(world.get_AI_in_state(role)) for role in ROLES)
+    statistics = world.statistics
+    results = {
+        "parameters": values,
+        "turns": turns,
+        "dead_count": statistics.dead_count,
+        "infected_count": statistics.infected_count,
+        "recovered_count": statistics.recovered_count,
+        "vaccinated_count": statistics.vaccinated_count,
+        "cured_count": statistics.cured_count,
+        "total_population": total_population,
+        "gender_count": dict(statistics.gender_count),
+        "smoker_count": dict(statistics.smoker_count),
+        "pre_existing_conditions_count": dict(statistics.pre_existing_conditions_count),
+        "lifestyle_count": dict(statistics.lifestyle_count),
+        "history": history
+    }
+    return results
+
+
+def simulate(params, seed=None, max_turns=10000, engine="objects", width=WORLD_WIDTH, height=WORLD_HEIGHT,
+             recorder=None):
+    """
+    Runs a whole simulation without the graphical user interface. The world is built from the given input values
+    and World.next_full_turn is called until no AI is sick or infected, or until max_turns full turns have been run.
+
+    Parameter params is the simulation input values, see parameters_to_dict
+
+    Parameter seed is the seed of the random streams of the world, which give all the random numbers of the run, or
+    None for an unseeded run
+
+    Parameter max_turns is the maximum number of full turns to run: int
+
+    Parameter engine is the world backend, one of ENGINES: str
+
+    Parameter width and height are the dimensions of the world in squares: int
+
+    Parameter recorder records the counts of every full turn into arrays, or None: TurnRecorder
+
+    Returns the final counters and the health state counts of every turn (the first entry is the initial state): dict
+    """
+    values = parameters_to_dict(params)
+    world = build_world(values, width, height, engine=engine, seed=seed)
+    if recorder is not None:
+        recorder.attach(world)
+
+    history = [count_health_states(world)]
+    turns = 0
+    while turns < max_turns and world.has_active_disease():
+        world.next_full_turn()
+        turns += 1
+        history.append(count_health_states(world))
+
+    results = collect_results(world, values, turns, history)
+    results.update(seed=seed, engine=engine, width=width, height=height)
+    return results
+
+
+def save_results(results):
+    """
+    Appends the results of a simulation to the csv file, in the same way as main.py does after a GUI run.
+    """
+    if results["total_population"] == 0:
+        return
+    turn = SimulationDataStorage.get_last_turn() + 1
+    data_storage = SimulationDataStorage()
+    data_storage.save_simulation_data(turn, results["dead_count"], results["infected_count"],
+                                      results["recovered_count"], results["vaccinated_count"],
+                                      results["cured_count"], results["total_population"],
+                                      results["gender_count"], results["smoker_count"],
+                                      results["pre_existing_conditions_count"], results["lifestyle_count"])
+
+
+def parse_arguments(argv=None):
+    """
+    Parses the command line arguments of the headless runner.
+    """
+    parser = argparse.ArgumentParser(description="Run the disease simulation without the graphical user interface.")
+    for name in PARAMETER_NAMES:
+        option = "--" + name.replace("num_", "").replace("_", "-")
+        parser.add_argument(option, dest=name, type=int, default=DEFAULT_PARAMETERS[name])
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random number generator")
+    parser.add_argument("--max-turns", type=int, default=10000, help="maximum number of full turns to run")
+    parser.add_argument("--engine", choices=ENGINES, default="objects", help="world backend")
+    parser.add_argument("--width", type=int, default=WORLD_WIDTH, help="width of the world in squares")
+    parser.add_argument("--height", type=int, default=WORLD_HEIGHT, help="height of the world in squares")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="print the memory used per AI and per square by the world before running it")
+    parser.add_argument("--save", action="store_true", help="append the results to simulation_data.csv")
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="save the counts of every turn as a compressed NumPy .npz file")
+    parser.add_argument("--cache", metavar="DIRECTORY", default=None,
+                        help="read the results of a seeded run from, and store them in, the given cache directory")
+    parser.add_argument("--database", metavar="FILE", default=None,
+                        help="add the results, including the counts of every turn, to the given SQLite database")
+    parser.add_argument("--json", action="store_true", help="print the full results, including the history, as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    params = {name: getattr(arguments, name) for name in PARAMETER_NAMES}
+    if arguments.memory_report:
+        print_memory_report(build_world(params, arguments.width, arguments.height, engine=arguments.engine,
+                                       seed=arguments.seed))
+    start_time = time.perf_counter()
+    if arguments.record is not None:
+        # The recorder needs NumPy, so it is only imported when used. A recorded run is never read from the cache.
+        from recorder import TurnRecorder
+        recorder = TurnRecorder()
+        results = simulate(params, seed=arguments.seed, max_turns=arguments.max_turns, engine=arguments.engine,
+                           width=arguments.width, height=arguments.height, recorder=recorder)
+        recorder.save(arguments.record)
+    elif arguments.cache is not None:
+        # The cache module imports this module, so it is only imported when used
+        from result_cache import ResultCache, cached_simulate
+        results = cached_simulate(params, seed=arguments.seed, max_turns=arguments.max_turns, engine=arguments.engine,
+                                  width=arguments.width, height=arguments.height, cache=ResultCache(arguments.cache))
+    else:
+        results = simulate(params, seed=arguments.seed, max_turns=arguments.max_turns, engine=arguments.engine,
+                           width=arguments.width, height=arguments.height)
+    results["wall_time"] = time.perf_counter() - start_time
+
+    if arguments.json:
+        print(json.dumps(results))
+    else:
+        print("Turns: {}".format(results["turns"]))
+        for key in ("dead_count", "infected_count", "recovered_count", "vaccinated_count", "cured_count",
+                    "total_population"):
+            print("{}: {}".format(key, results[key]))
+
+    if arguments.save:
+        save_results(results)
+    if arguments.database is not None:
+        # The database module imports this module, so it is only imported when used
+        from results_database import ResultsDatabase
+        with ResultsDatabase(arguments.database) as database:
+            database.add_run(results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+from collections import Counter
+
+"""
+This module contains the statistics of a simulation. Every world has a SimulationStatistics object of its own, and
+its AI report their deaths, recoveries, infections, vaccinations and cures into it, so several simulations can run in
+the same process, one after another or at the same time, without their counts getting mixed.
+"""
+
+
+class SimulationStatistics():
+    """
+    The class SimulationStatistics counts the events of one simulation and the individual attributes of the AI that
+    have been added to the world.
+    """
+
+    def __init__(self):
+        self.dead_count = 0
+        self.recovered_count = 0
+        self.infected_count = 0
+        self.vaccinated_count = 0
+        self.cured_count = 0
+
+        self.gender_count = {"male": 0, "female": 0}
+        self.smoker_count = {"smoker": 0, "non-smoker": 0}
+        self.pre_existing_conditions_count = {"yes": 0, "no": 0}
+        self.lifestyle_count = {"active": 0, "sedentary": 0, "moderate": 0}
+
+    def add_AI(self, ai):
+        """
+        Counts the individual attributes of an AI that has been added to the world.
+        """
+        self.gender_count[ai.gender] += 1
+        self.smoker_count["smoker" if ai.smoker else "non-smoker"] += 1
+        self.pre_existing_conditions_count["yes" if ai.pre_existing_conditions else "no"] += 1
+        self.lifestyle_count[ai.lifestyle] += 1
+
+    def add_AIs(self, AIs):
+        """
+        Counts the individual attributes of several AI that have been added to the world at once.
+        """
+        for counts, values in ((self.gender_count, Counter(ai.gender for ai in AIs)),
+                               (self.smoker_count, Counter("smoker" if ai.smoker else "non-smoker" for ai in AIs)),
+                               (self.pre_existing_conditions_count,
+                                Counter("yes" if ai.pre_existing_conditions else "no" for ai in AIs)),
+                               (self.lifestyle_count, Counter(ai.lifestyle for ai in AIs))):
+            for value, count in values.items():
+                counts[value] += count
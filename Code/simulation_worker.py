@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+
+"""
+This module steps a world in a background thread, so that a slow turn does not freeze the GUI and a slow frame does
+not slow down the simulation. The worker publishes snapshots of the world (see snapshot.py), and the GUI draws the
+latest snapshot at its own pace. When the turns are faster than the frames of the GUI, a snapshot is published only
+once per publish interval, since the GUI would only draw the last of them anyway.
+
+The GUI runs the turns of a frame with run_turns too, when it steps the world with its own timer.
+"""
+
+# The share of a frame that may be spent on full turns at the speed "Max". The rest of the frame is left for drawing
+# and for the events of the window, which run in the same process even when the world is stepped in another thread.
+FRAME_BUDGET = 0.8
+
+
+def run_turns(world, turns, budget, turn_cost):
+    """
+    Runs the full turns of one frame: the given number of turns, or with turns None, turns until the next turn,
+    estimated from the measured cost of the earlier turns, would not fit in the budget. At least one turn is run if
+    some AI are sick or infected, and no turns if none are.
+
+    Parameter turns is the number of full turns to run, or None: int
+
+    Parameter budget is the time the turns may take in seconds, if turns is None: float
+
+    Parameter turn_cost is the measured time of a full turn in seconds, averaged over the last few turns: float
+
+    Returns the new measured time of a full turn: float
+    """
+    start_time = time.perf_counter()
+    turns_run = 0
+    while world.has_active_disease():
+        turn_start_time = time.perf_counter()
+        world.next_full_turn()
+        turns_run += 1
+        turn_cost = 0.8 * turn_cost + 0.2 * (time.perf_counter() - turn_start_time)
+        if turns is not None:
+            if turns_run >= turns:
+                break
+        elif time.perf_counter() - start_time + turn_cost > budget:
+            break
+    return turn_cost
+
+
+class SimulationWorker(threading.Thread):
+    """
+    The class SimulationWorker is a thread that runs full turns of a world until no AI is sick or infected any more,
+    or until it is stopped. Other threads must not change the world while the worker runs; they can ask the worker
+    to make a change between two turns with call_soon.
+
+    The worker runs turns_per_frame full turns every turn interval. With turns_per_frame None, it runs as many turns
+    as fit in FRAME_BUDGET of every publish interval, and waits for the rest of the interval, so that the GUI thread
+    gets time to draw however slow or fast the turns are.
+    """
+
+    def __init__(self, world, snapshots, buffer, turn_interval=0.1, publish_interval=0.04):
+        """
+        Parameter snapshots takes the snapshots of the world: SnapshotMaker
+
+        Parameter buffer is where the snapshots are published: SnapshotBuffer
+
+        Parameter turn_interval is the shortest time between the starts of two full turns in seconds, or 0 to run
+        the turns as fast as possible: float
+
+        Parameter publish_interval is the shortest time between two snapshots in seconds: float
+        """
+        super(SimulationWorker, self).__init__(daemon=True)
+        self.world = world
+        self.snapshots = snapshots
+        self.buffer = buffer
+        self.turn_interval = turn_interval
+        self.publish_interval = publish_interval
+        self.turns_per_frame = 1         # the speed, which can be changed while the worker runs, see GUI.SPEEDS
+        self.turn_cost = 0.0             # the measured time of a full turn in seconds
+        self.requests = queue.SimpleQueue()     # functions to call between two turns
+        self.stop_event = threading.Event()
+
+    def call_soon(self, function):
+        """
+        Calls the function in the worker thread before the next full turn, e.g. to kill an AI that was clicked.
+        """
+        self.requests.put(function)
+
+    def run_requests(self):
+        """
+        Calls the functions given to call_soon.
+        """
+        while True:
+            try:
+                function = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            function()
+
+    def run(self):
+        publish_time = None
+        while not self.stop_event.is_set():
+            start_time = time.perf_counter()
+            self.run_requests()
+            turns = self.turns_per_frame
+            if turns is None:
+                frame_time = self.publish_interval
+            else:
+                frame_time = self.turn_interval
+            self.turn_cost = run_turns(self.world, turns, FRAME_BUDGET * frame_time, self.turn_cost)
+            active = self.world.has_active_disease()
+            if not active or publish_time is None or start_time - publish_time >= self.publish_interval \
+                    or frame_time >= self.publish_interval:
+                self.buffer.publish(self.snapshots.take())
+                publish_time = start_time
+            if not active:
+                return
+            self.stop_event.wait(max(0.0, frame_time - (time.perf_counter() - start_time)))
+
+    def stop(self):
+        """
+        Stops the worker after the current turn and waits until it has stopped.
+        """
+        self.stop_event.set()
+        if self.is_alive():
+            self.join()
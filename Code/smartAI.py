@@ -1,8 +1,9 @@
 import math
 from direction import Direction
-from coordinates import Coordinates
 from AI_brain import AIbrain
-import random
+from geometry import NEIGHBOR_OFFSETS
+from state_index import UNVACCINATED_HEALTHY
+from random_streams import MOVE, TARGET
 
 """
 The SmartAI class is a subclass of AIbrain, representing a type of AI that navigates through the world while
@@ -14,9 +15,10 @@ healthy AI. The AI only moves randomly if it is the only healthy AI left in the
 """
 
 class SmartAI(AIbrain):
+    __slots__ = ("target_AI",)
+
     def __init__(self, body):
         super(SmartAI, self).__init__(body)
-        self.random = random.Random()
         self.target_AI = None
 
     def move_body(self):
@@ -44,44 +46,38 @@ class SmartAI(AIbrain):
         """
         Checks if the target AI is in the neighboring square of the current AI.
         """
+        world = self.body.world
         current_location = self.body.get_location()
         x, y = current_location.get_x(), current_location.get_y()
 
-        for x_offset in range(-1, 2):
-            for y_offset in range(-1, 2):
-                if x_offset == 0 and y_offset == 0:
-                    continue
-
-                neighbor_x = x + x_offset
-                neighbor_y = y + y_offset
-
-                if 0 <= neighbor_x < self.body.world.get_width() and 0 <= neighbor_y < self.body.world.get_height():
-                    neighbor_square = self.body.world.get_square(Coordinates(neighbor_x, neighbor_y))
-
-                    if neighbor_square.get_AI() == self.target_AI:
-                        return True
+        for x_offset, y_offset in NEIGHBOR_OFFSETS[1]:
+            # Squares outside the world are border walls, which never contain an AI
+            if world.get_AI_at(x + x_offset, y + y_offset) == self.target_AI:
+                return True
         return False
 
     def find_healthy_AI(self):
         """
         Finds a random healthy AI in the world that has not been vaccinated or infected.
         """
-        healthy_AI = [ai for ai in self.body.world.AI if not ai.is_sick() and not ai.is_vaccinated()
-                      and not ai.is_infected() and ai is not self.body]
-        if not healthy_AI:
-            return None
-        return self.random.choice(healthy_AI)
+        healthy_AI = self.body.world.get_AI_in_state(UNVACCINATED_HEALTHY)
+        return healthy_AI.choice(self.get_random(TARGET), exclude=self.body)
 
     def move_to_quarantine(self):
         """
-        Moves the AI to the corner of the world for quarantine.
+        Moves the AI to the corner of the world for quarantine. The AI follows the flow field of the world around
+        the walls, and only heads straight for the corner if the corner can not be reached or the world has no flow
+        field.
         """
         location = self.body.get_location()
 
         # Choose a corner for quarantine
-        quarantine_corner = Coordinates(0, 0)
+        quarantine_corner = self.body.world.get_coordinates(0, 0)
 
-        next_direction = self.determine_direction_to_quarantine(location, quarantine_corner)
+        flow_field = self.body.world.get_flow_field(quarantine_corner)
+        next_direction = flow_field.get_direction(location) if flow_field is not None else None
+        if next_direction is None:
+            next_direction = self.determine_direction_to_quarantine(location, quarantine_corner)
         if next_direction:
             self.body.move(next_direction)
             self.body.spin(next_direction)
@@ -100,7 +96,7 @@ class SmartAI(AIbrain):
         Selects a random direction.
         """
         directions = Direction.get_values()
-        return self.random.choice(directions)
+        return self.get_random(MOVE).choice(directions)
 
     def distance_to(self, other_AI):
         """
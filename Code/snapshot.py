@@ -0,0 +1,192 @@
+import threading
+from world import BORDER
+from direction import Direction
+try:
+    import numpy as np
+    from array_world import SICK, DEAD
+except ImportError:  # NumPy is not installed, so the snapshots have no arrays
+    np = None
+
+"""
+This module contains the snapshots that the GUI draws. A snapshot is an immutable copy of what has changed in a world
+since the previous snapshot: the location, facing and health state of the AI that have changed, and the squares that
+have become walls. The GUI keeps the records of all AI up to date from the snapshots it draws. It only reads
+snapshots, never the world itself, so the world can be stepped in another thread while the GUI draws, see
+simulation_worker.py.
+
+A snapshot is cheap to take, since the world keeps track of what has changed: the AI record themselves in the list
+of changed AI of their world when they move, turn or change health state, and the world records the squares where
+walls are built. A sick AI becomes stuck only when a wall is built next to it, so the records of the AI next to the
+new walls are computed again too. The cost of a snapshot therefore depends on the number of changes, not on the
+number of AI. For an ArrayWorld drawn by the batched renderer, the snapshot instead contains copies of the location
+and state arrays of the engine.
+"""
+
+# The code of stuck sick AI in the state array of a snapshot, in addition to the health state codes of array_world.py
+STUCK = 5
+
+
+def get_display_state(AI):
+    """
+    Returns the state in which the AI is drawn: its health state, or "stuck" if the AI is sick and there is a wall on
+    every side of it: str
+    """
+    state = AI.get_health_state()
+    if state == "sick" and AI.is_stuck():
+        return "stuck"
+    return state
+
+
+def get_record(AI):
+    """
+    Returns the location, facing and display state of an AI as a tuple (x, y, facing, state)
+    """
+    location = AI.get_location()
+    return location.get_x(), location.get_y(), AI.get_facing(), get_display_state(AI)
+
+
+def get_arrays(engine):
+    """
+    Copies the locations and states of the living AI of an ArrayEngine. Sick AI that are stuck get the state STUCK.
+
+    Returns the x coordinates, y coordinates and states as read-only arrays: tuple
+    """
+    state = engine.get_view("state")
+    x = engine.get_view("x")
+    alive = np.flatnonzero((state != DEAD) & (x >= 0))
+    x = x[alive]
+    y = engine.get_view("y")[alive]
+    states = state[alive]
+    walls = engine.padded_walls
+    padded_x = x + BORDER
+    padded_y = y + BORDER
+    stuck = (states == SICK) & walls[padded_x + 1, padded_y] & walls[padded_x - 1, padded_y] \
+        & walls[padded_x, padded_y + 1] & walls[padded_x, padded_y - 1]
+    states[stuck] = STUCK
+    for array in (x, y, states):
+        array.flags.writeable = False
+    return x, y, states
+
+
+class WorldSnapshot():
+    """
+    The class WorldSnapshot is the changes of a world up to a full turn, as drawn by the GUI. Snapshots are not
+    changed after they have been created, so they can be handed from one thread to another.
+    """
+
+    __slots__ = ("turn_count", "active", "records", "changed_AI", "changed_squares", "arrays")
+
+    def __init__(self, turn_count, active, records, changed_squares, arrays=None):
+        """
+        Parameter turn_count is the number of full turns of the world: int
+
+        Parameter active tells whether some AI are still sick or infected: bool
+
+        Parameter records maps the AI that have changed to their records (see get_record), or to None if they have
+        died. Snapshots that contain arrays have no records: dict
+
+        Parameter changed_squares is the (x, y) coordinates of the squares that have become walls: tuple
+
+        Parameter arrays is the arrays returned by get_arrays, or None
+        """
+        self.turn_count = turn_count
+        self.active = active
+        self.records = records
+        self.changed_AI = frozenset(records)
+        self.changed_squares = changed_squares
+        self.arrays = arrays
+
+    def merge(self, older):
+        """
+        Combines this snapshot with an older one that was never drawn, so that the changes of both are drawn.
+
+        Returns: WorldSnapshot
+        """
+        records = dict(older.records)
+        records.update(self.records)
+        return WorldSnapshot(self.turn_count, self.active, records, older.changed_squares + self.changed_squares,
+                             self.arrays)
+
+
+class SnapshotMaker():
+    """
+    The class SnapshotMaker takes the snapshots of a world. It makes the world keep track of its changes.
+    """
+
+    def __init__(self, world, arrays=False):
+        """
+        Parameter arrays tells whether the snapshots of an ArrayWorld contain the arrays of the engine instead of
+        the records of the AI: bool
+        """
+        world.track_changes = True
+        self.world = world
+        self.started = False    # flag, set when the first snapshot has been taken
+        self.arrays = arrays and np is not None and hasattr(world, "engine")
+
+    def take(self):
+        """
+        Takes a snapshot of the changes of the world since the previous snapshot. The first snapshot contains every
+        AI as changed.
+
+        Returns: WorldSnapshot
+        """
+        world = self.world
+        changed_AI = world.changed_AI
+        changed_squares = tuple(world.changed_squares)
+        world.changed_AI = []
+        world.changed_squares = []
+        for AI in changed_AI:
+            AI.graphics_changed = False
+        if not self.started:
+            self.started = True
+            changed_AI = list(world.AI)
+
+        if self.arrays:
+            return WorldSnapshot(world.turn_count, world.has_active_disease(), {}, changed_squares,
+                                 get_arrays(world.engine))
+
+        # Whether a sick AI is stuck depends on the walls around it, so the sick AI next to the new walls have changed
+        changed_AI = set(changed_AI)
+        for x, y in changed_squares:
+            for x_step, y_step in Direction.get_values():
+                AI = world.get_AI_at(x + x_step, y + y_step)
+                if AI is not None and AI.is_sick():
+                    changed_AI.add(AI)
+        records = {}
+        for AI in changed_AI:
+            if AI.is_dead() or AI.get_location() is None:
+                records[AI] = None
+            else:
+                records[AI] = get_record(AI)
+        return WorldSnapshot(world.turn_count, world.has_active_disease(), records, changed_squares)
+
+
+class SnapshotBuffer():
+    """
+    The class SnapshotBuffer hands the latest snapshot from the thread that steps the world to the GUI. If the GUI
+    has not taken the previous snapshot when a new one is published, the two are merged, so no change is lost.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def publish(self, snapshot):
+        """
+        Makes the snapshot the latest one.
+        """
+        with self.lock:
+            if self.snapshot is not None:
+                snapshot = snapshot.merge(self.snapshot)
+            self.snapshot = snapshot
+
+    def take(self):
+        """
+        Takes the latest snapshot out of the buffer.
+
+        Returns the snapshot, or None if no snapshot has been published since the last call: WorldSnapshot
+        """
+        with self.lock:
+            snapshot = self.snapshot
+            self.snapshot = None
+        return snapshot
@@ -0,0 +1,162 @@
+from world import World
+from square import WALL
+from spatial_index import SparseSpatialIndex
+from geometry import SparseCoordinateTable
+
+"""
+This module contains a world backend for huge worlds with few AI, e.g. a region of 10000 x 10000 squares with 50000
+inhabitants. A World stores one Square object per square, so its memory and construction time grow with the area of
+the world. A SparseWorld only stores the squares that contain something: the AI in a dictionary and the walls in a
+set, both keyed by the packed coordinates x * height + y of the square. Every other square of the world is empty.
+
+The squares are returned as SparseSquare views with the same methods as Square, so the AI, the brains and the rest
+of the simulation use a SparseWorld like any other World.
+"""
+
+
+class SparseSquare():
+    """
+    The class SparseSquare is a view to one square of a SparseWorld. It has the same methods as Square, but its
+    state is stored in the dictionary of AI and the set of walls of the world.
+    """
+
+    __slots__ = ("world", "key")
+
+    def __init__(self, world, key):
+        self.world = world
+        self.key = key
+
+    @property
+    def is_wall(self):
+        return self.key in self.world.walls
+
+    @property
+    def AI(self):
+        return self.get_AI()
+
+    def get_AI(self):
+        """
+        Returns the AI in the square or None if there is no AI in the square
+        """
+        return self.world.occupants.get(self.key)
+
+    def is_wall_square(self):
+        """
+        Returns a boolean value stating whether there is a wall in the square or not
+        """
+        return self.key in self.world.walls
+
+    def is_empty(self):
+        """
+        Returns a boolean value stating whether the square is empty (A square is empty if it does not contain a wall or an AI) or not
+        """
+        return self.key not in self.world.occupants and self.key not in self.world.walls
+
+    def set_AI(self, AI):
+        """
+        Marks the square as containing an AI, if possible.
+
+        Returns a boolean value indicating if the operation succeeded
+        """
+        if self.is_empty():
+            self.world.occupants[self.key] = AI
+            return True
+        else:
+            return False
+
+    def remove_AI(self):
+        """
+        Removes the AI in this square.
+
+        Returns the AI removed from the square or None, if there was no AI
+        """
+        return self.world.occupants.pop(self.key, None)
+
+    def set_wall(self):
+        """
+        Sets a wall in this square, if possible.
+
+        Returns a boolean value indicating if the operation succeeded
+        """
+        if self.is_empty():
+            self.world.walls.add(self.key)
+            return True
+        else:
+            return False
+
+
+class SparseWorld(World):
+    """
+    The class SparseWorld is a World that only stores its AI and walls, so its memory and construction time grow with
+    the number of AI and walls instead of the area of the world. The coordinate table and the spatial index of the
+    world are sparse too, see SparseCoordinateTable and SparseSpatialIndex.
+
+    A flow field would need a distance for every square of the world, so a SparseWorld has none: sick SmartAI head
+    straight for the quarantine corner.
+    """
+
+    def __init__(self, width, height, seed=None):
+        """
+        Creates a new world with the specified dimensions.
+        Initially all the squares of the new world are empty.
+
+        Parameter seed is the seed of the random streams of the world, or None to take one from the random module
+        """
+        self.width = width
+        self.height = height
+        self.occupants = {}                 # maps the key of every square that contains an AI to the AI
+        self.walls = set()                  # the keys of the squares that contain a wall
+        self.init_state(SparseCoordinateTable(width, height), SparseSpatialIndex(width, height), seed)
+
+    def get_flow_field(self, target):
+        """
+        Returns None, since a SparseWorld has no flow fields.
+        """
+        return None
+
+    def get_wall_squares(self):
+        """
+        Returns the coordinates (x, y) of the squares of the world that are walls: list of tuples
+        """
+        return [divmod(key, self.height) for key in self.walls]
+
+    def get_square(self, coordinates):
+        """
+        Returns a view to the square that is located at the given location. If the given coordinates point outside of
+        the world, this method returns the shared wall square
+        """
+        return self.get_square_at(coordinates.get_x(), coordinates.get_y())
+
+    def get_square_at(self, x, y):
+        """
+        Returns a view to the square (x, y), or the shared wall square if the coordinates are outside the world
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return SparseSquare(self, x * self.height + y)
+        else:
+            return WALL
+
+    def get_AI_at(self, x, y):
+        """
+        Returns the AI in the square (x, y) or None if there is no AI in the square
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.occupants.get(x * self.height + y)
+        return None
+
+    def is_empty_at(self, x, y):
+        """
+        Returns a boolean value stating whether the square (x, y) is empty
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            key = x * self.height + y
+            return key not in self.occupants and key not in self.walls
+        return False
+
+    def is_wall_at(self, x, y):
+        """
+        Returns a boolean value stating whether there is a wall in the square (x, y)
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x * self.height + y in self.walls
+        return True
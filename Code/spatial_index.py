@@ -0,0 +1,265 @@
+"""
+This module contains the spatial index that the world uses to find the closest AI that matches a condition, e.g. the
+closest sick AI for a doctor. The world is divided into square buckets, and a query only looks at the buckets around
+the given location, ring by ring, until no unvisited bucket can contain a closer AI.
+"""
+
+class SpatialIndex():
+    """
+    The class SpatialIndex keeps the AI of a world in a uniform grid of buckets of bucket_size x bucket_size squares.
+    The world updates the index whenever an AI is added to it, moves or dies.
+
+    Distances are Manhattan distances, like in the distance_to methods of the brains. When several AI are equally
+    close, the one that was added to the index first is returned, which is the same AI that min() over the AI list
+    of the world returns.
+    """
+
+    def __init__(self, width, height, bucket_size=8):
+        """
+        Creates an empty index for a world of the given dimensions.
+
+        Parameter bucket_size is the width and height of a bucket in squares: int
+        """
+        self.bucket_size = bucket_size
+        self.bucket_width = (width + bucket_size - 1) // bucket_size
+        self.bucket_height = (height + bucket_size - 1) // bucket_size
+        # buckets[bx][by] maps each AI in the bucket to the order in which it was added to the index
+        self.buckets = [[{} for by in range(self.bucket_height)] for bx in range(self.bucket_width)]
+        self.added = 0
+
+    def get_bucket(self, location):
+        """
+        Returns the bucket that contains the given location: dict
+        """
+        return self.buckets[location.get_x() // self.bucket_size][location.get_y() // self.bucket_size]
+
+    def add(self, ai, location):
+        """
+        Adds an AI to the bucket of the given location.
+        """
+        self.get_bucket(location)[ai] = self.added
+        self.added += 1
+
+    def add_all(self, AIs, locations):
+        """
+        Adds several AI to the buckets of their locations at once, in the same order as add would.
+
+        Parameter AIs is the AI to add: list
+
+        Parameter locations is the locations of the AI: list
+        """
+        get_bucket = self.get_bucket
+        for order, (ai, location) in enumerate(zip(AIs, locations), self.added):
+            get_bucket(location)[ai] = order
+        self.added += len(AIs)
+
+    def remove(self, ai, location):
+        """
+        Removes an AI from the bucket of the given location. Does nothing if the AI is not there.
+        """
+        self.get_bucket(location).pop(ai, None)
+
+    def move(self, ai, old_location, new_location):
+        """
+        Moves an AI from the bucket of the old location to the bucket of the new location, keeping its order.
+        """
+        old_bucket = self.get_bucket(old_location)
+        new_bucket = self.get_bucket(new_location)
+        if old_bucket is not new_bucket and ai in old_bucket:
+            new_bucket[ai] = old_bucket.pop(ai)
+
+    def get_distance_to_bucket(self, x, y, bx, by):
+        """
+        Returns the smallest Manhattan distance from the square (x, y) to any square of the bucket (bx, by)
+        """
+        left = bx * self.bucket_size
+        top = by * self.bucket_size
+        dx = max(0, left - x, x - (left + self.bucket_size - 1))
+        dy = max(0, top - y, y - (top + self.bucket_size - 1))
+        return dx + dy
+
+    def find_nearest(self, location, predicate=None, exclude=None):
+        """
+        Finds the closest AI to the given location for which the predicate is true.
+
+        Parameter location is the location the distances are measured from: Coordinates
+
+        Parameter predicate is a function that is given an AI and returns whether it matches, or None to match any AI
+
+        Parameter exclude is an AI that is never returned, usually the AI that makes the query
+
+        Returns the closest matching AI or None if no AI matches
+        """
+        x = location.get_x()
+        y = location.get_y()
+        center_x = x // self.bucket_size
+        center_y = y // self.bucket_size
+        max_ring = self.bucket_width + self.bucket_height
+
+        best = None
+        best_key = None
+        for ring in range(max_ring + 1):
+            # Every bucket on this ring is at least this far away, so closer AI can not be found anymore
+            ring_distance = max(0, (ring - 2) * self.bucket_size + min(ring, 2))
+            if best_key is not None and ring_distance > best_key[0]:
+                break
+            for bx, by in self.get_ring(center_x, center_y, ring):
+                if best_key is not None and self.get_distance_to_bucket(x, y, bx, by) > best_key[0]:
+                    continue
+                best, best_key = self.search_bucket(self.buckets[bx][by], x, y, predicate, exclude, best, best_key)
+        return best
+
+    def search_bucket(self, bucket, x, y, predicate, exclude, best, best_key):
+        """
+        Looks for a matching AI in a bucket that is closer to the square (x, y) than the best AI found so far. AI
+        are compared by their distance and then by the order in which they were added.
+
+        Parameter best_key is the (distance, order) of the best AI found so far, or None: tuple
+
+        Returns the best AI and its key after the bucket has been searched: tuple
+        """
+        for ai, order in bucket.items():
+            if ai is exclude:
+                continue
+            ai_location = ai.get_location()
+            key = (abs(ai_location.get_x() - x) + abs(ai_location.get_y() - y), order)
+            if best_key is not None and key >= best_key:
+                continue
+            if predicate is None or predicate(ai):
+                best = ai
+                best_key = key
+        return best, best_key
+
+    def get_ring(self, center_x, center_y, ring):
+        """
+        Returns the buckets whose Manhattan distance in buckets from the bucket (center_x, center_y) is exactly ring,
+        leaving out buckets outside the world: list of tuples
+        """
+        if ring == 0:
+            return [(center_x, center_y)]
+        ring_buckets = []
+        for offset_x in range(-ring, ring + 1):
+            bx = center_x + offset_x
+            if not 0 <= bx < self.bucket_width:
+                continue
+            offset_y = ring - abs(offset_x)
+            for by in ((center_y,) if offset_y == 0 else (center_y - offset_y, center_y + offset_y)):
+                if 0 <= by < self.bucket_height:
+                    ring_buckets.append((bx, by))
+        return ring_buckets
+
+
+class SparseSpatialIndex(SpatialIndex):
+    """
+    The class SparseSpatialIndex is a SpatialIndex that only stores the buckets that contain AI, in a dictionary
+    keyed by the packed bucket coordinates bx * bucket_height + by, so its memory does not depend on the area of the
+    world. It is used by SparseWorld.
+
+    In a large world with few AI, the closest matching AI may be many rings of empty buckets away. When the rings
+    searched so far contain more buckets than the index stores, the rest of the stored buckets are searched directly
+    instead.
+    """
+
+    def __init__(self, width, height, bucket_size=32):
+        """
+        Creates an empty index for a world of the given dimensions.
+
+        Parameter bucket_size is the width and height of a bucket in squares: int
+        """
+        self.bucket_size = bucket_size
+        self.bucket_width = (width + bucket_size - 1) // bucket_size
+        self.bucket_height = (height + bucket_size - 1) // bucket_size
+        self.buckets = {}   # maps the key of each non-empty bucket to the AI in it and the order they were added in
+        self.added = 0
+
+    def get_key(self, location):
+        """
+        Returns the key of the bucket that contains the given location: int
+        """
+        return location.get_x() // self.bucket_size * self.bucket_height + location.get_y() // self.bucket_size
+
+    def get_bucket(self, location):
+        """
+        Returns the bucket that contains the given location, creating it if it does not exist yet: dict
+        """
+        key = self.get_key(location)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+        return bucket
+
+    def remove(self, ai, location):
+        """
+        Removes an AI from the bucket of the given location, and the bucket if it becomes empty. Does nothing if the
+        AI is not there.
+        """
+        key = self.get_key(location)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.pop(ai, None)
+            if not bucket:
+                del self.buckets[key]
+
+    def move(self, ai, old_location, new_location):
+        """
+        Moves an AI from the bucket of the old location to the bucket of the new location, keeping its order.
+        """
+        old_key = self.get_key(old_location)
+        if old_key == self.get_key(new_location):
+            return
+        old_bucket = self.buckets.get(old_key)
+        if old_bucket is not None and ai in old_bucket:
+            order = old_bucket.pop(ai)
+            if not old_bucket:
+                del self.buckets[old_key]
+            self.get_bucket(new_location)[ai] = order
+
+    def find_nearest(self, location, predicate=None, exclude=None):
+        """
+        Finds the closest AI to the given location for which the predicate is true, like SpatialIndex.find_nearest.
+
+        Returns the closest matching AI or None if no AI matches
+        """
+        x = location.get_x()
+        y = location.get_y()
+        center_x = x // self.bucket_size
+        center_y = y // self.bucket_size
+        max_ring = self.bucket_width + self.bucket_height
+
+        best = None
+        best_key = None
+        searched = 0
+        for ring in range(max_ring + 1):
+            ring_distance = max(0, (ring - 2) * self.bucket_size + min(ring, 2))
+            if best_key is not None and ring_distance > best_key[0]:
+                break
+            ring_buckets = self.get_ring(center_x, center_y, ring)
+            searched += len(ring_buckets)
+            if searched > len(self.buckets):
+                return self.search_outside(x, y, ring, predicate, exclude, best, best_key)
+            for bx, by in ring_buckets:
+                bucket = self.buckets.get(bx * self.bucket_height + by)
+                if bucket is None:
+                    continue
+                if best_key is not None and self.get_distance_to_bucket(x, y, bx, by) > best_key[0]:
+                    continue
+                best, best_key = self.search_bucket(bucket, x, y, predicate, exclude, best, best_key)
+        return best
+
+    def search_outside(self, x, y, ring, predicate, exclude, best, best_key):
+        """
+        Searches the stored buckets that are at least ring buckets away from the bucket of the square (x, y), which
+        have not been searched by find_nearest yet.
+
+        Returns the closest matching AI or None if no AI matches
+        """
+        center_x = x // self.bucket_size
+        center_y = y // self.bucket_size
+        for key, bucket in self.buckets.items():
+            bx, by = divmod(key, self.bucket_height)
+            if abs(bx - center_x) + abs(by - center_y) < ring:
+                continue
+            if best_key is not None and self.get_distance_to_bucket(x, y, bx, by) > best_key[0]:
+                continue
+            best, best_key = self.search_bucket(bucket, x, y, predicate, exclude, best, best_key)
+        return best
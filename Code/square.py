@@ -4,6 +4,8 @@ class Square():
     A square can contain either a wall or an AI or it can be empty.
     """
 
+    __slots__ = ("AI", "is_wall")
+
     def __init__(self, is_wall=False):
         """
         Creates a new square. Initially there is nothing in the square.
@@ -72,3 +74,31 @@ class Square():
             return True
         else:
             return False
+
+
+class BorderSquare(Square):
+    """
+    The class BorderSquare represents the walls around the world. A single instance, WALL, is shared by all squares
+    of the border and by any coordinates further out. It can never contain an AI and it can not be changed.
+    """
+
+    __slots__ = ()
+
+    def __init__(self):
+        super(BorderSquare, self).__init__(True)
+
+
+    def set_AI(self, AI):
+        return False
+
+
+    def remove_AI(self):
+        return None
+
+
+    def set_wall(self):
+        return False
+
+
+# The shared wall square outside the world
+WALL = BorderSquare()
@@ -0,0 +1,159 @@
+"""
+This module contains the index that the world keeps of the health states and roles of its AI. The AI report every
+change of their health state to the index of their world, so that questions such as "is anyone still sick" or "which
+AI could still be vaccinated" can be answered without going through the whole AI list.
+"""
+
+# The mutually exclusive health states of an AI, see AI.get_health_state
+HEALTH_STATES = ("susceptible", "infected", "sick", "recovered", "dead")
+
+# The roles of the AI, see AI.get_role
+ROLES = ("smart", "avoiding", "doctor", "vaccinator", "builder")
+
+# Healthy (susceptible or recovered) AI that have not been vaccinated. These are the AI that SmartAI looks for and
+# that Vaccinators vaccinate.
+UNVACCINATED_HEALTHY = "unvaccinated_healthy"
+VACCINATED = "vaccinated"
+
+
+class AgentSet():
+    """
+    The class AgentSet is a set of AI that supports adding, removing and membership tests in constant time, and
+    also picking a random member in constant time. The AI are kept in a list, and a removed AI is replaced by the
+    last AI of the list.
+    """
+
+    def __init__(self):
+        self.agents = []       # container
+        self.positions = {}    # maps each AI to its index in agents
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __iter__(self):
+        return iter(self.agents)
+
+    def __contains__(self, ai):
+        return ai in self.positions
+
+    def add(self, ai):
+        """
+        Adds the AI to the set, if it is not already in it.
+        """
+        if ai not in self.positions:
+            self.positions[ai] = len(self.agents)
+            self.agents.append(ai)
+
+    def update(self, AIs):
+        """
+        Adds several AI to the set at once, in the given order, leaving out those already in it.
+        """
+        new_AIs = [ai for ai in dict.fromkeys(AIs) if ai not in self.positions]
+        self.positions.update(zip(new_AIs, range(len(self.agents), len(self.agents) + len(new_AIs))))
+        self.agents.extend(new_AIs)
+
+    def discard(self, ai):
+        """
+        Removes the AI from the set, if it is in it.
+        """
+        position = self.positions.pop(ai, None)
+        if position is not None:
+            last = self.agents.pop()
+            if last is not ai:
+                self.agents[position] = last
+                self.positions[last] = position
+
+    def choice(self, rng, exclude=None):
+        """
+        Returns a random AI of the set, or None if the set is empty.
+
+        Parameter rng is the random number generator to use, e.g. a RandomStream or random.Random
+
+        Parameter exclude is an AI that is never returned
+        """
+        excluded_position = self.positions.get(exclude) if exclude is not None else None
+        count = len(self.agents) - (excluded_position is not None)
+        if count <= 0:
+            return None
+        index = rng.randrange(count)
+        if excluded_position is not None and index >= excluded_position:
+            index += 1
+        return self.agents[index]
+
+
+class StateIndex():
+    """
+    The class StateIndex keeps one AgentSet per health state, one per role, one of vaccinated AI and one of healthy
+    AI that have not been vaccinated. The world adds its AI to the index and the AI report their state changes to it.
+    """
+
+    def __init__(self):
+        self.sets = {}
+        for name in HEALTH_STATES + ROLES + (VACCINATED, UNVACCINATED_HEALTHY):
+            self.sets[name] = AgentSet()
+
+    def get(self, name):
+        """
+        Returns the AI in the given health state or role, or in one of the sets VACCINATED and UNVACCINATED_HEALTHY
+
+        Returns: AgentSet
+        """
+        return self.sets[name]
+
+    def count(self, name):
+        """
+        Returns the number of AI in the given set: int
+        """
+        return len(self.sets[name])
+
+    def add(self, ai):
+        """
+        Adds an AI to the sets of its current health state, role and vaccination.
+        """
+        self.sets[ai.get_health_state()].add(ai)
+        self.sets[ai.get_role()].add(ai)
+        if ai.is_vaccinated():
+            self.sets[VACCINATED].add(ai)
+        self.update_unvaccinated_healthy(ai)
+
+    def add_all(self, AIs):
+        """
+        Adds several AI to the sets of their health states, roles and vaccination at once. Each set is updated once,
+        and the AI end up in the same order as if they were added one by one.
+        """
+        members = {name: [] for name in self.sets}
+        for ai in AIs:
+            members[ai.get_health_state()].append(ai)
+            members[ai.get_role()].append(ai)
+            if ai.is_vaccinated():
+                members[VACCINATED].append(ai)
+            elif ai.is_susceptible() or ai.is_recovered():
+                members[UNVACCINATED_HEALTHY].append(ai)
+        for name, AIs_in_set in members.items():
+            if AIs_in_set:
+                self.sets[name].update(AIs_in_set)
+
+    def change_state(self, ai, old_state, new_state):
+        """
+        Moves an AI from the set of its old health state to the set of its new health state.
+        """
+        if old_state != new_state:
+            self.sets[old_state].discard(ai)
+            self.sets[new_state].add(ai)
+            self.update_unvaccinated_healthy(ai)
+
+    def vaccinate(self, ai):
+        """
+        Records that an AI has been vaccinated.
+        """
+        self.sets[VACCINATED].add(ai)
+        self.update_unvaccinated_healthy(ai)
+
+    def update_unvaccinated_healthy(self, ai):
+        """
+        Adds the AI to, or removes it from, the set of healthy AI that have not been vaccinated.
+        """
+        if (ai.is_susceptible() or ai.is_recovered()) and not ai.is_vaccinated():
+            self.sets[UNVACCINATED_HEALTHY].add(ai)
+        else:
+            self.sets[UNVACCINATED_HEALTHY].discard(ai)
@@ -0,0 +1,236 @@
+import sys
+import os
+import argparse
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import simulate, parameters_to_dict, PARAMETER_NAMES, DEFAULT_PARAMETERS, ENGINES, WORLD_WIDTH, \
+    WORLD_HEIGHT
+from result_cache import ResultCache, cached_simulate
+from results_database import ResultsDatabase
+
+"""
+This module runs parameter sweeps of the disease simulation. A sweep takes a grid of input values, e.g. several
+infection chances and several numbers of doctors, and runs every combination a given number of times. The runs are
+spread over a ProcessPoolExecutor in chunks, and the results are yielded one by one as soon as they are finished.
+
+The module can also be used from the command line, for example:
+    python sweep.py --vary infection-chance=10,50,90 --vary doctors=0,2 --replicates 100 --seed 1
+"""
+
+# The largest number of runs that are sent to a worker process at once
+MAX_CHUNK_SIZE = 32
+
+# The number of runs that are added to a results database in one transaction
+DATABASE_BATCH_SIZE = 100
+
+
+def expand_grid(grid):
+    """
+    Creates the simulation input values of every combination of the values in the grid.
+
+    Parameter grid maps parameter names of PARAMETER_NAMES to lists of values. Parameters that are not in the grid
+    get their values from DEFAULT_PARAMETERS: dict
+
+    Returns the input values of each combination: list of dicts
+    """
+    names = [name for name in PARAMETER_NAMES if name in grid]
+    unknown = set(grid) - set(names)
+    if unknown:
+        raise ValueError("Unknown simulation parameters: " + ", ".join(sorted(unknown)))
+    return [parameters_to_dict(dict(zip(names, values)))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+def create_tasks(grid, replicates, seed):
+    """
+    Creates one task per run of the sweep. Each run gets its own seed, seed + the index of the run, so that every
+    run of the sweep can be repeated on its own.
+
+    Returns the tasks as (scenario, replicate, input values, seed) tuples: list
+    """
+    tasks = []
+    for scenario, values in enumerate(expand_grid(grid)):
+        for replicate in range(replicates):
+            tasks.append((scenario, replicate, values, seed + len(tasks)))
+    return tasks
+
+
+def get_worker_count(workers=None):
+    """
+    Returns the number of worker processes to use: the given number, or else the number of processors this process
+    is allowed to run on: int
+    """
+    if workers is not None:
+        return max(1, workers)
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def get_chunk_size(number_of_tasks, workers):
+    """
+    Chooses how many runs are sent to a worker at once. Every worker gets about four chunks, so that the workers
+    stay busy until the end even if some runs take longer than others, but at most MAX_CHUNK_SIZE runs, so that
+    results keep streaming back: int
+    """
+    return max(1, min(MAX_CHUNK_SIZE, number_of_tasks // (workers * 4)))
+
+
+def run_task(task, max_turns, engine, include_history, cache=None, width=WORLD_WIDTH, height=WORLD_HEIGHT):
+    """
+    Runs one simulation of the sweep.
+
+    Parameter task is a tuple returned by create_tasks
+
+    Parameter width and height are the dimensions of the world in squares: int
+
+    Parameter cache is the cache of simulation results to use, or None to always run the simulation: ResultCache
+
+    Returns the results of simulate with the scenario, replicate and wall time of the run added: dict
+    """
+    scenario, replicate, values, seed = task
+    start_time = time.perf_counter()
+    if cache is not None:
+        results = cached_simulate(values, seed=seed, max_turns=max_turns, engine=engine, width=width, height=height,
+                                  cache=cache)
+    else:
+        results = simulate(values, seed=seed, max_turns=max_turns, engine=engine, width=width, height=height)
+    results["wall_time"] = time.perf_counter() - start_time
+    if not include_history:
+        del results["history"]
+    results["scenario"] = scenario
+    results["replicate"] = replicate
+    return results
+
+
+def run_chunk(tasks, max_turns, engine, include_history, cache_directory=None, width=WORLD_WIDTH,
+              height=WORLD_HEIGHT):
+    """
+    Runs a chunk of tasks in a worker process.
+
+    Parameter cache_directory is the directory of the result cache, or None to not use a cache: str
+
+    Returns the results of the tasks: list
+    """
+    cache = ResultCache(cache_directory) if cache_directory is not None else None
+    return [run_task(task, max_turns, engine, include_history, cache, width, height) for task in tasks]
+
+
+def sweep(grid, replicates=1, seed=None, workers=None, chunk_size=None, max_turns=10000, engine="objects",
+          include_history=False, cache_directory=None, width=WORLD_WIDTH, height=WORLD_HEIGHT):
+    """
+    Runs every combination of the values in the grid replicates times, in parallel worker processes.
+
+    Parameter grid maps parameter names to lists of values, see expand_grid: dict
+
+    Parameter replicates is the number of runs of each combination: int
+
+    Parameter seed is the seed of the first run, or None to choose one at random: int
+
+    Parameter workers is the number of worker processes, or None to use all processors. With 1 worker the runs are
+    done in this process: int
+
+    Parameter chunk_size is the number of runs sent to a worker at once, or None to choose it automatically: int
+
+    Parameter include_history tells whether the health state counts of every turn are included in the results: bool
+
+    Parameter cache_directory is the directory of the result cache (see result_cache.py), or None to run every
+    simulation: str
+
+    Parameter width and height are the dimensions of the world of every run in squares: int
+
+    Yields the results of each run as soon as it is finished, in no particular order: dict
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    tasks = create_tasks(grid, replicates, seed)
+    workers = min(get_worker_count(workers), max(1, len(tasks)))
+    if chunk_size is None:
+        chunk_size = get_chunk_size(len(tasks), workers)
+
+    if workers == 1:
+        cache = ResultCache(cache_directory) if cache_directory is not None else None
+        for task in tasks:
+            yield run_task(task, max_turns, engine, include_history, cache, width, height)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_chunk, tasks[start:start + chunk_size], max_turns, engine, include_history,
+                                   cache_directory, width, height)
+                   for start in range(0, len(tasks), chunk_size)]
+        for future in as_completed(futures):
+            for results in future.result():
+                yield results
+
+
+def parse_variation(text):
+    """
+    Parses a --vary argument of the form name=value1,value2,...
+
+    Returns the parameter name and its values: tuple
+    """
+    option, _, values = text.partition("=")
+    name = option.replace("-", "_")
+    if name not in PARAMETER_NAMES:
+        name = "num_" + name
+    if name not in PARAMETER_NAMES or not values:
+        raise argparse.ArgumentTypeError("expected name=value1,value2,... with a simulation parameter name")
+    return name, [int(value) for value in values.split(",")]
+
+
+def parse_arguments(argv=None):
+    """
+    Parses the command line arguments of the sweep runner.
+    """
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of the disease simulation.")
+    parser.add_argument("--vary", type=parse_variation, action="append", default=[],
+                        help="values of a parameter, e.g. infection-chance=10,50,90 (can be given several times)")
+    for name in PARAMETER_NAMES:
+        option = "--" + name.replace("num_", "").replace("_", "-")
+        parser.add_argument(option, dest=name, type=int, default=DEFAULT_PARAMETERS[name])
+    parser.add_argument("--replicates", type=int, default=1, help="number of runs of each combination")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first run")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=None, help="number of runs sent to a worker at once")
+    parser.add_argument("--max-turns", type=int, default=10000, help="maximum number of full turns of a run")
+    parser.add_argument("--engine", choices=ENGINES, default="objects", help="world backend")
+    parser.add_argument("--width", type=int, default=WORLD_WIDTH, help="width of the world in squares")
+    parser.add_argument("--height", type=int, default=WORLD_HEIGHT, help="height of the world in squares")
+    parser.add_argument("--history", action="store_true", help="include the health state counts of every turn")
+    parser.add_argument("--cache", metavar="DIRECTORY", default=None,
+                        help="read finished runs from, and store new runs in, the given cache directory")
+    parser.add_argument("--database", metavar="FILE", default=None,
+                        help="add the results to the given SQLite database instead of printing them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    grid = {name: [getattr(arguments, name)] for name in PARAMETER_NAMES}
+    grid.update(dict(arguments.vary))
+    runs = sweep(grid, arguments.replicates, seed=arguments.seed, workers=arguments.workers,
+                 chunk_size=arguments.chunk_size, max_turns=arguments.max_turns, engine=arguments.engine,
+                 include_history=arguments.history, cache_directory=arguments.cache, width=arguments.width,
+                 height=arguments.height)
+    if arguments.database is not None:
+        # The finished runs are added to the database in batches, each batch in one transaction
+        with ResultsDatabase(arguments.database) as database:
+            batch = []
+            for results in runs:
+                batch.append(results)
+                if len(batch) == DATABASE_BATCH_SIZE:
+                    database.add_runs(batch)
+                    batch = []
+            if batch:
+                database.add_runs(batch)
+    else:
+        # Every finished run is printed as one line of JSON
+        for results in runs:
+            print(json.dumps(results), flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
 import unittest
 from unittest import mock
 import random
-from world import World
+import os
+import time
+import tempfile
+from world import World, BORDER
 from direction import Direction
 from AI import AI
 from coordinates import Coordinates
@@ -11,6 +14,33 @@ from smartAI import SmartAI
 from avoidingAI import AvoidingAI
 from data_storage import SimulationDataStorage
 from builder import Builder
+from geometry import CoordinateTable, NEIGHBOR_OFFSETS
+from flow_field import FlowField, UNREACHABLE
+from random_streams import RandomStreams, MOVE, DEATH
+from square import WALL
+from memory_report import get_memory_report
+from sparse_world import SparseWorld
+from placement import sample_empty_squares, add_AIs_at_random_locations
+from simulation import simulate, build_world, count_health_states
+from sweep import sweep, expand_grid, get_chunk_size
+from result_cache import ResultCache, cached_simulate, get_cache_key
+from results_database import ResultsDatabase
+from simulation_worker import SimulationWorker, run_turns
+try:
+    import array_world
+    import recorder
+except ImportError:  # NumPy is not installed
+    array_world = None
+    recorder = None
+try:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")   # the GUI tests do not need a display
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QImage, QPainter
+    from PyQt6.QtCore import QRectF
+    from AI_graphics_item import SICK_COLOR, SUSCEPTIBLE_COLOR, INFECTED_COLOR, RECOVERED_COLOR
+    from GUI import GUI, WALL_COLOR, FLOOR_COLOR
+except ImportError:  # PyQt6 is not installed
+    GUI = None
 
 """
 The classes in this file handles the testing of the disease simulation
@@ -148,6 +178,31 @@ class TestDataStorage(unittest.TestCase):
         }
         mock_write_simulation_data.assert_called_once_with(expected_simulation_data)
 
+    def test_last_turn(self):
+        simulation_data = {
+            "dead_count": 2, "infected_count": 3, "recovered_count": 4, "vaccinated_count": 5, "cured_count": 6,
+            "total_population": 100,
+            "rates": {"mortality_rate": 0.02, "infection_rate": 0.03, "recovery_rate": 0.04,
+                      "vaccination_rate": 0.05, "cured_rate": 0.06},
+            "gender_count": {"male": 50, "female": 50}, "smoker_count": {"smoker": 20, "non-smoker": 80},
+            "pre_existing_conditions_count": {"yes": 30, "no": 70},
+            "lifestyle_count": {"active": 40, "sedentary": 30, "moderate": 30}
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "simulation_data.csv")
+            self.assertEqual(SimulationDataStorage.get_last_turn(file_name), 0)
+            storage = SimulationDataStorage()
+            for turn in range(1, 40):
+                storage.write_simulation_data(dict(simulation_data, turn=turn), file_name)
+            with open(file_name) as file:
+                lines = file.readlines()
+            self.assertEqual(len(lines), 40)
+            self.assertEqual(lines[0].split(",")[0], "Turn")
+            self.assertEqual(SimulationDataStorage.get_last_turn(file_name), 39)
+            # Blocks smaller than a row make the last row span several blocks
+            with mock.patch('data_storage.TAIL_BLOCK_SIZE', 7):
+                self.assertEqual(SimulationDataStorage.get_last_turn(file_name), 39)
+
 class TestDoctors(unittest.TestCase):
     """
     This class tests the functions in the class Doctor
@@ -271,6 +326,49 @@ class TestSmartAI(unittest.TestCase):
         result = self.smart_ai.is_target_AI_in_neighboring_square()
         self.assertTrue(result)
 
+    def test_move_to_quarantine_around_wall(self):
+        # A wall on row 2 with a gap at x = 9 only
+        for x in range(9):
+            self.assertTrue(self.world.add_wall(Coordinates(x, 2)))
+        self.ai1.get_sick()
+        for _ in range(30):
+            self.smart_ai.move_to_quarantine()
+        self.assertEqual(self.ai1.get_location(), Coordinates(0, 0))
+
+    def test_flow_field_is_recomputed_after_walls_change(self):
+        corner = self.world.get_coordinates(0, 0)
+        flow_field = self.world.get_flow_field(corner)
+        self.assertIs(self.world.get_flow_field(corner), flow_field)
+        self.assertEqual(flow_field.get_distance_at(4, 4), 8)
+        self.assertEqual(flow_field.get_direction(Coordinates(4, 4)), Direction.WEST)
+        self.assertIsNone(flow_field.get_direction(corner))
+
+        self.world.add_wall(Coordinates(0, 1))
+        self.world.add_wall(Coordinates(1, 0))
+        flow_field = self.world.get_flow_field(corner)
+        self.assertEqual(flow_field.get_distance_at(4, 4), UNREACHABLE)
+        self.assertIsNone(flow_field.get_direction(Coordinates(4, 4)))
+
+    def test_updated_flow_field_matches_new_field(self):
+        # With the share 1.0 every wall is added square by square, with 0.0 the field is always computed again
+        for share in (1.0, 0.0):
+            world = World(10, 10)
+            corner = world.get_coordinates(0, 0)
+            flow_field = world.get_flow_field(corner)
+            rng = random.Random(3)
+            with mock.patch("flow_field.MAX_REPAIR_SHARE", share):
+                for _ in range(40):
+                    world.add_wall(Coordinates(rng.randrange(10), rng.randrange(10)))
+                    # A direction is asked for before each wall, so that the cached directions are updated too
+                    flow_field.get_direction(Coordinates(rng.randrange(10), rng.randrange(10)))
+                    self.assertIs(world.get_flow_field(corner), flow_field)
+                    new_field = FlowField(world, corner)
+                    for x in range(10):
+                        for y in range(10):
+                            self.assertEqual(flow_field.get_distance_at(x, y), new_field.get_distance_at(x, y))
+                            self.assertEqual(flow_field.get_direction(Coordinates(x, y)),
+                                             new_field.get_direction(Coordinates(x, y)))
+
 class TestVaccinator(unittest.TestCase):
     """
     This class tests the functions in the class Vaccinator
@@ -325,6 +423,1021 @@ class TestBuilder(unittest.TestCase):
             wall_square = self.world.get_square(wall_location)
             self.assertTrue(wall_square.is_wall_square())
 
+    def test_building_targets_follow_world_size(self):
+        world = World(40, 20)
+        ai = AI(name="AI2", spread_type=0, infection_chance=100, death_chance=0,
+                incubation_duration=3, recovery_duration=100, vaccination_rate=0)
+        builder = Builder(ai)
+        world.add_AI(ai, Coordinates(5, 5), facing=Direction.NORTH)
+        targets = builder.get_building_targets()
+        self.assertEqual(len(targets), 40)
+        self.assertEqual({target.get_y() for target in targets}, {10})
+
+class TestSimulation(unittest.TestCase):
+    """
+    This class tests the headless simulation runner in simulation.py
+    """
+    def setUp(self):
+        self.params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_doctors": 1, "num_vaccinators": 1,
+                       "infection_chance": 80, "death_chance": 20, "incubation_duration": 2, "recovery_duration": 5}
+
+    def test_build_world(self):
+        world = build_world(self.params)
+        self.assertEqual(world.get_number_of_AI(), 25)
+        self.assertEqual(count_health_states(world)["sick"], 3)
+
+    def test_simulate_until_disease_is_gone(self):
+        results = simulate(self.params, seed=1, max_turns=1000)
+        self.assertLess(results["turns"], 1000)
+        self.assertEqual(len(results["history"]), results["turns"] + 1)
+        final_counts = results["history"][-1]
+        self.assertEqual(final_counts["sick"] + final_counts["infected"], 0)
+        self.assertEqual(results["total_population"], 25)
+
+    def test_simulate_max_turns(self):
+        results = simulate(self.params, seed=1, max_turns=2)
+        self.assertEqual(results["turns"], 2)
+
+    def test_simulate_tuple_parameters(self):
+        results = simulate((5, 0, 1, 0, 0, 0, 0, 1, 100, 0, 1, 2, 0), seed=2, max_turns=1000)
+        self.assertEqual(results["total_population"], 6)
+        self.assertEqual(results["dead_count"], 0)
+
+    def test_simulate_with_world_size(self):
+        world = build_world(self.params, 60, 25)
+        self.assertEqual((world.get_width(), world.get_height()), (60, 25))
+        results = simulate(self.params, seed=1, max_turns=5, width=60, height=25)
+        self.assertEqual((results["width"], results["height"]), (60, 25))
+        self.assertEqual(results["total_population"], 25)
+
+    @unittest.skipIf(array_world is None, "NumPy is not installed")
+    def test_simulate_with_array_engine(self):
+        results = simulate(self.params, seed=1, max_turns=1000, engine="arrays")
+        final_counts = results["history"][-1]
+        self.assertEqual(final_counts["sick"] + final_counts["infected"], 0)
+        self.assertEqual(results["total_population"], 25)
+
+
+class TestPlacement(unittest.TestCase):
+    """
+    This class tests the placement of new AI on random empty squares in placement.py and World.add_AIs
+    """
+    def setUp(self):
+        self.world = World(5, 4, seed=1)
+        for x in range(3):
+            self.world.add_wall(Coordinates(x, 0))
+
+    def create_AIs(self, count):
+        return [self.world.create_AI("AI", 0, 100, 0, 3, 7, 0) for i in range(count)]
+
+    def test_sample_empty_squares(self):
+        self.world.add_AI(self.create_AIs(1)[0], Coordinates(4, 3), Direction.NORTH)
+        squares = sample_empty_squares(self.world, 10, self.world.random.get_stream(0, 0, MOVE))
+        self.assertEqual(len(set(squares)), 10)
+        for x, y in squares:
+            self.assertTrue(self.world.get_square_at(x, y).is_empty())
+        # When more squares are asked for than there are, every empty square is returned
+        squares = sample_empty_squares(self.world, 100, self.world.random.get_stream(1, 0, MOVE))
+        self.assertEqual(len(set(squares)), 16)
+
+    def test_add_AIs(self):
+        AIs = self.create_AIs(3)
+        locations = [Coordinates(0, 1), Coordinates(0, 0), Coordinates(1, 1)]
+        self.assertEqual(self.world.add_AIs(AIs, locations, Direction.NORTH), 2)
+        self.assertEqual(self.world.get_AI_array(), [AIs[0], AIs[2]])
+
+    def test_add_AIs_registers_like_add_AI(self):
+        def create_world(world_class):
+            world = world_class(5, 4, seed=1)
+            world.track_changes = True
+            AIs = [world.create_AI("AI", 0, 100, 0, 3, 7, 0) for i in range(6)]
+            AIs[1].get_sick()
+            AIs[2].vaccinate()
+            AIs[3].get_infected()
+            return world, AIs, [Coordinates(i % 5, i // 5) for i in range(6)]
+
+        def get_registration(world):
+            ids = lambda AIs: [ai.id for ai in AIs]
+            return (ids(world.get_AI_array()), ids(world.changed_AI), world.statistics.gender_count,
+                    world.statistics.lifestyle_count, world.spatial_index.added,
+                    {name: ids(agents) for name, agents in world.state_index.sets.items()})
+
+        for world_class in (World, SparseWorld):
+            world, AIs, locations = create_world(world_class)
+            for ai, location in zip(AIs, locations):
+                world.add_AI(ai, location, Direction.NORTH)
+            bulk_world, bulk_AIs, locations = create_world(world_class)
+            with mock.patch.object(bulk_world, "add_AI") as add_AI:
+                self.assertEqual(bulk_world.add_AIs(bulk_AIs, locations, Direction.NORTH), 6)
+            add_AI.assert_not_called()
+            self.assertEqual(get_registration(bulk_world), get_registration(world))
+            self.assertIs(bulk_world.find_closest_AI(Coordinates(4, 3)), bulk_AIs[4])
+            self.assertTrue(all(ai.graphics_changed for ai in bulk_AIs))
+
+    def test_fill_world(self):
+        AIs = self.create_AIs(17)
+        add_AIs_at_random_locations(self.world, AIs)
+        self.assertEqual(self.world.get_number_of_AI(), 17)
+        self.assertEqual(len({ai.get_location() for ai in AIs}), 17)
+        self.assertRaises(ValueError, add_AIs_at_random_locations, self.world, self.create_AIs(1))
+
+    def test_AI_without_id(self):
+        world = World(5, 5, seed=1)
+        ai = AI(name="AI1", spread_type=0, infection_chance=100, death_chance=0, incubation_duration=3,
+                recovery_duration=7, vaccination_rate=0)
+        ai.set_brain(SmartAI(ai))
+        add_AIs_at_random_locations(world, [ai])
+        self.assertEqual(world.get_AI_array(), [ai])
+        self.assertEqual(ai.id, 0)
+
+    def test_build_full_world(self):
+        world = build_world({"num_smart_healthy": 890, "num_smart_sick": 10, "num_avoiding_healthy": 0,
+                             "num_doctors": 0, "num_vaccinators": 0, "num_builders": 0}, seed=3)
+        self.assertEqual(world.get_number_of_AI(), 900)
+        self.assertEqual(count_health_states(world)["sick"], 10)
+
+
+class TestSimulationStatistics(unittest.TestCase):
+    """
+    This class tests the per-world statistics in simulation_statistics.py
+    """
+    def setUp(self):
+        self.params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_doctors": 1, "num_vaccinators": 1,
+                       "infection_chance": 80, "death_chance": 20, "incubation_duration": 2, "recovery_duration": 5}
+
+    def test_attributes_are_counted_per_world(self):
+        world = build_world(self.params, seed=1)
+        other_world = build_world({"num_smart_healthy": 2}, seed=1)
+        self.assertEqual(sum(world.statistics.gender_count.values()), 25)
+        self.assertEqual(sum(world.statistics.lifestyle_count.values()), 25)
+        self.assertEqual(sum(other_world.statistics.smoker_count.values()), other_world.get_number_of_AI())
+        self.assertEqual(other_world.statistics.cured_count, 0)
+
+    def test_events_are_counted_per_world(self):
+        world = World(5, 5)
+        other_world = World(5, 5)
+        ai = AI(name="AI1", spread_type=0, infection_chance=100, death_chance=0, incubation_duration=3,
+                recovery_duration=7, vaccination_rate=0)
+        ai.set_brain(SmartAI(ai))
+        world.add_AI(ai, Coordinates(1, 1), facing=Direction.NORTH)
+        ai.vaccinate()
+        self.assertEqual(world.statistics.vaccinated_count, 1)
+        self.assertEqual(other_world.statistics.vaccinated_count, 0)
+        self.assertEqual(world.statistics.cured_count, 0)
+
+    def test_simulations_in_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        seeds = range(4)
+        expected = [simulate(self.params, seed=seed, max_turns=200) for seed in seeds]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda seed: simulate(self.params, seed=seed, max_turns=200), seeds))
+        self.assertEqual(results, expected)
+
+
+class TestSweep(unittest.TestCase):
+    """
+    This class tests the parameter sweep runner in sweep.py
+    """
+    def setUp(self):
+        self.grid = {"num_smart_healthy": [5], "num_smart_sick": [1], "infection_chance": [0, 100],
+                     "recovery_duration": [2]}
+
+    def test_expand_grid(self):
+        combinations = expand_grid({"infection_chance": [10, 50, 90], "num_doctors": [0, 2]})
+        self.assertEqual(len(combinations), 6)
+        self.assertEqual(combinations[-1]["infection_chance"], 90)
+        self.assertEqual(combinations[-1]["num_doctors"], 2)
+        self.assertEqual(combinations[0]["num_smart_healthy"], 40)
+        self.assertRaises(ValueError, expand_grid, {"infection": [1]})
+
+    def test_chunk_size(self):
+        self.assertEqual(get_chunk_size(10, 8), 1)
+        self.assertEqual(get_chunk_size(800, 4), 32)
+
+    def test_sweep_in_this_process(self):
+        results = list(sweep(self.grid, replicates=3, seed=10, workers=1, max_turns=100))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(sorted(result["seed"] for result in results), list(range(10, 16)))
+        self.assertEqual(sum(result["parameters"]["infection_chance"] == 100 for result in results), 3)
+        self.assertNotIn("history", results[0])
+
+    def test_sweep_in_worker_processes(self):
+        results = list(sweep(self.grid, replicates=2, seed=1, workers=2, max_turns=100, include_history=True))
+        self.assertEqual(sorted((result["scenario"], result["replicate"]) for result in results),
+                         [(0, 0), (0, 1), (1, 0), (1, 1)])
+        self.assertTrue(all(result["total_population"] == 6 for result in results))
+        self.assertIn("history", results[0])
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    This class tests the on-disk cache of simulation results in result_cache.py
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.params = {"num_smart_healthy": 10, "num_smart_sick": 2}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_results_are_reused(self):
+        cache = ResultCache(self.directory.name)
+        results = cached_simulate(self.params, seed=1, max_turns=100, cache=cache)
+        with mock.patch('result_cache.simulate', return_value={}) as mock_simulate:
+            self.assertEqual(cached_simulate(self.params, seed=1, max_turns=100, cache=cache), results)
+            mock_simulate.assert_not_called()
+            cached_simulate(self.params, seed=2, max_turns=100, cache=cache)
+            mock_simulate.assert_called_once()
+
+    def test_cache_key(self):
+        key = get_cache_key(self.params, 1)
+        self.assertEqual(get_cache_key(dict(self.params), 1), key)
+        self.assertNotEqual(get_cache_key(self.params, 2), key)
+        self.assertNotEqual(get_cache_key(self.params, 1, engine="arrays"), key)
+        self.assertNotEqual(get_cache_key(self.params, 1, width=40), key)
+        with mock.patch('result_cache.code_version', "changed"):
+            self.assertNotEqual(get_cache_key(self.params, 1), key)
+
+    def test_other_code_versions_are_deleted(self):
+        with mock.patch('result_cache.code_version', "0123456789abcdef"):
+            old_version = ResultCache(self.directory.name).directory
+        ResultCache(self.directory.name)
+        self.assertFalse(os.path.exists(old_version))
+
+    def test_other_directories_are_kept(self):
+        unrelated = os.path.join(self.directory.name, "important_data")
+        unmarked = os.path.join(self.directory.name, "fedcba9876543210")
+        for path in (unrelated, unmarked):
+            os.makedirs(path)
+            open(os.path.join(path, "results.txt"), "w").close()
+        ResultCache(self.directory.name)
+        self.assertTrue(os.path.exists(os.path.join(unrelated, "results.txt")))
+        self.assertTrue(os.path.exists(os.path.join(unmarked, "results.txt")))
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = ResultCache(self.directory.name, max_bytes=350)     # room for three results of 113 bytes
+        for index, key in enumerate(("a", "b", "c")):
+            cache.put(key, {"data": "x" * 100})
+            os.utime(cache.get_path(key), (index, index))
+        cache.get("a")      # a is now the most recently used result
+        cache.put("d", {"data": "x" * 100})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertIsNotNone(cache.get("d"))
+
+
+class TestResultsDatabase(unittest.TestCase):
+    """
+    This class tests the SQLite results store in results_database.py
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = ResultsDatabase(os.path.join(self.directory.name, "results.db"))
+
+    def tearDown(self):
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_add_runs(self):
+        grid = {"num_smart_healthy": [10], "num_smart_sick": [2], "spread_type": [0, 1], "infection_chance": [20, 80]}
+        results = list(sweep(grid, replicates=2, seed=1, workers=1, max_turns=100, include_history=True))
+        run_ids = self.database.add_runs(results)
+        self.assertEqual(len(run_ids), 8)
+        self.assertEqual(self.database.query("PRAGMA journal_mode"), [("wal",)])
+        self.assertEqual(self.database.query("SELECT COUNT(*) FROM series"),
+                         [(sum(len(result["history"]) for result in results),)])
+        self.assertEqual(self.database.query("SELECT seed, infection_chance, turns FROM runs WHERE id = ?",
+                                             (run_ids[-1],)),
+                         [(results[-1]["seed"], results[-1]["parameters"]["infection_chance"], results[-1]["turns"])])
+
+    def test_mean_by_parameter(self):
+        for infection_chance, dead_count in ((20, 1), (20, 3), (80, 6)):
+            results = simulate({"num_smart_healthy": 10, "num_smart_sick": 0}, seed=1, max_turns=0)
+            results["parameters"]["infection_chance"] = infection_chance
+            results["parameters"]["spread_type"] = 1
+            results["dead_count"] = dead_count
+            self.database.add_run(results)
+        self.database.add_run(simulate({"num_smart_healthy": 10}, seed=1, max_turns=0))   # spread type 0
+        mortality = self.database.get_mean_by_parameter("mortality_rate", "infection_chance", spread_type=1)
+        self.assertEqual([(value, round(mean, 6), count) for value, mean, count in mortality],
+                         [(20, 0.2, 2), (80, 0.6, 1)])
+        self.assertEqual(len(self.database.get_mean_by_parameter("turns", "spread_type")), 2)
+        self.assertRaises(ValueError, self.database.get_mean_by_parameter, "turns; DROP TABLE runs", "spread_type")
+
+
+class TestRandomStreams(unittest.TestCase):
+    """
+    This class tests the counter-based random streams in random_streams.py
+    """
+    def test_draws_depend_only_on_the_key(self):
+        streams = RandomStreams(7)
+        first = [streams.get_stream(3, 10, MOVE).random() for _ in range(2)]
+        self.assertEqual(first[0], first[1])
+        self.assertEqual(streams.random(3, 10, MOVE), first[0])
+        self.assertEqual(RandomStreams(7).random(3, 10, MOVE), first[0])
+        self.assertNotEqual(streams.random(3, 10, DEATH), first[0])
+        self.assertNotEqual(streams.random(4, 10, MOVE), first[0])
+        self.assertNotEqual(streams.random(3, 11, MOVE), first[0])
+        self.assertNotEqual(RandomStreams(8).random(3, 10, MOVE), first[0])
+
+    def test_draws_of_an_AI_continue_its_stream(self):
+        world = World(5, 5, seed=1)
+        ai = world.create_AI(name="AI1", spread_type=0, infection_chance=0, death_chance=0, incubation_duration=3,
+                             recovery_duration=7, vaccination_rate=0)
+        world.add_AI(ai, Coordinates(1, 1), facing=Direction.NORTH)
+        first = ai.get_random(MOVE).random()
+        second = ai.get_random(MOVE).random()
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, world.random.random(ai.id, world.turn_count, MOVE))
+        world.turn_count += 1
+        self.assertEqual(ai.get_random(MOVE).random(), world.random.random(ai.id, world.turn_count, MOVE))
+
+    def test_stream_methods(self):
+        stream = RandomStreams(1).get_stream(0, 0, MOVE)
+        values = [stream.randint(1, 3) for _ in range(300)]
+        self.assertEqual(set(values), {1, 2, 3})
+        self.assertTrue(all(0.0 <= stream.random() < 1.0 for _ in range(100)))
+        self.assertIn(stream.choice(Direction.get_values()), Direction.get_values())
+        self.assertRaises(IndexError, stream.choice, [])
+
+    def test_simulation_is_reproducible(self):
+        params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_avoiding_healthy": 5, "num_doctors": 1,
+                  "num_vaccinators": 1, "num_builders": 1}
+        self.assertEqual(simulate(params, seed=3, max_turns=200), simulate(params, seed=3, max_turns=200))
+
+    @unittest.skipIf(array_world is None, "NumPy is not installed")
+    def test_engines_give_identical_results(self):
+        params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_avoiding_healthy": 5, "num_doctors": 1,
+                  "num_vaccinators": 1, "num_builders": 1, "spread_type": 1}
+        results = simulate(params, seed=4, max_turns=200, engine="objects")
+        array_results = simulate(params, seed=4, max_turns=200, engine="arrays")
+        self.assertEqual(array_results.pop("engine"), "arrays")
+        results.pop("engine")
+        self.assertEqual(results, array_results)
+
+    @unittest.skipIf(array_world is None, "NumPy is not installed")
+    def test_random_array(self):
+        streams = RandomStreams(2 ** 70 + 5)
+        agent_ids = array_world.np.arange(50)
+        draws = array_world.get_random_array(streams, agent_ids, 12, DEATH)
+        self.assertEqual(list(draws), [streams.random(agent_id, 12, DEATH) for agent_id in range(50)])
+
+
+@unittest.skipIf(recorder is None, "NumPy is not installed")
+class TestTurnRecorder(unittest.TestCase):
+    """
+    This class tests the per-turn recorder in recorder.py
+    """
+    def setUp(self):
+        self.params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_doctors": 1, "num_vaccinators": 1,
+                       "infection_chance": 80, "death_chance": 20, "incubation_duration": 2, "recovery_duration": 5}
+
+    def test_recorded_counts_match_history(self):
+        turn_recorder = recorder.TurnRecorder(capacity=4)
+        results = simulate(self.params, seed=1, max_turns=1000, recorder=turn_recorder)
+        columns = turn_recorder.get_columns()
+        self.assertEqual(list(columns["turn"]), list(range(results["turns"] + 1)))
+        for name in ("susceptible", "infected", "sick", "recovered", "dead", "vaccinated"):
+            self.assertEqual(list(columns[name]), [counts[name] for counts in results["history"]])
+        self.assertEqual(columns["new_infections"].sum(), results["infected_count"])
+        self.assertEqual(columns["cured"][-1], results["cured_count"])
+
+    def test_save(self):
+        turn_recorder = recorder.TurnRecorder()
+        simulate(self.params, seed=2, max_turns=10, recorder=turn_recorder)
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "turns.npz")
+            turn_recorder.save(file_name)
+            with array_world.np.load(file_name) as data:
+                self.assertEqual(sorted(data.files), sorted(recorder.COLUMNS))
+                self.assertEqual(list(data["sick"]), list(turn_recorder.get_columns()["sick"]))
+
+
+class TestGeometry(unittest.TestCase):
+    """
+    This class tests the coordinate table, the neighbour offsets and the lookup tables of Direction.
+    """
+    def test_coordinates_are_hashable(self):
+        self.assertEqual(hash(Coordinates(3, 4)), hash(Coordinates(3, 4)))
+        self.assertEqual(len({Coordinates(3, 4), Coordinates(3, 4), Coordinates(4, 3)}), 2)
+
+    def test_coordinate_table(self):
+        table = CoordinateTable(5, 4)
+        self.assertIs(table.get(3, 2), table.get(3, 2))
+        self.assertEqual(table.get(3, 2), Coordinates(3, 2))
+        self.assertEqual(table.get(-1, 7), Coordinates(-1, 7))
+        self.assertIs(table.get_neighbor(table.get(3, 2), Direction.NORTH), table.get(3, 1))
+
+    def test_neighbor_offsets(self):
+        self.assertEqual(len(NEIGHBOR_OFFSETS[1]), 8)
+        self.assertEqual(len(NEIGHBOR_OFFSETS[2]), 24)
+        self.assertNotIn((0, 0), NEIGHBOR_OFFSETS[2])
+        self.assertEqual(NEIGHBOR_OFFSETS[1][:3], ((-1, -1), (-1, 0), (-1, 1)))
+
+    def test_direction_tables(self):
+        for direction in Direction.get_values():
+            clockwise = Direction.get_next_clockwise(direction)
+            self.assertEqual(Direction.get_next_counter_clockwise(clockwise), direction)
+            self.assertEqual((Direction.get_degrees(clockwise) - Direction.get_degrees(direction)) % 360, 90)
+        self.assertEqual(Direction.get_next_clockwise(Direction.WEST), Direction.NORTH)
+
+    def test_wall_border(self):
+        world = World(5, 4)
+        self.assertIs(world.get_square(Coordinates(-1, 0)), WALL)
+        self.assertIs(world.get_square(Coordinates(100, -100)), WALL)
+        self.assertIs(world.get_square_at(5 + BORDER - 1, -BORDER), WALL)
+        self.assertIs(world.get_square_at(4, 3), world.get_square(Coordinates(4, 3)))
+        self.assertFalse(world.get_square_at(4, 3).is_wall_square())
+        self.assertFalse(WALL.set_AI(AI('SmartAI_healthy', 0, 50, 10, 3, 10, 50)))
+        self.assertFalse(WALL.set_wall())
+        self.assertTrue(WALL.is_wall_square())
+
+
+class TestMemoryReport(unittest.TestCase):
+    """
+    This class tests that the AI, brains, squares and coordinates are stored compactly and that the memory report
+    of a world adds up.
+    """
+    def test_compact_objects(self):
+        world = build_world({"num_smart_healthy": 5, "num_doctors": 1})
+        for obj in (world.AI[0], world.AI[0].get_brain(), world.AI[-1].get_brain(), world.get_square_at(0, 0),
+                    world.get_coordinates(0, 0)):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_memory_report(self):
+        world = build_world({"num_smart_healthy": 20, "num_smart_sick": 0}, width=10, height=20)
+        report = get_memory_report(world)
+        self.assertEqual(report["number_of_AI"], 20)
+        self.assertEqual(report["number_of_squares"], 200)
+        self.assertGreater(report["bytes_per_AI"]["AI objects"], 0)
+        self.assertGreater(report["bytes_per_square"]["squares"], 0)
+        total = sum(report["bytes_per_AI"].values()) * 20 + sum(report["bytes_per_square"].values()) * 200
+        self.assertAlmostEqual(total, report["total_bytes"])
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """
+    This class tests the spatial index of the world. The closest AI it finds should be the same AI that min() over the
+    AI list of the world finds, also after the AI have moved and died.
+    """
+    def setUp(self):
+        random.seed(4)
+        self.world = build_world({"num_smart_healthy": 150, "num_smart_sick": 10}, width=40, height=25)
+
+    def assert_same_as_linear_search(self, predicate):
+        for ai in self.world.AI:
+            if ai.is_dead():
+                continue
+            candidates = [other for other in self.world.AI if other is not ai and not other.is_dead()
+                          and predicate(other)]
+            expected = min(candidates, key=lambda other: ai.brain.distance_to(other)) if candidates else None
+            self.assertIs(self.world.find_closest_AI(ai.get_location(), predicate, exclude=ai), expected)
+
+    def test_find_closest_AI(self):
+        self.assert_same_as_linear_search(lambda ai: True)
+        self.assert_same_as_linear_search(lambda ai: ai.is_sick())
+
+    def test_find_closest_AI_after_moving_and_dying(self):
+        for i in range(5):
+            self.world.next_full_turn()
+        for ai in self.world.AI[:20]:
+            ai.die()
+        self.assert_same_as_linear_search(lambda ai: True)
+        self.assert_same_as_linear_search(lambda ai: ai.is_susceptible())
+
+    def test_no_matching_AI(self):
+        ai = self.world.AI[0]
+        self.assertIsNone(self.world.find_closest_AI(ai.get_location(), lambda other: False, exclude=ai))
+
+    def test_find_closest_AI_in_sparse_world(self):
+        # Most buckets of the sparse index are empty, so the searches also fall back to searching the stored buckets
+        self.world = build_world({"num_smart_healthy": 150, "num_smart_sick": 10}, width=2000, height=1500,
+                                 engine="sparse", seed=4)
+        self.assert_same_as_linear_search(lambda ai: True)
+        self.assert_same_as_linear_search(lambda ai: ai.is_sick())
+        for i in range(3):
+            self.world.next_full_turn()
+        self.assert_same_as_linear_search(lambda ai: ai.is_susceptible())
+
+
+class TestStateIndex(unittest.TestCase):
+    """
+    This class tests that the state index of the world follows the health states, vaccinations and roles of the AI.
+    """
+    def setUp(self):
+        self.world = World(10, 10)
+        self.ai1 = AI(name="AI1", spread_type=0, infection_chance=100, death_chance=0,
+                      incubation_duration=3, recovery_duration=7, vaccination_rate=0, is_doctor=True)
+        self.ai2 = AI(name="AI2", spread_type=0, infection_chance=100, death_chance=0,
+                      incubation_duration=3, recovery_duration=7, vaccination_rate=0)
+        self.ai2.get_sick()
+        self.world.add_AI(self.ai1, Coordinates(4, 4), facing=Direction.NORTH)
+        self.world.add_AI(self.ai2, Coordinates(6, 6), facing=Direction.NORTH)
+
+    def test_add_AI(self):
+        self.assertIn(self.ai1, self.world.get_AI_in_state("susceptible"))
+        self.assertIn(self.ai1, self.world.get_AI_in_state("doctor"))
+        self.assertIn(self.ai1, self.world.get_AI_in_state("unvaccinated_healthy"))
+        self.assertIn(self.ai2, self.world.get_AI_in_state("sick"))
+        self.assertIn(self.ai2, self.world.get_AI_in_state("smart"))
+        self.assertTrue(self.world.has_active_disease())
+
+    def test_state_changes(self):
+        self.ai2.get_healthy()
+        self.assertNotIn(self.ai2, self.world.get_AI_in_state("sick"))
+        self.assertIn(self.ai2, self.world.get_AI_in_state("recovered"))
+        self.assertFalse(self.world.has_active_disease())
+        self.ai1.get_infected()
+        self.assertEqual(len(self.world.get_AI_in_state("infected")), 1)
+        self.assertNotIn(self.ai1, self.world.get_AI_in_state("unvaccinated_healthy"))
+        self.ai1.die()
+        self.assertEqual(len(self.world.get_AI_in_state("infected")), 0)
+        self.assertIn(self.ai1, self.world.get_AI_in_state("dead"))
+
+    def test_vaccinate(self):
+        self.ai1.vaccinate()
+        self.assertIn(self.ai1, self.world.get_AI_in_state("vaccinated"))
+        self.assertNotIn(self.ai1, self.world.get_AI_in_state("unvaccinated_healthy"))
+
+    def test_choice_excludes_AI(self):
+        healthy_AI = self.world.get_AI_in_state("unvaccinated_healthy")
+        for seed in range(10):
+            self.assertIsNone(healthy_AI.choice(random.Random(seed), exclude=self.ai1))
+        self.ai2.get_healthy()
+        for seed in range(10):
+            self.assertIs(healthy_AI.choice(random.Random(seed), exclude=self.ai1), self.ai2)
+
+
+class TestDeadAI(unittest.TestCase):
+    """
+    This class tests that dead AI stop taking turns and are removed from the AI list of the world at the end of the
+    full turn, without changing the order of the remaining AI.
+    """
+    def setUp(self):
+        self.world = World(10, 10)
+        self.ais = []
+        for i in range(6):
+            ai = AI(name=f"AI{i}", spread_type=0, infection_chance=0, death_chance=0,
+                    incubation_duration=3, recovery_duration=7, vaccination_rate=0)
+            ai.set_brain(SmartAI(ai))
+            self.world.add_AI(ai, Coordinates(i, 0), facing=Direction.NORTH)
+            self.ais.append(ai)
+
+    @mock.patch('AI.AI.take_turn', autospec=True)
+    def test_dead_AI_are_removed(self, mock_take_turn):
+        self.ais[1].die()
+        self.ais[4].die()
+        self.world.next_full_turn()
+        self.assertEqual(self.world.AI, [self.ais[0], self.ais[2], self.ais[3], self.ais[5]])
+        self.assertEqual(mock_take_turn.call_args_list, [mock.call(self.ais[i]) for i in (0, 2, 3, 5)])
+        self.assertEqual(len(self.world.get_AI_in_state("dead")), 2)
+
+    def test_turn_passes_to_same_AI(self):
+        self.world.next_AI_turn()
+        self.world.next_AI_turn()
+        self.ais[0].die()
+        self.ais[1].die()
+        self.world.remove_dead_AI()
+        self.assertIs(self.world.get_next_AI(), self.ais[2])
+
+    def test_simulation_counts_dead_AI(self):
+        results = simulate({"num_smart_healthy": 10, "num_smart_sick": 10, "death_chance": 100,
+                            "recovery_duration": 1}, seed=3, max_turns=100)
+        self.assertEqual(results["total_population"], 20)
+        self.assertGreaterEqual(results["dead_count"], 10)
+
+
+class TestSparseWorld(unittest.TestCase):
+    """
+    This class tests the sparse backend in sparse_world.py, which only stores the squares that contain an AI or a
+    wall.
+    """
+    def setUp(self):
+        self.world = SparseWorld(100000, 100000)
+        self.ai = AI(name="AI1", spread_type=0, infection_chance=100, death_chance=0,
+                     incubation_duration=3, recovery_duration=7, vaccination_rate=0)
+        self.world.add_AI(self.ai, Coordinates(99999, 5), facing=Direction.NORTH)
+
+    def test_squares(self):
+        self.assertIs(self.world.get_square(Coordinates(99999, 5)).get_AI(), self.ai)
+        self.assertTrue(self.world.get_square(Coordinates(50000, 50000)).is_empty())
+        self.assertIs(self.world.get_square(Coordinates(100000, 5)), WALL)
+        self.assertTrue(self.world.contains(Coordinates(0, 99999)))
+        self.assertFalse(self.world.contains(Coordinates(-1, 0)))
+        self.assertTrue(self.world.add_wall(Coordinates(7, 8)))
+        self.assertFalse(self.world.add_wall(Coordinates(7, 8)))
+        self.assertFalse(self.world.add_wall(Coordinates(99999, 5)))
+        self.assertTrue(self.world.get_square(Coordinates(7, 8)).is_wall_square())
+        self.assertEqual(self.world.get_wall_squares(), [(7, 8)])
+        self.assertIs(self.world.get_AI_at(99999, 5), self.ai)
+        self.assertIsNone(self.world.get_AI_at(100000, 5))
+        self.assertTrue(self.world.is_empty_at(7, 9))
+        self.assertFalse(self.world.is_empty_at(7, 8))
+        self.assertFalse(self.world.is_empty_at(-1, 8))
+        self.assertTrue(self.world.is_wall_at(7, 8))
+        self.assertTrue(self.world.is_wall_at(-1, 8))
+
+    def test_only_used_squares_are_stored(self):
+        self.assertTrue(self.ai.move(Direction.NORTH))
+        self.assertFalse(self.ai.move(Direction.EAST))     # the edge of the world
+        self.assertEqual(self.world.occupants, {99999 * 100000 + 4: self.ai})
+        self.assertEqual(len(self.world.spatial_index.buckets), 1)
+        self.ai.die()
+        self.assertEqual(self.world.occupants, {})
+        self.assertEqual(self.world.spatial_index.buckets, {})
+        self.assertLess(get_memory_report(self.world)["total_bytes"], 10000)
+
+    def test_simulation_matches_object_world(self):
+        params = {"num_smart_healthy": 20, "num_smart_sick": 3, "num_avoiding_healthy": 5, "num_doctors": 1,
+                  "num_vaccinators": 1, "num_builders": 0}
+        expected = simulate(params, seed=2, max_turns=200)
+        results = simulate(params, seed=2, max_turns=200, engine="sparse")
+        self.assertEqual(results["history"], expected["history"])
+
+
+@unittest.skipIf(array_world is None, "NumPy is not installed")
+class TestArrayWorld(unittest.TestCase):
+    """
+    This class tests the NumPy backend in array_world.py. The AI views should behave like normal AI, while their
+    state is stored in the arrays of the engine.
+    """
+    def setUp(self):
+        self.world = array_world.ArrayWorld(10, 10)
+        self.ai1 = self.world.create_AI(name="AI1", spread_type=0, infection_chance=100, death_chance=0,
+                                        incubation_duration=3, recovery_duration=7, vaccination_rate=0, is_doctor=True)
+        self.ai2 = self.world.create_AI(name="AI2", spread_type=0, infection_chance=100, death_chance=0,
+                                        incubation_duration=3, recovery_duration=7, vaccination_rate=0)
+        self.ai2.get_sick()
+        self.world.add_AI(self.ai1, Coordinates(4, 4), facing=Direction.NORTH)
+        self.world.add_AI(self.ai2, Coordinates(6, 6), facing=Direction.NORTH)
+        self.doctors = Doctors(self.ai1)
+        self.ai1.set_brain(self.doctors)
+
+    def test_state_is_stored_in_arrays(self):
+        engine = self.world.engine
+        self.assertEqual(engine.occupancy[6, 6], self.ai2.index)
+        self.assertEqual(engine.state[self.ai2.index], array_world.SICK)
+        self.assertEqual(engine.role[self.ai1.index], array_world.DOCTOR)
+        self.assertTrue(self.ai1.is_doctor_instance())
+        self.assertTrue(self.ai2.is_sick())
+        self.assertFalse(self.ai2.is_susceptible())
+
+    def test_move(self):
+        self.assertTrue(self.ai1.move(Direction.EAST))
+        self.assertEqual(self.ai1.get_location(), Coordinates(5, 4))
+        self.assertEqual(self.ai1.get_facing(), Direction.EAST)
+        self.assertTrue(self.world.get_square(Coordinates(4, 4)).is_empty())
+        self.assertIs(self.world.get_square(Coordinates(5, 4)).get_AI(), self.ai1)
+
+    def test_walls(self):
+        self.assertTrue(self.world.add_wall(Coordinates(4, 3)))
+        self.assertFalse(self.ai1.move(Direction.NORTH))
+        self.assertTrue(self.world.get_square(Coordinates(4, 3)).is_wall_square())
+        self.assertTrue(self.world.get_square(Coordinates(-1, 3)).is_wall_square())
+
+    def test_square_predicates(self):
+        self.world.add_wall(Coordinates(4, 3))
+        with mock.patch('array_world.ArraySquare') as mock_square:
+            self.assertIs(self.world.get_AI_at(6, 6), self.ai2)
+            self.assertIsNone(self.world.get_AI_at(-2, 6))
+            self.assertFalse(self.world.is_empty_at(6, 6))
+            self.assertFalse(self.world.is_empty_at(4, 3))
+            self.assertTrue(self.world.is_empty_at(5, 5))
+            self.assertTrue(self.world.is_wall_at(4, 3))
+            self.assertTrue(self.world.is_wall_at(10, 0))
+            self.assertFalse(self.world.is_wall_at(6, 6))
+            self.ai1.take_turn()
+            mock_square.assert_not_called()
+
+    def test_cure_nearby_AI(self):
+        self.ai1.move(Direction.EAST)
+        self.ai1.move(Direction.SOUTH)
+        self.doctors.cure_nearby_AI()
+        self.assertTrue(self.ai2.is_recovered())
+
+    def test_arrays_grow(self):
+        for i in range(100):
+            self.world.create_AI(f"AI{i}", 0, 100, 0, 3, 7, 0)
+        self.assertEqual(self.world.engine.count, 102)
+        self.assertEqual(self.world.engine.state[self.ai2.index], array_world.SICK)
+
+
+@unittest.skipIf(array_world is None, "NumPy is not installed")
+class TestVectorizedInfection(unittest.TestCase):
+    """
+    This class tests the whole-grid infection step of VectorizedWorld. The sliding-window sums are compared with
+    direct counting, and the infection test of TestDiseaseLogic is repeated for both spread types.
+    """
+    def test_count_neighbors(self):
+        random.seed(5)
+        mask = array_world.np.array([[int(random.random() < 0.4) for y in range(9)] for x in range(7)])
+        for radius in (1, 2):
+            counts = array_world.count_neighbors(mask, radius)
+            for x in range(7):
+                for y in range(9):
+                    expected = mask[max(0, x - radius):x + radius + 1, max(0, y - radius):y + radius + 1].sum()
+                    self.assertEqual(counts[x, y], expected - mask[x, y])
+
+    def infect_center(self, spread_type, world_size=5):
+        random.seed(3)
+        world = array_world.VectorizedWorld(world_size, world_size)
+        ais = []
+        for x in range(world_size):
+            for y in range(world_size):
+                ai = world.create_AI(f"AI{x}{y}", spread_type, 100, 0, 3, 7, 0)
+                ai.susceptibility = 1.0
+                world.add_AI(ai, Coordinates(x, y), Direction.NORTH)
+                ais.append(ai)
+        center = world.get_square(Coordinates(2, 2)).get_AI()
+        center.get_sick()
+        world.update_disease_status()
+        return world, center, ais
+
+    def test_infection_spread(self):
+        world, center, ais = self.infect_center(spread_type=0)
+        for ai in ais:
+            distance = max(abs(ai.get_location().get_x() - 2), abs(ai.get_location().get_y() - 2))
+            if ai is center:
+                self.assertTrue(ai.is_sick())
+            elif distance == 1:
+                self.assertTrue(ai.is_infected())
+            else:
+                self.assertTrue(ai.is_susceptible())
+        self.assertEqual(world.statistics.infected_count, 8)
+
+    def test_infection_spread_2(self):
+        world, center, ais = self.infect_center(spread_type=1)
+        for ai in ais:
+            if ai is not center:
+                self.assertTrue(ai.is_infected())
+
+    def test_unknown_spread_type(self):
+        world, center, ais = self.infect_center(spread_type=2)
+        self.assertEqual(world.statistics.infected_count, 0)
+        params = {"num_smart_healthy": 20, "num_smart_sick": 3, "spread_type": 2}
+        expected = simulate(params, seed=1, max_turns=100)
+        self.assertEqual(expected["infected_count"], 0)
+        for engine in ("arrays", "vectorized", "sparse"):
+            results = simulate(params, seed=1, max_turns=100, engine=engine)
+            self.assertEqual(results["infected_count"], 0)
+            self.assertEqual(results["dead_count"] + results["recovered_count"],
+                             expected["dead_count"] + expected["recovered_count"])
+
+    def test_vaccination_prevents_infection(self):
+        random.seed(3)
+        world = array_world.VectorizedWorld(5, 5)
+        sick = world.create_AI("sick", 0, 100, 0, 3, 7, 100)
+        healthy = world.create_AI("healthy", 0, 100, 0, 3, 7, 100)
+        sick.get_sick()
+        healthy.vaccinate()
+        world.add_AI(sick, Coordinates(2, 2), Direction.NORTH)
+        world.add_AI(healthy, Coordinates(2, 3), Direction.NORTH)
+        world.update_disease_status()
+        self.assertTrue(healthy.is_susceptible())
+
+
+class TestSimulationWorker(unittest.TestCase):
+    """
+    This class tests the stepping of a world in simulation_worker.py, which the GUI uses with and without a background
+    thread
+    """
+    def setUp(self):
+        self.world = mock.Mock()
+        self.world.turns = 0
+        self.world.has_active_disease.side_effect = lambda: self.world.turns < 40
+
+        def next_full_turn():
+            time.sleep(0.002)
+            self.world.turns += 1
+        self.world.next_full_turn.side_effect = next_full_turn
+
+    def test_run_turns(self):
+        run_turns(self.world, 3, 0.0, 0.0)
+        self.assertEqual(self.world.turns, 3)
+        turn_cost = run_turns(self.world, None, 0.0, 0.0)
+        self.assertEqual(self.world.turns, 4)
+        self.assertGreater(turn_cost, 0)
+        run_turns(self.world, None, 0.02, turn_cost)
+        self.assertGreater(self.world.turns, 5)
+        self.assertLess(self.world.turns, 15)
+        run_turns(self.world, 100, 0.0, 0.0)
+        self.assertEqual(self.world.turns, 40)
+        run_turns(self.world, None, 1.0, 0.0)
+        self.assertEqual(self.world.turns, 40)
+
+    def test_worker_leaves_time_for_drawing_at_full_speed(self):
+        buffer = mock.Mock()
+        worker = SimulationWorker(self.world, mock.Mock(), buffer, turn_interval=0.1, publish_interval=0.02)
+        worker.turns_per_frame = None
+        with mock.patch.object(worker.stop_event, "wait") as wait:
+            worker.run()
+        self.assertEqual(self.world.turns, 40)
+        self.assertGreater(worker.turn_cost, 0)
+        self.assertGreater(wait.call_count, 3)
+        self.assertGreater(max(call.args[0] for call in wait.call_args_list), 0)
+        self.assertEqual(buffer.publish.call_count, wait.call_count + 1)
+
+
+@unittest.skipIf(GUI is None, "PyQt6 is not installed")
+class TestGUI(unittest.TestCase):
+    """
+    This class tests the drawing of the world in GUI.py and the snapshots it draws
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.world = World(6, 4)
+        self.world.add_wall(Coordinates(1, 1))
+        self.gui = GUI(self.world, 10)
+        self.gui.timer.stop()
+
+    def tearDown(self):
+        self.gui.close()
+
+    def get_color(self, x, y):
+        return self.gui.grid_item.pixmap().toImage().pixelColor(x * 10 + 5, y * 10 + 5)
+
+    def test_grid_is_a_single_pixmap(self):
+        self.assertEqual(self.gui.grid_pixmap.width(), 61)
+        self.assertEqual(self.gui.grid_pixmap.height(), 41)
+        self.assertEqual(self.get_color(1, 1), WALL_COLOR)
+        self.assertEqual(self.get_color(2, 1), FLOOR_COLOR)
+
+    def refresh(self, gui):
+        gui.buffer.publish(gui.snapshots.take())
+        gui.update()
+
+    def test_large_world_is_scaled_to_fit(self):
+        world = World(800, 50)
+        world.add_wall(Coordinates(799, 49))
+        gui = GUI(world, 20)
+        gui.timer.stop()
+        self.assertEqual(gui.square_size, 5)
+        self.assertEqual(gui.grid_pixmap.width(), 4001)
+        self.assertEqual(gui.scene.sceneRect().width(), 4000 + 40)
+        self.assertEqual(gui.grid_pixmap.toImage().pixelColor(799 * 5 + 2, 49 * 5 + 2), WALL_COLOR)
+        gui.close()
+
+    def test_only_changed_squares_are_drawn(self):
+        self.assertEqual(self.get_color(3, 2), FLOOR_COLOR)
+        self.world.add_wall(Coordinates(3, 2))
+        self.assertEqual(self.world.changed_squares, [(3, 2)])
+        self.refresh(self.gui)
+        self.assertEqual(self.world.changed_squares, [])
+        self.assertEqual(self.get_color(3, 2), WALL_COLOR)
+
+    def add_AI(self, name, location):
+        ai = AI(name=name, spread_type=0, infection_chance=100, death_chance=0, incubation_duration=3,
+                recovery_duration=7, vaccination_rate=0)
+        ai.set_brain(SmartAI(ai))
+        self.world.add_AI(ai, location, facing=Direction.NORTH)
+        return ai
+
+    def test_only_changed_AI_are_updated(self):
+        moving = self.add_AI("moving", Coordinates(4, 2))
+        resting = self.add_AI("resting", Coordinates(0, 3))
+        self.refresh(self.gui)
+        self.assertIs(self.gui.AI_graphics_items[moving], moving.graphics_item)
+        self.assertEqual(len(self.gui.get_AI_graphics_items()), 2)
+        self.assertTrue(moving.move(Direction.EAST))
+        moving.get_infected()
+        self.assertEqual(self.world.changed_AI, [moving])
+        with mock.patch.object(resting.graphics_item, "updateFromRecord") as update_resting:
+            self.refresh(self.gui)
+        update_resting.assert_not_called()
+        self.assertEqual(self.world.changed_AI, [])
+        self.assertFalse(moving.graphics_changed)
+        self.assertEqual(moving.graphics_item.x(), 50)
+        self.assertEqual(moving.graphics_item.rotation(), Direction.get_degrees(Direction.EAST))
+        self.assertEqual(moving.graphics_item.color, INFECTED_COLOR)
+
+    def test_dead_AI_are_removed_from_the_registry(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        self.refresh(self.gui)
+        self.gui.remove_AI(ai)
+        self.assertTrue(ai.is_dead())
+        self.refresh(self.gui)
+        self.assertNotIn(ai, self.gui.AI_graphics_items)
+        self.assertIsNone(ai.graphics_item)
+
+    def render(self, gui):
+        image = QImage(60, 40, QImage.Format.Format_ARGB32)
+        painter = QPainter(image)
+        gui.scene.render(painter, QRectF(0, 0, 60, 40), QRectF(0, 0, 60, 40))
+        painter.end()
+        return image
+
+    def test_batched_renderer(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        ai.get_sick()
+        gui = GUI(self.world, 10, renderer="batched")
+        gui.timer.stop()
+        self.assertIsNone(ai.graphics_item)
+        self.assertEqual(gui.get_AI_graphics_items(), [])
+        self.assertEqual(self.render(gui).pixelColor(45, 25), SICK_COLOR)
+        self.assertTrue(ai.move(Direction.EAST))
+        self.refresh(gui)
+        image = self.render(gui)
+        self.assertEqual(image.pixelColor(55, 25), SICK_COLOR)
+        self.assertEqual(image.pixelColor(45, 25), FLOOR_COLOR)
+        gui.close()
+
+    @unittest.skipIf(array_world is None, "NumPy is not installed")
+    def test_batched_renderer_with_array_world(self):
+        world = array_world.ArrayWorld(6, 4)
+        world.add_wall(Coordinates(1, 1))
+        ai = world.create_AI("ai", 0, 100, 0, 3, 7, 0)
+        ai.set_brain(SmartAI(ai))
+        world.add_AI(ai, Coordinates(4, 2), Direction.NORTH)
+        unplaced = world.create_AI("unplaced", 0, 100, 0, 3, 7, 0)
+        gui = GUI(world, 10, renderer="batched")
+        gui.timer.stop()
+        image = self.render(gui)
+        self.assertEqual(image.pixelColor(45, 25), SUSCEPTIBLE_COLOR)
+        self.assertEqual(image.pixelColor(15, 15), WALL_COLOR)
+        self.assertEqual(image.pixelColor(55, 35), FLOOR_COLOR)
+        gui.close()
+
+    def test_snapshots_are_not_changed_by_later_turns(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        snapshot = self.gui.snapshots.take()
+        self.assertEqual(snapshot.records[ai], (4, 2, Direction.NORTH, "susceptible"))
+        ai.move(Direction.WEST)
+        ai.get_sick()
+        later = self.gui.snapshots.take()
+        self.assertEqual(snapshot.records[ai], (4, 2, Direction.NORTH, "susceptible"))
+        self.assertEqual(later.records, {ai: (3, 2, Direction.WEST, "sick")})
+        self.assertEqual(later.changed_AI, {ai})
+        self.assertTrue(later.active)
+
+    def test_snapshots_contain_only_changes(self):
+        sick = self.add_AI("sick", Coordinates(5, 0))
+        resting = self.add_AI("resting", Coordinates(0, 3))
+        sick.get_sick()
+        self.gui.snapshots.take()
+        with mock.patch('snapshot.get_record') as mock_get_record:
+            self.assertEqual(self.gui.snapshots.take().records, {})
+        mock_get_record.assert_not_called()
+        self.world.add_wall(Coordinates(4, 0))
+        self.assertEqual(self.gui.snapshots.take().records, {sick: (5, 0, Direction.NORTH, "sick")})
+        self.world.add_wall(Coordinates(5, 1))
+        self.assertEqual(self.gui.snapshots.take().records, {sick: (5, 0, Direction.NORTH, "stuck")})
+        resting.die()
+        self.assertEqual(self.gui.snapshots.take().records, {resting: None})
+
+    def test_skipped_snapshots_are_merged(self):
+        first = self.add_AI("first", Coordinates(4, 2))
+        self.gui.buffer.publish(self.gui.snapshots.take())
+        second = self.add_AI("second", Coordinates(0, 3))
+        self.gui.buffer.publish(self.gui.snapshots.take())
+        snapshot = self.gui.buffer.take()
+        self.assertEqual(snapshot.changed_AI, {first, second})
+        self.assertIsNone(self.gui.buffer.take())
+
+    def test_threaded_stepping(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        ai.get_sick()
+        gui = GUI(self.world, 10, threaded=True, turn_interval=0)
+        gui.worker.join(10)
+        self.assertFalse(gui.worker.is_alive())
+        self.assertFalse(self.world.has_active_disease())
+        gui.update()
+        self.assertEqual(gui.AI_graphics_items[ai].color, RECOVERED_COLOR)
+        gui.close()
+
+    def test_several_turns_per_frame(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        ai.get_sick()
+        gui = GUI(self.world, 10)
+        gui.timer.stop()
+        gui.speed_box.setCurrentText("5x")
+        self.assertEqual(gui.turns_per_frame, 5)
+        gui.step_world()
+        self.assertEqual(self.world.turn_count, 5)
+        gui.update()
+        self.assertEqual(gui.turn_label.text(), "Turn 5")
+        gui.speed_box.setCurrentText("Max")
+        self.assertIsNone(gui.turns_per_frame)
+        gui.step_world()
+        self.assertGreater(self.world.turn_count, 5)
+        self.assertGreater(gui.turn_cost, 0)
+        gui.close()
+
+    def test_speed_of_worker(self):
+        ai = self.add_AI("ai", Coordinates(4, 2))
+        ai.get_sick()
+        gui = GUI(self.world, 10, threaded=True, turn_interval=0.1)
+        gui.set_speed(10)
+        self.assertEqual(gui.worker.turns_per_frame, 10)
+        gui.set_speed(None)
+        self.assertIsNone(gui.worker.turns_per_frame)
+        gui.worker.join(10)
+        self.assertFalse(self.world.has_active_disease())
+        self.assertGreater(gui.worker.turn_cost, 0)
+        gui.close()
 
 if __name__ == '__main__':
     unittest.main()
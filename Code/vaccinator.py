@@ -1,8 +1,9 @@
 import math
 from direction import Direction
-from coordinates import Coordinates
 from AI_brain import AIbrain
-import random
+from geometry import NEIGHBOR_OFFSETS
+from state_index import UNVACCINATED_HEALTHY
+from random_streams import MOVE
 
 """
 The Vaccinator class is a subclass of AIbrain, representing a type of AI that navigates through the world and
@@ -12,9 +13,7 @@ target. If there are no susceptible AI in the world, the Vaccinator moves random
 """
 
 class Vaccinator(AIbrain):
-    def __init__(self, body):
-        super(Vaccinator, self).__init__(body)
-        self.random = random.Random()
+    __slots__ = ()
 
     def move_body(self):
         """
@@ -48,19 +47,17 @@ class Vaccinator(AIbrain):
         Selects a random direction.
         """
         directions = Direction.get_values()
-        return self.random.choice(directions)
+        return self.get_random(MOVE).choice(directions)
 
     def find_healthy_AI(self):
         """
-        Finds all healthy AI in the world that have not been vaccinated or infected,
-        and returns the closest one to the current AI.
+        Finds the closest healthy AI in the world that has not been vaccinated or infected.
         """
-        healthy_AI = [ai for ai in self.body.world.AI if not ai.is_sick() and not ai.is_vaccinated()
-                      and not ai.is_infected() and ai is not self.body]
-        if not healthy_AI:
+        healthy_AI = self.body.world.get_AI_in_state(UNVACCINATED_HEALTHY)
+        if len(healthy_AI) == 0 or (len(healthy_AI) == 1 and self.body in healthy_AI):
             return None
-        closest_AI = min(healthy_AI, key=lambda ai: self.distance_to(ai))
-        return closest_AI
+        return self.body.world.find_closest_AI(self.body.get_location(), lambda ai: ai in healthy_AI,
+                                               exclude=self.body)
 
     def distance_to(self, other_AI):
         """
@@ -94,20 +91,14 @@ class Vaccinator(AIbrain):
         """
         Vaccinates any healthy AI in the neighboring squares that have not been vaccinated or infected.
         """
+        world = self.body.world
         current_location = self.body.get_location()
         x, y = current_location.get_x(), current_location.get_y()
 
-        for x_offset in range(-1, 2):
-            for y_offset in range(-1, 2):
-                if x_offset == 0 and y_offset == 0:
-                    continue
+        for x_offset, y_offset in NEIGHBOR_OFFSETS[1]:
+            # Squares outside the world are border walls, which never contain an AI
+            neighbor = world.get_AI_at(x + x_offset, y + y_offset)
 
-                neighbor_x = x + x_offset
-                neighbor_y = y + y_offset
-
-                if 0 <= neighbor_x < self.body.world.get_width() and 0 <= neighbor_y < self.body.world.get_height():
-                    neighbor_square = self.body.world.get_square(Coordinates(neighbor_x, neighbor_y))
-
-                    if neighbor_square.get_AI() is not None and not neighbor_square.get_AI().is_sick() \
-                            and not neighbor_square.get_AI().is_vaccinated() and not neighbor_square.get_AI().is_infected():
-                        neighbor_square.get_AI().vaccinate()
+            if neighbor is not None and not neighbor.is_sick() and not neighbor.is_vaccinated() \
+                    and not neighbor.is_infected():
+                neighbor.vaccinate()
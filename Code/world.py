@@ -1,4 +1,12 @@
-from square import Square
+from square import Square, WALL
+from AI import AI
+from spatial_index import SpatialIndex
+from state_index import StateIndex
+from geometry import CoordinateTable, BORDER
+from flow_field import FlowField
+from random_streams import RandomStreams, ATTRIBUTES
+from simulation_statistics import SimulationStatistics
+
 
 class World():
     """
@@ -6,14 +14,19 @@ class World():
     of squares that different kinds of AI can inhabit. The squares are
     identified by unique coordinates which range from 0...width-1 and
     0...height-1. Each square is represented by a Square object.
+    The world is surrounded by a border of BORDER wall squares, which
+    all refer to the same unchangeable wall square.
 
     AI can be added to the world, and the world
     maintains an AI listing which allows AI to take their turns in
     a round-robin fashion, in the order in which they were added.
     Each AI is represented by an AI object.
+
+    The world also keeps its AI in a spatial index, which is used to find the closest AI that matches a condition,
+    and in a state index, which keeps track of the AI in each health state and role.
     """
 
-    def __init__ (self, width, height):
+    def __init__ (self, width, height, seed=None):
         """
         Creates a new world with the specified dimensions.
         Initially all the squares of the new world are empty.
@@ -21,30 +34,96 @@ class World():
         Parameter width is the width of the world in squares
 
         Parameter height is the height of the world in squares
+
+        Parameter seed is the seed of the random streams of the world, or None to take one from the random module
+        """
+
+
+        self.width = width
+        self.height = height
+        # The squares are stored in a flat list, column by column, surrounded by a border of BORDER wall squares
+        self.padded_height = height + 2 * BORDER
+        self.grid = [WALL] * ((width + 2 * BORDER) * self.padded_height)
+        for x in range(width):
+            start = self.get_grid_index(x, 0)
+            self.grid[start:start + height] = [Square() for y in range(height)]
+        self.init_state(CoordinateTable(width, height), SpatialIndex(width, height), seed)
+
+    def init_state(self, coordinates, spatial_index, seed):
         """
+        Sets up the state that every kind of world has in addition to its squares: the AI, their indices, the walls
+        added, the random streams, the statistics and the change tracking of the GUI. The constructors of all
+        worlds call this method.
 
+        Parameter coordinates is the coordinate table of the world: CoordinateTable
 
-        self.squares = [None] * width
-        for x in range(self.get_width()):      # stepper
-            self.squares[x] = [None] * height
-            for y in range(self.get_height()):    # stepper
-                self.squares[x][y] = Square()    # fixed value
+        Parameter spatial_index is the spatial index of the world: SpatialIndex
+
+        Parameter seed is the seed of the random streams of the world, or None to take one from the random module
+        """
         self.AI = []                        # container
         self.turn = 0                         # kinda like stepper (but not quite) index to AI list
+        self.retired = 0                      # number of dead AI still waiting to be removed from the AI list
         self.gui = None
+        self.coordinates = coordinates
+        self.spatial_index = spatial_index
+        self.state_index = StateIndex()
+        self.wall_version = 0                 # incremented whenever a wall is added, see get_flow_field
+        self.wall_locations = []              # the locations of the added walls, in the order they were added
+        self.flow_fields = {}                 # maps target locations to their FlowField
+        self.random = RandomStreams(seed)     # the random numbers of the AI, see random_streams.py
+        self.turn_count = 0                   # number of full turns started
+        self.next_AI_id = 0                   # the id of the next AI created for or added to this world
+        self.recorder = None                  # records the health state counts of every full turn, see recorder.py
+        self.statistics = SimulationStatistics()   # the counts of the events of the simulation
+        self.track_changes = False            # flag, set when the GUI draws the world, see snapshot.py
+        self.changed_AI = []                  # the AI that have changed since the last snapshot
+        self.changed_squares = []             # the squares that have become walls since the last snapshot
 
     def get_width(self):
         """
         Returns width of the world in squares
         """
-        return len(self.squares)
+        return self.width
 
 
     def get_height(self):
         """
         Returns the height of the world in squares
         """
-        return len(self.squares[0])
+        return self.height
+
+
+    def get_grid_index(self, x, y):
+        """
+        Returns the index of the square (x, y) in the grid list. The coordinates may be at most BORDER squares
+        outside the world.
+        """
+        return (x + BORDER) * self.padded_height + y + BORDER
+
+    def create_AI(self, *args, **kwargs):
+        """
+        Creates a new AI that can be added to this world. The parameters are the same as those of AI. Worlds that
+        store their state differently override this method to create matching AI.
+
+        The AI gets the next id of this world, and its random attributes are drawn from its own random stream.
+
+        Returns the new AI: AI
+        """
+        agent_id = self.get_new_AI_id()
+        body = AI(*args, rng=self.random.get_stream(agent_id, 0, ATTRIBUTES), **kwargs)
+        body.id = agent_id
+        return body
+
+
+    def get_new_AI_id(self):
+        """
+        Returns a new id for an AI of this world. The ids are given out in order, starting from 0: int
+        """
+        agent_id = self.next_AI_id
+        self.next_AI_id += 1
+        return agent_id
+
 
     def add_AI(self, AI, location, facing):
         """
@@ -61,13 +140,53 @@ class World():
         Returns False if the square at the given location is not empty or the given AI is already located in some world (this or some other world), True otherwise
         """
         if AI.set_world(self, location, facing):
+            if AI.id is None:
+                AI.id = self.get_new_AI_id()
             self.AI.append(AI)
             self.get_square(location).set_AI(AI)
+            self.spatial_index.add(AI, location)
+            self.state_index.add(AI)
+            self.statistics.add_AI(AI)
+            AI.mark_graphics_changed()
             return True
         else:
             return False
 
 
+    def add_AIs(self, AIs, locations, facing):
+        """
+        Adds several new AI in the world at once, the first AI to the first location and so on, like add_AI. The AI
+        are placed in their squares one by one, and then registered in the AI list, the indices, the statistics and
+        the changes for the GUI in one update each. See placement.py for choosing random empty locations for them.
+
+        Parameter AIs is the AI to be added: list
+
+        Parameter locations is the coordinates of the AI: list
+
+        Parameter facing is the direction the AI are facing initially
+
+        Returns the number of AI that were added: int
+        """
+        added = []
+        added_locations = []
+        for AI, location in zip(AIs, locations):
+            if AI.set_world(self, location, facing):
+                if AI.id is None:
+                    AI.id = self.get_new_AI_id()
+                self.get_square(location).set_AI(AI)
+                added.append(AI)
+                added_locations.append(location)
+        self.AI.extend(added)
+        self.spatial_index.add_all(added, added_locations)
+        self.state_index.add_all(added)
+        self.statistics.add_AIs(added)
+        if self.track_changes:
+            for AI in added:
+                AI.graphics_changed = True
+            self.changed_AI.extend(added)
+        return len(added)
+
+
     def add_wall(self, location):
         """
         Adds a wall at the given location in the world, if
@@ -78,7 +197,53 @@ class World():
 
         Returns a boolean value indicating if the operation succeeded
         """
-        return self.get_square(location).set_wall()
+        if self.get_square(location).set_wall():
+            self.wall_version += 1
+            self.wall_locations.append(location)
+            if self.track_changes:
+                self.changed_squares.append((location.get_x(), location.get_y()))
+            return True
+        else:
+            return False
+
+
+    def get_flow_field(self, target):
+        """
+        Returns the flow field towards the given target location. The field is computed when it is first needed, and
+        the walls that have been added to the world since then are added to the field, see FlowField.update.
+
+        Parameter target is the location the AI move to: Coordinates
+
+        Returns the flow field, or None if the world has no flow fields (see SparseWorld): FlowField
+        """
+        flow_field = self.flow_fields.get(target)
+        if flow_field is None:
+            flow_field = FlowField(self, target)
+            self.flow_fields[target] = flow_field
+        elif flow_field.wall_version != self.wall_version:
+            flow_field.update(self)
+        return flow_field
+
+
+    def get_wall_mask(self):
+        """
+        Returns whether each square of the grid, including the border, is a wall, in the order of the grid list
+        (see get_grid_index): list of bools
+        """
+        return [square.is_wall for square in self.grid]
+
+
+    def get_wall_squares(self):
+        """
+        Returns the coordinates (x, y) of the squares of the world that are walls, not including the border: list of
+        tuples
+        """
+        walls = []
+        for x in range(self.width):
+            start = self.get_grid_index(x, 0)
+            column = self.grid[start:start + self.height]
+            walls.extend((x, y) for y, square in enumerate(column) if square.is_wall)
+        return walls
 
 
     def get_square(self, coordinates):
@@ -86,17 +251,71 @@ class World():
         Parameter coordinates is a location in the world
 
         Returns the square that is located at the given location. If the given coordinates point outside of the world,
-        this method returns a square that contains a wall and is not located in any world
+        this method returns a wall square that is not located in any world and can not be changed
         """
-        if self.contains(coordinates):
-            return self.squares[coordinates.get_x()][coordinates.get_y()]
+        x = coordinates.get_x()
+        y = coordinates.get_y()
+        if -BORDER <= x < self.width + BORDER and -BORDER <= y < self.height + BORDER:
+            return self.grid[(x + BORDER) * self.padded_height + y + BORDER]
         else:
-            return Square(True)
+            return WALL
+
+
+    def get_square_at(self, x, y):
+        """
+        Returns the square (x, y) without checking the coordinates, for looking at the squares around an AI. The
+        coordinates may be at most BORDER squares outside the world, where the squares are walls.
+
+        Parameter x is the x coordinate: int
+
+        Parameter y is the y coordinate: int
+        """
+        return self.grid[(x + BORDER) * self.padded_height + y + BORDER]
+
+
+    def get_AI_at(self, x, y):
+        """
+        Returns the AI in the square (x, y) or None if there is no AI in the square. The AI and the brains look at
+        the squares around them with this method and is_empty_at and is_wall_at, which other worlds implement without
+        creating square objects. Like get_square_at, the coordinates may be at most BORDER squares outside the world.
+        """
+        return self.grid[(x + BORDER) * self.padded_height + y + BORDER].AI
+
+
+    def is_empty_at(self, x, y):
+        """
+        Returns a boolean value stating whether the square (x, y) is empty, see get_AI_at
+        """
+        return self.grid[(x + BORDER) * self.padded_height + y + BORDER].is_empty()
+
+
+    def is_wall_at(self, x, y):
+        """
+        Returns a boolean value stating whether there is a wall in the square (x, y), see get_AI_at
+        """
+        return self.grid[(x + BORDER) * self.padded_height + y + BORDER].is_wall
+
+
+    def get_coordinates(self, x, y):
+        """
+        Returns the Coordinates (x, y). Coordinates inside the world are shared objects from the coordinate table
+        of the world, so probing squares does not create new objects.
+        """
+        return self.coordinates.get(x, y)
+
+
+    def get_neighbor(self, coordinates, direction):
+        """
+        Returns the Coordinates next to the given ones in the given direction, like Coordinates.get_neighbor but
+        using the coordinate table of the world.
+        """
+        return self.coordinates.get_neighbor(coordinates, direction)
 
 
     def get_number_of_AI(self):
         """
-        Returns the number of AI added to this world
+        Returns the number of AI taking turns in this world. Dead AI are not counted once they have been removed
+        from the AI list at the end of a full turn.
         """
         return len(self.AI)
 
@@ -139,21 +358,59 @@ class World():
         was reached. That is to say: the AI which was added first,
         moves first, followed by the one that was added second, etc.,
         until all AI have moved and the cycle starts over.
+        Dead AI waiting to be removed from the AI list are skipped.
         If there are no AI in the world, the method does nothing.
         """
         current = self.get_next_AI()
         if current is not None:
             self.turn = (self.turn + 1) % self.get_number_of_AI()
-            current.take_turn()
+            if not current.is_dead():
+                current.take_turn()
 
 
     def next_full_turn(self):
         """
         Lets each AI take its next turn. That is, calls the next_AI_turn
         a number of times equal to the number of AI in the world.
+        Then finishes the full turn with finish_full_turn, and finally
+        removes the AI that have died from the AI list.
         """
+        self.turn_count += 1
         for count in range(self.get_number_of_AI()):      # stepper
             self.next_AI_turn()
+        self.finish_full_turn()
+        if self.retired > 0:
+            self.remove_dead_AI()
+
+
+    def finish_full_turn(self):
+        """
+        Called after each AI has taken its turn in a full turn. Records the full turn if the world has a recorder.
+        Worlds that update all AI at once after their turns override this method.
+        """
+        if self.recorder is not None:
+            self.recorder.record(self)
+
+
+    def retire_AI(self, AI):
+        """
+        Marks that an AI of this world has died. Dead AI do not take turns anymore, and they are removed from the AI
+        list at the end of the current full turn.
+
+        Parameter AI is the AI that died
+        """
+        self.retired += 1
+
+
+    def remove_dead_AI(self):
+        """
+        Removes all dead AI from the AI list. The remaining AI keep their order, and the turn passes to the same AI
+        that would have had it next.
+        """
+        alive_before_turn = sum(1 for ai in self.AI[:self.turn] if not ai.is_dead())
+        self.AI = [ai for ai in self.AI if not ai.is_dead()]
+        self.turn = alive_before_turn % self.get_number_of_AI() if self.AI else 0
+        self.retired = 0
 
 
     def contains(self, coordinates):
@@ -169,6 +426,41 @@ class World():
         return 0 <= x_coordinate < self.get_width() and 0 <= y_coordinate < self.get_height()
 
 
+    def has_active_disease(self):
+        """
+        Returns a boolean value indicating if some AI in this world is still sick or infected
+        """
+        return self.state_index.count("sick") > 0 or self.state_index.count("infected") > 0
+
+
+    def get_AI_in_state(self, name):
+        """
+        Returns the AI of this world in the given health state or role, or in one of the sets "vaccinated" and
+        "unvaccinated_healthy" of the state index. The returned set is kept up to date by the world and must not be
+        modified.
+
+        Parameter name is the name of the set, see state_index.py: str
+
+        Returns: AgentSet
+        """
+        return self.state_index.get(name)
+
+
+    def find_closest_AI(self, location, predicate=None, exclude=None):
+        """
+        Finds the closest AI to the given location (measured as Manhattan distance) using the spatial index.
+
+        Parameter location is the location the distances are measured from: Coordinates
+
+        Parameter predicate is a function that is given an AI and returns whether it matches, or None to match any AI
+
+        Parameter exclude is an AI that is never returned, usually the AI that makes the query
+
+        Returns the closest matching AI or None if no AI matches
+        """
+        return self.spatial_index.find_nearest(location, predicate, exclude)
+
+
     def get_AI_array(self):
         """
         Returns an array containing all the robots currently located in this world: list